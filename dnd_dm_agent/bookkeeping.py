@@ -0,0 +1,388 @@
+"""Background post-turn bookkeeping for DnD DM Agent."""
+
+import asyncio
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from claude_agent_sdk import AssistantMessage, HookMatcher, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+
+from .claude_agent import PROJECT_ROOT, bookkeeping_prompt, post_turn_bookkeeping
+from .logging_config import logger
+from .metrics import metrics
+from .tools.campaign_instance_tools import CAMPAIGNS_DIR, materialize
+
+# File tools whose targets are gated on in-flight bookkeeping passes
+FILE_TOOLS = ("Read", "Write", "Edit")
+
+# File tools that modify their target, which copy-on-write materializes first
+WRITE_TOOLS = ("Write", "Edit")
+
+# Longest a narrating agent's file tool waits on a bookkeeping pass before proceeding anyway
+CLAIM_WAIT_TIMEOUT = 120.0
+
+# Tool inputs are abbreviated in bookkeeping transcripts
+MAX_TOOL_INPUT_CHARS = 200
+
+# Cap on the change list handed to a bookkeeping pass
+MAX_CHANGES = 20
+
+# Tools whose results change game state (dice outcomes, new campaign files, sheet updates)
+STATE_TOOLS = {
+    "mcp__dnd__roll_dice": "dice",
+    "mcp__dnd__roll_dice_batch": "dice",
+    "mcp__dnd__create_campaign_instance": "campaign",
+    "mcp__dnd__update_character_stats": "character",
+    "mcp__dnd__resolve_attack": "attack",
+}
+
+# Narration or player input that implies a sheet or record update
+STATE_MENTIONS = re.compile(
+    r"\b(hp|hit points?|damage|heal(?:s|ed|ing)?|temporary hit points|spell slots?|casts?|"
+    r"blinded|charmed|deafened|frightened|grappled|incapacitated|invisible|paralyzed|petrified|"
+    r"poisoned|prone|restrained|stunned|unconscious|exhaustion|concentration|"
+    r"short rest|long rest|level up|experience|xp)\b",
+    re.IGNORECASE,
+)
+
+
+def _normalize_path(path: str | Path) -> str:
+    return str((Path(PROJECT_ROOT) / path).resolve())
+
+
+def session_files(campaign: str, character: str) -> set[str]:
+    """Files a bookkeeping pass for this session may update."""
+    if not campaign:
+        return set()
+    instance = Path("campaigns") / campaign
+    files = {_normalize_path(instance / "campaign_progress.md")}
+    if character:
+        files.add(_normalize_path(instance / "characters" / f"{character}.md"))
+    return files
+
+
+class FileClaims:
+    """Files held by pending or running bookkeeping passes.
+
+    Claims are counted, so two sessions sharing a campaign file both have to
+    finish before waiters proceed.
+    """
+
+    def __init__(self):
+        self._counts: dict[str, int] = {}
+        self._released: dict[str, asyncio.Event] = {}
+
+    def claim(self, paths: set[str]) -> None:
+        for path in paths:
+            self._counts[path] = self._counts.get(path, 0) + 1
+            self._released.setdefault(path, asyncio.Event()).clear()
+
+    def release(self, paths: set[str]) -> None:
+        for path in paths:
+            count = self._counts.get(path, 0) - 1
+            if count > 0:
+                self._counts[path] = count
+                continue
+            self._counts.pop(path, None)
+            event = self._released.pop(path, None)
+            if event:
+                event.set()
+
+    def is_claimed(self, path: str | Path) -> bool:
+        return _normalize_path(path) in self._counts
+
+    async def wait(self, path: str | Path, timeout: float = CLAIM_WAIT_TIMEOUT) -> bool:
+        """Wait until no pass holds ``path``. Returns False if the wait timed out."""
+        event = self._released.get(_normalize_path(path))
+        if event is None:
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Gave up waiting on bookkeeping for %s after %ss", path, timeout)
+            return False
+
+
+file_claims = FileClaims()
+
+
+async def _wait_for_bookkeeping(input_data: dict[str, Any], tool_use_id: str | None, context: Any) -> dict[str, Any]:
+    path = input_data.get("tool_input", {}).get("file_path")
+    if path and file_claims.is_claimed(path):
+        logger.debug("%s on %s waiting for bookkeeping", input_data.get("tool_name"), path)
+        await file_claims.wait(path)
+    return {}
+
+
+def agent_hooks() -> dict[str, list[HookMatcher]]:
+    """PreToolUse hooks that make the narrating agent's file tools wait on claimed files.
+
+    Includes ``copy_on_write_hooks``.
+
+    Only pass these to narrating clients; a bookkeeping client with them would
+    wait on its own claims.
+    """
+    return {
+        "PreToolUse": [
+            HookMatcher(matcher="|".join(FILE_TOOLS), hooks=[_wait_for_bookkeeping], timeout=CLAIM_WAIT_TIMEOUT + 30),
+            *copy_on_write_hooks()["PreToolUse"],
+        ]
+    }
+
+
+def _instance_document(path: str) -> Path | None:
+    """The resolved path if ``path`` is a document directly inside a campaign instance."""
+    resolved = Path(_normalize_path(path))
+    return resolved if resolved.parent.parent == CAMPAIGNS_DIR.resolve() else None
+
+
+async def _copy_on_write(input_data: dict[str, Any], tool_use_id: str | None, context: Any) -> dict[str, Any]:
+    tool_input = input_data.get("tool_input", {})
+    path = tool_input.get("file_path")
+    document = _instance_document(path) if path else None
+    if document is None:
+        return {}
+    # A Read of a document the instance does not have yet materializes it as well:
+    # sent to the template instead, the instance path would stay unread and the
+    # CLI would reject the first Edit of it. Other Reads (of a shared link) are left alone.
+    if input_data.get("tool_name") in WRITE_TOOLS or not document.exists():
+        if await asyncio.to_thread(materialize, document):
+            logger.debug("Materialized %s before %s", document, input_data.get("tool_name"))
+    return {}
+
+
+def copy_on_write_hooks() -> dict[str, list[HookMatcher]]:
+    """PreToolUse hooks that layer campaign instances over their template (see campaign_instance_tools).
+
+    A document the instance does not have is copied from the template before
+    it is read or written, and a link shared with the template is broken
+    before it is written. Every client needs these.
+    """
+    return {"PreToolUse": [HookMatcher(matcher="|".join(FILE_TOOLS), hooks=[_copy_on_write])]}
+
+
+def _is_character_file(path: str) -> bool:
+    parts = Path(path).parts
+    return "campaigns" in parts and "characters" in parts
+
+
+@dataclass
+class Exchange:
+    """One player turn as seen by the narrating agent.
+
+    Doubles as a dirty tracker: ``changes`` lists the state-changing events seen
+    in the turn (dice results, character file access, campaign writes, mentions
+    of HP, spell slots or conditions). An exchange with no changes needs no
+    bookkeeping pass.
+    """
+
+    player_input: str
+    narration: list[str] = field(default_factory=list)
+    tool_calls: list[str] = field(default_factory=list)
+    files: set[str] = field(default_factory=set)
+    changes: list[str] = field(default_factory=list)
+    _state_tool_uses: dict[str, str] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._note_mentions("player", self.player_input)
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.changes)
+
+    def _note(self, change: str) -> None:
+        if change not in self.changes and len(self.changes) < MAX_CHANGES:
+            self.changes.append(change)
+
+    def _note_mentions(self, source: str, text: str) -> None:
+        mentions = sorted({m.lower() for m in STATE_MENTIONS.findall(text)})
+        if mentions:
+            self._note(f"{source} mentions {', '.join(mentions)}")
+
+    def observe(self, message: Any) -> None:
+        """Record text, tool calls, file targets and state changes from an agent message."""
+        if isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock) and block.tool_use_id in self._state_tool_uses:
+                    self._note_tool_result(self._state_tool_uses.pop(block.tool_use_id), block)
+            return
+        if not isinstance(message, AssistantMessage):
+            return
+        for block in message.content:
+            if isinstance(block, TextBlock) and block.text:
+                self.narration.append(block.text)
+                self._note_mentions("narration", block.text)
+            elif isinstance(block, ToolUseBlock):
+                self.tool_calls.append(f"{block.name} {str(block.input)[:MAX_TOOL_INPUT_CHARS]}")
+                self._observe_tool_use(block)
+
+    def _observe_tool_use(self, block: ToolUseBlock) -> None:
+        if block.name in STATE_TOOLS:
+            self._state_tool_uses[block.id] = block.name
+            if STATE_TOOLS[block.name] == "campaign":
+                self._note(f"campaign instance created: {block.input.get('instance_name', '')}")
+            elif STATE_TOOLS[block.name] == "character":
+                self._note(
+                    f"character {block.input.get('character_name', '')} updated: {block.input.get('changes', {})}"
+                )
+            elif STATE_TOOLS[block.name] == "attack":
+                self._note(f"attack {block.input.get('attacker', '')} -> {block.input.get('target', '')}")
+            return
+        path = block.input.get("file_path") if block.name in FILE_TOOLS else None
+        if not path:
+            return
+        self.files.add(_normalize_path(path))
+        if block.name != "Read":
+            self._note(f"{block.name.lower()} {Path(path).name}")
+        elif _is_character_file(path):
+            self._note(f"read character sheet {Path(path).stem}")
+
+    def _note_tool_result(self, tool_name: str, block: ToolResultBlock) -> None:
+        if STATE_TOOLS[tool_name] != "dice" or block.is_error:
+            return
+        content = block.content
+        if isinstance(content, list):
+            content = " ".join(str(item.get("text", "")) if isinstance(item, dict) else str(item) for item in content)
+        self._note(f"dice: {str(content)[:MAX_TOOL_INPUT_CHARS]}")
+
+    def transcript(self) -> str:
+        lines = [f"Player: {self.player_input}"]
+        if self.tool_calls:
+            lines.append("Tools used: " + "; ".join(self.tool_calls))
+        if self.changes:
+            lines.append("Detected changes: " + "; ".join(self.changes))
+        lines.append("DM: " + "\n".join(self.narration))
+        return "\n".join(lines)
+
+
+class BookkeepingWorker:
+    """Runs a session's bookkeeping passes in the background, merging any backlog.
+
+    Args:
+        connect: Async factory returning a connected client for bookkeeping
+            (connected lazily, on the first pass)
+        disconnect: Async callback to release that client on close
+        campaign: Campaign instance of the session
+        character: Active character of the session
+        on_complete: Optional async callback receiving the set of files
+            written by each finished pass
+        claims: Registry the pending passes claim their files in
+        session_id: Session the passes' metrics are attributed to
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        disconnect: Callable[[Any], Awaitable[None]] | None = None,
+        campaign: str = "",
+        character: str = "",
+        on_complete: Callable[[set[str]], Awaitable[None]] | None = None,
+        claims: FileClaims = file_claims,
+        session_id: str = "",
+    ):
+        self._connect = connect
+        self._disconnect = disconnect
+        self.campaign = campaign
+        self.character = character
+        self.on_complete = on_complete
+        self.claims = claims
+        self.session_id = session_id
+        self.passes_run = 0
+        self.passes_skipped = 0
+        self.exchanges_merged = 0
+        self._client: Any = None
+        self._pending: list[Exchange] = []
+        self._pending_files: set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+
+    def submit(self, exchange: Exchange) -> bool:
+        """Queue an exchange for bookkeeping; returns immediately.
+
+        Returns False (and queues nothing) when the exchange changed no state.
+        """
+        if not exchange.dirty:
+            self.passes_skipped += 1
+            logger.debug("Bookkeeping skipped: no state-changing events this turn")
+            return False
+        files = (exchange.files | session_files(self.campaign, self.character)) - self._pending_files
+        self.claims.claim(files)
+        self._pending_files |= files
+        self._pending.append(exchange)
+        self._idle.clear()
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    async def drain(self) -> None:
+        """Wait until every submitted exchange has been processed."""
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        """Finish pending passes, then stop the worker and release its client."""
+        try:
+            await self.drain()
+        finally:
+            if self._task:
+                self._task.cancel()
+                await asyncio.wait([self._task])
+            self.claims.release(self._pending_files)
+            self._pending_files = set()
+            if self._client is not None and self._disconnect:
+                await self._disconnect(self._client)
+            self._client = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._pending:
+                self._idle.set()
+                continue
+
+            exchanges, files = self._pending, self._pending_files
+            self._pending, self._pending_files = [], set()
+            try:
+                written = await self._run_pass(exchanges)
+                if self.on_complete:
+                    await self.on_complete(written)
+            except asyncio.CancelledError:
+                self.claims.release(files)
+                raise
+            except Exception as e:
+                logger.error("Bookkeeping pass failed: %s", e, exc_info=True)
+            self.claims.release(files)
+            if not self._pending:
+                self._idle.set()
+
+    async def _run_pass(self, exchanges: list[Exchange]) -> set[str]:
+        if self._client is None:
+            self._client = await self._connect()
+
+        self.passes_run += 1
+        self.exchanges_merged += len(exchanges) - 1
+        if len(exchanges) > 1:
+            logger.info(
+                "Bookkeeping: merged %d exchanges into one pass", len(exchanges), extra={"exchanges": len(exchanges)}
+            )
+
+        transcript = "\n\n".join(exchange.transcript() for exchange in exchanges)
+        prompt = bookkeeping_prompt(transcript, self.campaign, self.character)
+        written: set[str] = set()
+        turn = metrics.turn("bookkeeping", self.session_id)
+        try:
+            async for message in post_turn_bookkeeping(self._client, prompt):
+                turn.observe(message)
+                if not isinstance(message, AssistantMessage):
+                    continue
+                for block in message.content:
+                    if isinstance(block, ToolUseBlock) and block.name in ("Write", "Edit"):
+                        written.add(str(block.input.get("file_path", "")))
+        finally:
+            metrics.record(turn)
+        return written
@@ -0,0 +1,77 @@
+"""Cached directory index of campaign instances and their characters."""
+
+import asyncio
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, TypeVar
+
+from .logging_config import logger
+
+T = TypeVar("T")
+
+# Threads for campaign file I/O; reads are short, so a few suffice
+IO_WORKERS = int(os.environ.get("DND_IO_WORKERS", "4"))
+
+
+class Listing(NamedTuple):
+    """A cached directory listing and the ETag clients revalidate it with."""
+
+    names: list[str]
+    etag: str
+
+
+def _listing(names: list[str]) -> Listing:
+    digest = hashlib.blake2b("\n".join(names).encode(), digest_size=8).hexdigest()
+    return Listing(names, f'"{digest}"')
+
+
+EMPTY = _listing([])
+
+
+class CampaignIndex:
+    """In-memory index of ``campaigns/``, revalidated by directory mtime.
+
+    Args:
+        campaigns_dir: Directory holding the campaign instances
+        max_workers: Threads used for filesystem access
+    """
+
+    def __init__(self, campaigns_dir: str | Path, max_workers: int = IO_WORKERS):
+        self.campaigns_dir = Path(campaigns_dir)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="campaign-io")
+        # path -> (mtime_ns, listing)
+        self._cache: dict[Path, tuple[int, Listing]] = {}
+        self.scans = 0
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run blocking file I/O on the index's thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def instances(self) -> Listing:
+        """Campaign instance names, sorted."""
+        return await self.run(self._list, self.campaigns_dir, lambda d: [p.name for p in d.iterdir() if p.is_dir()])
+
+    async def characters(self, instance: str) -> Listing:
+        """Character names (sheet file stems) of a campaign instance, sorted."""
+        chars_dir = self.campaigns_dir / instance / "characters"
+        return await self.run(self._list, chars_dir, lambda d: [p.stem for p in d.glob("*.md")])
+
+    def _list(self, directory: Path, scan: Callable[[Path], list[str]]) -> Listing:
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._cache.pop(directory, None)
+            return EMPTY
+        cached = self._cache.get(directory)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        listing = _listing(sorted(scan(directory)))
+        self._cache[directory] = (mtime, listing)
+        self.scans += 1
+        logger.debug("Indexed %s (%d entries)", directory, len(listing.names))
+        return listing
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
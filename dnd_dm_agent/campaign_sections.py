@@ -0,0 +1,116 @@
+"""Heading-based chunk index of campaign documents."""
+
+import re
+import threading
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .knowledge_index import split_sections
+from .tools.campaign_instance_tools import CAMPAIGNS_DIR, TEMPLATES_DIR, instance_file
+
+# Campaign documents that are chunked, in table-of-contents order
+CAMPAIGN_FILES = ("campaign_guide.md", "encounters.md", "locations.md", "npcs.md")
+
+# Section kind by file, unless the heading itself names an Act or Beat
+_FILE_KINDS = {"campaign_guide": "guide", "encounters": "encounter", "locations": "location", "npcs": "npc"}
+_HEADING_KIND = re.compile(r"^(act|beat)\b", re.IGNORECASE)
+
+
+class CampaignSection(NamedTuple):
+    """An addressable piece of a campaign document, including its subsections."""
+
+    id: str
+    title: str
+    kind: str
+    level: int
+    text: str
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def chunk_document(name: str, markdown: str) -> list[CampaignSection]:
+    """Chunk one campaign document at its headings.
+
+    A section's text runs until the next heading of the same or a higher
+    level, so an Act carries its Beats. The document title (level 1) is not
+    a section of its own.
+    """
+    sections = split_sections(markdown)
+    chunks = []
+    for i, section in enumerate(sections):
+        if section.level < 2:
+            continue
+        end = i + 1
+        while end < len(sections) and sections[end].level > section.level:
+            end += 1
+        kind_match = _HEADING_KIND.match(section.heading)
+        chunks.append(
+            CampaignSection(
+                id=f"{name}/{_slug(section.heading)}",
+                title=section.heading,
+                kind=kind_match.group(1).lower() if kind_match else _FILE_KINDS.get(name, "other"),
+                level=section.level,
+                text="\n\n".join(s.text for s in sections[i:end]),
+            )
+        )
+    return chunks
+
+
+class CampaignSectionIndex:
+    """Sections of one campaign directory, with lookup by id or title."""
+
+    def __init__(self, sections: list[CampaignSection]):
+        self.sections = sections
+        self._by_id = {section.id: section for section in sections}
+
+    def toc(self) -> list[dict[str, Any]]:
+        """Compact table of contents: id (a slug of the title), kind and size of each section."""
+        return [{"id": s.id, "kind": s.kind, "chars": len(s.text)} for s in self.sections]
+
+    def find(self, query: str) -> CampaignSection | None:
+        """Look a section up by id, by id without the file prefix, or by (partial) title, e.g. "Beat 1.2"."""
+        if query in self._by_id:
+            return self._by_id[query]
+        slug = _slug(query)
+        if not slug:
+            return None
+        for section in self.sections:
+            if section.id.split("/", 1)[1] == slug:
+                return section
+        for section in self.sections:
+            if slug in _slug(section.title):
+                return section
+        return None
+
+
+_cache: dict[Path, tuple[tuple, CampaignSectionIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def campaign_directory(campaign: str) -> Path | None:
+    """Resolve a campaign instance (campaigns/) or template (available_campaigns/) name to its directory."""
+    for base in (CAMPAIGNS_DIR, TEMPLATES_DIR):
+        directory = base / campaign
+        if directory.is_dir() and directory.resolve().parent == base.resolve():
+            return directory
+    return None
+
+
+def section_index(directory: Path) -> CampaignSectionIndex:
+    """Chunk index for a campaign directory, re-chunked only when a document changed.
+
+    An instance document the instance has not materialized is read from its template.
+    """
+    files = [f for f in (instance_file(directory, name) for name in CAMPAIGN_FILES) if f is not None]
+    signature = tuple((f.name, f.stat().st_mtime_ns, f.stat().st_size) for f in files)
+    with _cache_lock:
+        cached = _cache.get(directory)
+        if cached and cached[0] == signature:
+            return cached[1]
+    sections = [chunk for f in files for chunk in chunk_document(f.stem, f.read_text())]
+    index = CampaignSectionIndex(sections)
+    with _cache_lock:
+        _cache[directory] = (signature, index)
+    return index
@@ -0,0 +1,340 @@
+"""Structured, indexed character store behind the markdown character sheets."""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+from .file_locks import atomic_write, locked
+from .logging_config import logger
+from .tools.campaign_instance_tools import CAMPAIGNS_DIR
+
+# Version of the parsed fields; bumping it re-parses every indexed sheet
+INDEX_VERSION = 2
+
+# Fields update() can change; everything else on the sheet is narrative text
+UPDATABLE_FIELDS = ("hp_current", "hp_max", "ac", "speed", "conditions", "spell_slots", "gold", "xp")
+
+_NAME = re.compile(r"^#\s+(.+?)\s+-\s+Level", re.MULTILINE)
+_GOLD = re.compile(r"(\*\*Gold Pieces \(GP\):\*\*\s*)(\d+)")
+_SPELL_SLOT_ROW = re.compile(
+    r"^(\|\s*\*\*(\d+(?:st|nd|rd|th))\*\*\s*\|\s*)(\d+)(\s*\|\s*)(\d+)(\s*\|\s*)(\d+)", re.MULTILINE
+)
+_EQUIPMENT = re.compile(r"^###\s+Equipment\s*\n((?:[ \t]*[-*].*\n?)+)", re.MULTILINE)
+_ATTACKS = re.compile(r"^##[^\n]*Attacks & Weapons[ \t]*\n\s*((?:\|.*\n?)+)", re.MULTILINE)
+_NO_CONDITIONS = {"", "-", "none", "—"}
+
+
+def _row(label: str) -> re.Pattern[str]:
+    """Pattern for a ``| **Label** | value |`` table row; group 2 is the value cell."""
+    return re.compile(rf"^(\|\s*\*\*{re.escape(label)}\*\*\s*\|[ \t]*)([^|\n]*?)([ \t]*(?:\||$))", re.MULTILINE)
+
+
+_ROWS = {
+    "class_level": _row("Class & Level"),
+    "race": _row("Race/Species"),
+    "xp": _row("Experience Points"),
+    "ac": _row("Armor Class (AC)"),
+    "hp": _row("Hit Points"),
+    "speed": _row("Speed"),
+    "conditions": _row("Conditions"),
+}
+
+
+def _cell(markdown: str, key: str) -> str | None:
+    match = _ROWS[key].search(markdown)
+    return match.group(2).strip() if match else None
+
+
+def _leading_int(value: str | None) -> int:
+    match = re.match(r"\s*(\d+)", value or "")
+    return int(match.group(1)) if match else 0
+
+
+def _parse_attacks(markdown: str) -> list[dict[str, Any]]:
+    """Rows of the Attacks & Weapons table: name, attack bonus, damage and damage type."""
+    table = _ATTACKS.search(markdown)
+    if not table:
+        return []
+    rows = [[cell.strip() for cell in line.strip().strip("|").split("|")] for line in table.group(1).splitlines()]
+    header = [cell.lower() for cell in rows[0]]
+    attacks = []
+    for row in rows[2:]:
+        cells = dict(zip(header, row))
+        bonus = re.match(r"\s*([+-]?\d+)", cells.get("attack bonus", ""))
+        if not cells.get("weapon") or not bonus:
+            continue
+        attacks.append(
+            {
+                "name": cells["weapon"],
+                "attack_bonus": int(bonus.group(1)),
+                "damage": cells.get("damage", ""),
+                "damage_type": cells.get("type", ""),
+            }
+        )
+    return attacks
+
+
+def parse_character_sheet(markdown: str) -> dict[str, Any]:
+    """Parse a character sheet into structured fields.
+
+    Missing fields fall back to empty values rather than failing, since
+    sheets are hand- and agent-edited.
+    """
+    name = _NAME.search(markdown)
+    hp = re.match(r"\s*(\d+)\s*/\s*(\d+)", _cell(markdown, "hp") or "")
+    conditions = _cell(markdown, "conditions") or ""
+    equipment = _EQUIPMENT.search(markdown)
+    gold = _GOLD.search(markdown)
+    return {
+        "name": name.group(1).strip() if name else "Unknown",
+        "class_level": _cell(markdown, "class_level") or "",
+        "race": _cell(markdown, "race") or "",
+        "xp": _leading_int(_cell(markdown, "xp")),
+        "ac": _leading_int(_cell(markdown, "ac")),
+        "hp_current": int(hp.group(1)) if hp else 0,
+        "hp_max": int(hp.group(2)) if hp else 0,
+        "speed": _leading_int(_cell(markdown, "speed")),
+        "conditions": []
+        if conditions.lower() in _NO_CONDITIONS
+        else [c.strip() for c in conditions.split(",") if c.strip()],
+        "spell_slots": {
+            level: {"total": int(total), "used": int(used)}
+            for _, level, total, _, used, _, _ in _SPELL_SLOT_ROW.findall(markdown)
+        },
+        "gold": int(gold.group(2)) if gold else 0,
+        "inventory": [
+            line.strip().lstrip("-*").strip() for line in equipment.group(1).splitlines() if line.strip()
+        ] if equipment else [],
+        "attacks": _parse_attacks(markdown),
+    }
+
+
+def _replace_cell(markdown: str, key: str, value: str) -> str:
+    return _ROWS[key].sub(lambda m: f"{m.group(1)}{value}{m.group(3)}", markdown, count=1)
+
+
+def _replace_leading_int(markdown: str, key: str, value: int) -> str:
+    current = _cell(markdown, key)
+    if current is None:
+        return markdown
+    return _replace_cell(markdown, key, re.sub(r"^\d+", str(value), current, count=1))
+
+
+def render_character_sheet(markdown: str, fields: dict[str, Any]) -> str:
+    """Render updated structured fields back into a markdown sheet.
+
+    Only the cells backing ``fields`` are rewritten; the rest of the sheet is
+    kept verbatim. A Conditions row is added below Hit Points if missing.
+    """
+    if "hp_current" in fields or "hp_max" in fields:
+        current = parse_character_sheet(markdown)
+        hp_current = fields.get("hp_current", current["hp_current"])
+        hp_max = fields.get("hp_max", current["hp_max"])
+        markdown = _replace_cell(markdown, "hp", f"{hp_current} / {hp_max}")
+    for key in ("ac", "speed", "xp"):
+        if key in fields:
+            markdown = _replace_leading_int(markdown, key, fields[key])
+    if "conditions" in fields:
+        value = ", ".join(fields["conditions"]) or "None"
+        hp_row = _ROWS["hp"].search(markdown)
+        if _ROWS["conditions"].search(markdown):
+            markdown = _replace_cell(markdown, "conditions", value)
+        elif hp_row:
+            end = markdown.find("\n", hp_row.end())
+            end = len(markdown) if end == -1 else end
+            markdown = f"{markdown[:end]}\n| **Conditions** | {value} | |{markdown[end:]}"
+    if "gold" in fields:
+        markdown = _GOLD.sub(lambda m: f"{m.group(1)}{fields['gold']}", markdown, count=1)
+    for level, slots in fields.get("spell_slots", {}).items():
+
+        def replace_slot(m: re.Match[str]) -> str:
+            if m.group(2) != level:
+                return m.group(0)
+            total = slots.get("total", int(m.group(3)))
+            used = slots.get("used", int(m.group(5)))
+            return f"{m.group(1)}{total}{m.group(4)}{used}{m.group(6)}{max(total - used, 0)}"
+
+        markdown = _SPELL_SLOT_ROW.sub(replace_slot, markdown)
+    return markdown
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+
+
+class CharacterStore:
+    """SQLite index of parsed character sheets, refreshed when a sheet changes on disk.
+
+    Args:
+        campaigns_dir: Directory holding the campaign instances
+        db_path: SQLite database path; defaults to a hidden file in campaigns_dir.
+            Use ":memory:" for a throwaway index.
+    """
+
+    def __init__(self, campaigns_dir: str | Path, db_path: str | Path | None = None):
+        self.campaigns_dir = Path(campaigns_dir)
+        self.db_path = db_path if db_path is not None else self.campaigns_dir / ".character_store.sqlite3"
+        self.parses = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches campaigns/
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS characters ("
+                " instance TEXT NOT NULL, name TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,"
+                " etag TEXT NOT NULL, markdown TEXT NOT NULL, fields TEXT NOT NULL,"
+                " PRIMARY KEY (instance, name))"
+            )
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                # Indexed by an older parser: drop the rows so sheets are parsed again
+                self._conn.execute("DELETE FROM characters")
+                self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+                self._conn.commit()
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def sheet_path(self, instance: str, name: str) -> Path:
+        return self.campaigns_dir / instance / "characters" / f"{name}.md"
+
+    def get(self, instance: str, name: str) -> dict[str, Any] | None:
+        """Indexed read of a character: ``{"name", "etag", "markdown", "fields"}``, or None if missing.
+
+        The sheet is only re-parsed when its mtime or size changed since it was indexed.
+        """
+        path = self.sheet_path(instance, name)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self._forget(instance, name)
+            return None
+
+        with self._lock:
+            row = (
+                self._db()
+                .execute(
+                    "SELECT mtime_ns, size, etag, markdown, fields FROM characters WHERE instance = ? AND name = ?",
+                    (instance, name),
+                )
+                .fetchone()
+            )
+        if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            return {"name": name, "etag": row[2], "markdown": row[3], "fields": json.loads(row[4])}
+        return self._index(instance, name, path)
+
+    def etag(self, instance: str, name: str) -> str | None:
+        record = self.get(instance, name)
+        return record["etag"] if record else None
+
+    def update(self, instance: str, name: str, changes: dict[str, Any]) -> dict[str, Any] | None:
+        """Apply field changes, re-render the markdown sheet and re-index it. None if the sheet is missing."""
+        return self.modify(instance, name, lambda fields: changes)
+
+    def modify(
+        self, instance: str, name: str, change: Callable[[dict[str, Any]], dict[str, Any]]
+    ) -> dict[str, Any] | None:
+        """Read-modify-write of a sheet: ``change`` gets its current fields and returns the field changes.
+
+        Use this when the changes depend on the current values (e.g. damage), so a
+        concurrent update cannot slip in between the read and the write. None if
+        the sheet is missing.
+        """
+        path = self.sheet_path(instance, name)
+        if not path.is_file():
+            return None
+        # Another worker may be updating the same sheet: read it from disk (not the
+        # index, which may lag another process's write) and rewrite it under its lock
+        with locked(path):
+            markdown = path.read_text()
+            changes = change(parse_character_sheet(markdown))
+            unknown = set(changes) - set(UPDATABLE_FIELDS)
+            if unknown:
+                raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown))}")
+            # Replaced whole, so a crash or a reader without the lock never sees a partial sheet
+            atomic_write(path, render_character_sheet(markdown, changes))
+            return self._index(instance, name, path)
+
+    def _index(self, instance: str, name: str, path: Path) -> dict[str, Any]:
+        data = path.read_bytes()
+        stat = path.stat()
+        markdown = data.decode()
+        fields = parse_character_sheet(markdown)
+        self.parses += 1
+        etag = _etag(data)
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO characters VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (instance, name, stat.st_mtime_ns, stat.st_size, etag, markdown, json.dumps(fields)),
+            )
+            conn.commit()
+        logger.debug("Indexed character sheet %s/%s", instance, name)
+        return {"name": name, "etag": etag, "markdown": markdown, "fields": fields}
+
+    def _forget(self, instance: str, name: str) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("DELETE FROM characters WHERE instance = ? AND name = ?", (instance, name))
+            self._conn.commit()
+
+
+def diff_character_fields(old: dict[str, Any] | None, new: dict[str, Any]) -> dict[str, Any]:
+    """Top-level fields whose value differs between two parsed sheets (all of ``new`` if there is no ``old``)."""
+    if old is None:
+        return dict(new)
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+class CharacterPatcher:
+    """Turns changes to one character sheet into small field patches.
+
+    Remembers the fields a session last saw and, on refresh, reports only the
+    ones that changed since, so clients don't re-fetch and re-parse the sheet.
+    """
+
+    def __init__(self, store: CharacterStore, instance: str, name: str):
+        self.store = store
+        self.instance = instance
+        self.name = name
+        self._seen: dict[str, Any] | None = None
+        self._sheet = str(store.sheet_path(instance, name).resolve())
+
+    def is_sheet(self, path: str | Path) -> bool:
+        """Whether a (possibly relative) file path is this character's sheet."""
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.store.campaigns_dir.parent / path
+        return str(path.resolve()) == self._sheet
+
+    def snapshot(self) -> None:
+        """Record the sheet's current fields as seen, without producing a patch."""
+        record = self.store.get(self.instance, self.name)
+        self._seen = record["fields"] if record else None
+
+    def refresh(self) -> dict[str, Any] | None:
+        """A ``character_patch`` event for fields changed since the last refresh, or None."""
+        record = self.store.get(self.instance, self.name)
+        if record is None:
+            return None
+        changes = diff_character_fields(self._seen, record["fields"])
+        self._seen = record["fields"]
+        if not changes:
+            return None
+        return {"type": "character_patch", "character": self.name, "etag": record["etag"], "changes": changes}
+
+
+character_store = CharacterStore(CAMPAIGNS_DIR)
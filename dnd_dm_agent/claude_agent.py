@@ -1,69 +1,457 @@
 """DnD Dungeon Master Agent using Claude Agent SDK."""
 
 import asyncio
+import functools
 import sys
 import uuid
 from pathlib import Path
-from typing import Any, AsyncIterator
-
-from claude_agent_sdk import (
-    query,
-    ClaudeAgentOptions,
-    ClaudeSDKClient,
-    AssistantMessage,
-    TextBlock,
-    ToolUseBlock,
-    tool,
-    create_sdk_mcp_server,
-)
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, NamedTuple
 
+# Campaign documents feed the prompt layers; the tools' domain logic is imported by each tool
+from .campaign_sections import TEMPLATES_DIR, section_index
 from .logging_config import logger
+from .tool_results import tool_result
+from .tools.campaign_instance_tools import instance_template as campaign_template
+
+if TYPE_CHECKING:
+    from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, HookMatcher
 
 # Project root directory (for skills and file operations)
 PROJECT_ROOT = str(Path(__file__).parent.parent.resolve())
 
-# Import domain logic from existing tools
-from .tools.utility_tools import roll_dice as _roll_dice
-from .tools.campaign_instance_tools import create_campaign_instance as _create_campaign_instance
-
 
 # =============================================================================
 # Custom Tools
 # =============================================================================
 
 
-@tool("roll_dice", "Roll dice using D&D notation (e.g., '1d20+5', '2d6')", {"notation": str})
+class ToolSpec(NamedTuple):
+    name: str
+    description: str
+    input_schema: Any
+    handler: Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+    # Event type the browser receives the tool's results as (None: not forwarded)
+    event: str | None = None
+
+
+# Custom tools, in registration order
+_TOOL_SPECS: list[ToolSpec] = []
+
+
+def tool(name: str, description: str, input_schema: Any, event: str | None = None):
+    """Register a custom tool; the SDK's ``tool`` wrapper is applied when the MCP server is built.
+
+    Args:
+        event: Event type its results are forwarded to the browser as (schemas in ``tool_results``)
+    """
+
+    def register(handler):
+        _TOOL_SPECS.append(ToolSpec(name, description, input_schema, handler, event))
+        return handler
+
+    return register
+
+
+def tool_event(tool_name: str) -> str | None:
+    """Event type the results of a tool (by its full ``mcp__dnd__`` name) are forwarded as."""
+    name = tool_name.removeprefix("mcp__dnd__")
+    if name == tool_name:
+        return None
+    return next((spec.event for spec in _TOOL_SPECS if spec.name == name), None)
+
+
+# Named modifiers (e.g. {"STR": 3, "PROF": 2}) bound into dice expressions
+DICE_VARIABLES_SCHEMA = {"type": "object", "additionalProperties": {"type": "integer"}}
+
+
+@tool(
+    "roll_dice",
+    "Roll dice using D&D notation (e.g., '1d20+5', '2d6+1d4', '(1d8+2)*2', '1d20+STR+PROF adv'). "
+    "Named modifiers are given in 'variables'.",
+    {
+        "type": "object",
+        "properties": {
+            "notation": {"type": "string"},
+            "variables": DICE_VARIABLES_SCHEMA,
+        },
+        "required": ["notation"],
+    },
+    event="dice_result",
+)
 async def roll_dice(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.utility_tools import roll_dice as _roll_dice
+
+    notation = args["notation"]
+    logger.debug("Rolling dice: %s", notation)
+    result = _roll_dice(notation, variables=args.get("variables"))
+    logger.info(
+        "Dice roll %s = %s", notation, result.get("total"), extra={"tool": "roll_dice", "status": result.get("status")}
+    )
+    return tool_result(result)
+
+
+@tool(
+    "roll_dice_batch",
+    "Roll many dice expressions in one call. Supports advantage ('1d20+5 adv'), disadvantage ('1d20 dis'), "
+    "keep/drop ('4d6kh3', '2d20kl1'), rerolls ('2d6r<=2') and exploding dice ('1d6!'). "
+    "Use for mass rolls such as several monsters attacking at once. A variable may be a list with "
+    "one value per repetition, e.g. a different STR for each creature.",
+    {
+        "type": "object",
+        "properties": {
+            "notations": {"type": "array", "items": {"type": "string"}},
+            "times": {"type": "integer", "minimum": 1},
+            "target": {"type": "integer"},
+            "variables": {
+                "type": "object",
+                "additionalProperties": {
+                    "anyOf": [{"type": "integer"}, {"type": "array", "items": {"type": "integer"}}]
+                },
+            },
+        },
+        "required": ["notations"],
+    },
+    event="dice_result",
+)
+async def roll_dice_batch(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.utility_tools import roll_dice_batch as _roll_dice_batch
+
+    notations = args["notations"]
+    times = args.get("times", 1)
+    target = args.get("target")
+    logger.debug("Rolling dice batch: %s x%s target=%s", notations, times, target)
+    result = _roll_dice_batch(notations, times=times, target=target, variables=args.get("variables"))
+    logger.info(
+        "Dice batch of %d rolls: %s",
+        len(notations) * times,
+        result.get("status"),
+        extra={"tool": "roll_dice_batch", "status": result.get("status")},
+    )
+    return tool_result(result)
+
+
+@tool(
+    "dice_odds",
+    "Exact odds for a dice expression without rolling: P(total >= DC), mean and percentiles. "
+    "Use to judge DCs, attack hit chances and encounter difficulty.",
+    {
+        "type": "object",
+        "properties": {
+            "notation": {"type": "string"},
+            "dc": {"type": "integer"},
+            "variables": DICE_VARIABLES_SCHEMA,
+        },
+        "required": ["notation"],
+    },
+    event="dice_odds",
+)
+async def dice_odds(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.utility_tools import dice_odds as _dice_odds
+
     notation = args["notation"]
-    logger.debug(f"Rolling dice: {notation}")
-    result = _roll_dice(notation)
-    logger.info(f"Dice roll {notation} = {result}")
-    return {"content": [{"type": "text", "text": str(result)}]}
+    dc = args.get("dc")
+    # Exact distributions can take a moment for large pools; keep them off the event loop
+    result = await asyncio.to_thread(_dice_odds, notation, dc=dc, variables=args.get("variables"))
+    logger.info(
+        "Dice odds %s vs DC %s: %s",
+        notation,
+        dc,
+        result.get("p_success", result.get("status")),
+        extra={"tool": "dice_odds", "status": result.get("status")},
+    )
+    return tool_result(result)
 
 
 @tool(
     "create_campaign_instance",
     "Create a new campaign instance from a template",
-    {"campaign_template": str, "instance_name": str}
+    {"campaign_template": str, "instance_name": str},
+    event="campaign_created",
 )
 async def create_campaign_instance(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.campaign_instance_tools import create_campaign_instance as _create_campaign_instance
+
     campaign = args["campaign_template"]
     instance = args["instance_name"]
-    logger.info(f"Creating campaign instance: {campaign}_{instance}")
+    logger.info("Creating campaign instance: %s_%s", campaign, instance)
     result = _create_campaign_instance(campaign, instance)
     if result.get("status") == "success":
-        logger.info(f"Campaign instance created successfully: {result.get('instance_path')}")
+        logger.info(
+            "Campaign instance created successfully: %s",
+            result.get("instance_path"),
+            extra={"tool": "create_campaign_instance", "status": "success"},
+        )
+    else:
+        logger.error(
+            "Campaign creation failed: %s",
+            result.get("error_message"),
+            extra={"tool": "create_campaign_instance", "status": "error"},
+        )
+    return tool_result(result)
+
+
+@tool(
+    "get_character_stats",
+    "Look up a character's HP, AC, speed, spell slots, conditions, inventory, gold and XP "
+    "without reading the whole character sheet",
+    {"campaign_instance": str, "character_name": str},
+)
+async def get_character_stats(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.character_tools import get_character_stats as _get_character_stats
+
+    result = _get_character_stats(args["campaign_instance"], args["character_name"])
+    return tool_result(result)
+
+
+@tool(
+    "update_character_stats",
+    "Update tracked fields on a character sheet (hp_current, hp_max, ac, speed, xp, gold, "
+    "conditions as the full list, spell_slots as {'1st': {'used': 1}}). Other sheet text is left as is.",
+    {
+        "type": "object",
+        "properties": {
+            "campaign_instance": {"type": "string"},
+            "character_name": {"type": "string"},
+            "changes": {"type": "object"},
+        },
+        "required": ["campaign_instance", "character_name", "changes"],
+    },
+    event="character_updated",
+)
+async def update_character_stats(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.character_tools import update_character_stats as _update_character_stats
+
+    character = f"{args['campaign_instance']}/{args['character_name']}"
+    result = _update_character_stats(args["campaign_instance"], args["character_name"], args["changes"])
+    if result.get("status") == "success":
+        logger.info(
+            "Character %s updated: %s",
+            character,
+            ", ".join(sorted(args["changes"])),
+            extra={"tool": "update_character_stats", "status": "success"},
+        )
+        logger.debug("Character %s changes: %s", character, args["changes"])
+    else:
+        logger.error(
+            "Character update failed for %s: %s",
+            character,
+            result.get("error_message"),
+            extra={"tool": "update_character_stats", "status": "error"},
+        )
+    return tool_result(result)
+
+
+@tool(
+    "resolve_attack",
+    "Resolve a weapon attack in one call: looks up the attacker's weapon (attack bonus, damage) and the "
+    "target's AC on their character sheets, rolls to hit (advantage, natural 20 crits, natural 1 misses) "
+    "and damage, and applies the damage to a character target's HP. For creatures without a sheet, give "
+    "attack_bonus and damage (attacker) or target_ac and target_hp (target).",
+    {
+        "type": "object",
+        "properties": {
+            "campaign_instance": {"type": "string"},
+            "attacker": {"type": "string"},
+            "target": {"type": "string"},
+            "weapon": {"type": "string"},
+            "advantage": {"type": "boolean"},
+            "disadvantage": {"type": "boolean"},
+            "attack_bonus": {"type": "integer"},
+            "damage": {"type": "string"},
+            "target_ac": {"type": "integer"},
+            "target_hp": {"type": "integer"},
+        },
+        "required": ["campaign_instance", "attacker", "target"],
+    },
+    event="attack_result",
+)
+async def resolve_attack(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.combat_tools import resolve_attack as _resolve_attack
+
+    attacker, target = args["attacker"], args["target"]
+    result = _resolve_attack(
+        args["campaign_instance"],
+        attacker,
+        target,
+        weapon=args.get("weapon"),
+        advantage=args.get("advantage", False),
+        disadvantage=args.get("disadvantage", False),
+        attack_bonus=args.get("attack_bonus"),
+        damage=args.get("damage"),
+        target_ac=args.get("target_ac"),
+        target_hp=args.get("target_hp"),
+    )
+    if result.get("status") == "success":
+        dealt = result["damage"]["total"] if result["damage"] else 0
+        logger.info(
+            "Attack %s -> %s: %s, %d damage",
+            attacker,
+            target,
+            "hit" if result["hit"] else "miss",
+            dealt,
+            extra={"tool": "resolve_attack", "status": "success"},
+        )
     else:
-        logger.error(f"Campaign creation failed: {result.get('error_message')}")
-    return {"content": [{"type": "text", "text": str(result)}]}
+        logger.error(
+            "Attack %s -> %s failed: %s",
+            attacker,
+            target,
+            result.get("error_message"),
+            extra={"tool": "resolve_attack", "status": "error"},
+        )
+    return tool_result(result)
+
+
+@tool(
+    "search_knowledge",
+    "Search the D&D 5e rules knowledge base (classes, spells, monsters, conditions, DM guidance) and get "
+    "the top matching sections in one call. Prefer this over Grep/Glob for rules questions.",
+    {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "top_k": {"type": "integer", "minimum": 1, "maximum": 10},
+        },
+        "required": ["query"],
+    },
+)
+async def search_knowledge(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.knowledge_tools import search_knowledge as _search_knowledge
+
+    query = args["query"]
+    result = _search_knowledge(query, top_k=args.get("top_k", 5))
+    logger.info(
+        "Knowledge search %r: %d sections",
+        query,
+        len(result.get("results", [])),
+        extra={"tool": "search_knowledge", "status": result.get("status")},
+    )
+    return tool_result(result)
 
 
-# MCP server with custom tools
-dnd_tools = create_sdk_mcp_server(
-    name="dnd",
-    version="1.0.0",
-    tools=[roll_dice, create_campaign_instance],
+@tool(
+    "get_campaign_section",
+    "Get one section (act, beat, encounter, location, NPC) of a campaign's documents by id or title "
+    "(e.g. 'Beat 1.2'). Without a section, returns a compact table of contents. Use this instead of "
+    "reading whole campaign files.",
+    {
+        "type": "object",
+        "properties": {
+            "campaign": {"type": "string"},
+            "section": {"type": "string"},
+        },
+        "required": ["campaign"],
+    },
 )
+async def get_campaign_section(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.campaign_section_tools import get_campaign_section as _get_campaign_section
+
+    campaign = args["campaign"]
+    section = args.get("section", "")
+    result = _get_campaign_section(campaign, section)
+    logger.info(
+        "Campaign section %s/%s: %s",
+        campaign,
+        section or "(contents)",
+        result.get("status"),
+        extra={"tool": "get_campaign_section", "status": result.get("status")},
+    )
+    return tool_result(result)
+
+
+@tool(
+    "log_campaign_event",
+    "Record a notable campaign event (beat completed, NPC met, location visited, key decision, combat "
+    "outcome) in the instance's event log. Use this instead of editing campaign_log.md.",
+    {
+        "type": "object",
+        "properties": {
+            "campaign_instance": {"type": "string"},
+            "kind": {"type": "string"},
+            "text": {"type": "string"},
+            "act": {"type": "string"},
+            "beat": {"type": "string"},
+        },
+        "required": ["campaign_instance", "kind", "text"],
+    },
+    event="campaign_event",
+)
+async def log_campaign_event(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.campaign_log_tools import log_campaign_event as _log_campaign_event
+
+    campaign = args["campaign_instance"]
+    result = _log_campaign_event(campaign, args["kind"], args["text"], act=args.get("act"), beat=args.get("beat"))
+    logger.info(
+        "Campaign event %s/%s: %s",
+        campaign,
+        args["kind"],
+        result.get("status"),
+        extra={"tool": "log_campaign_event", "status": result.get("status")},
+    )
+    return tool_result(result)
+
+
+@tool(
+    "get_campaign_events",
+    "Get the most recent events of a campaign instance's event log, optionally only those of one kind, "
+    "act or beat, or since an ISO timestamp. Set markdown to get them as a readable log.",
+    {
+        "type": "object",
+        "properties": {
+            "campaign_instance": {"type": "string"},
+            "last": {"type": "integer", "minimum": 1, "maximum": 200},
+            "kind": {"type": "string"},
+            "act": {"type": "string"},
+            "beat": {"type": "string"},
+            "since": {"type": "string"},
+            "markdown": {"type": "boolean"},
+        },
+        "required": ["campaign_instance"],
+    },
+)
+async def get_campaign_events(args: dict[str, Any]) -> dict[str, Any]:
+    from .tools.campaign_log_tools import get_campaign_events as _get_campaign_events
+
+    campaign = args["campaign_instance"]
+    result = _get_campaign_events(
+        campaign,
+        last=args.get("last", 20),
+        kind=args.get("kind"),
+        act=args.get("act"),
+        beat=args.get("beat"),
+        since=args.get("since"),
+        markdown=args.get("markdown", False),
+    )
+    logger.info(
+        "Campaign events %s: %d returned",
+        campaign,
+        len(result.get("events", [])),
+        extra={"tool": "get_campaign_events", "status": result.get("status")},
+    )
+    # The markdown view is returned as is, not as a quoted string
+    if "markdown" in result:
+        return {"content": [{"type": "text", "text": result["markdown"]}]}
+    return tool_result(result)
+
+
+@functools.cache
+def mcp_server() -> Any:
+    """MCP server with the custom tools, built on first use."""
+    from claude_agent_sdk import create_sdk_mcp_server
+    from claude_agent_sdk import tool as sdk_tool
+
+    return create_sdk_mcp_server(
+        name="dnd",
+        version="1.0.0",
+        tools=[sdk_tool(spec.name, spec.description, spec.input_schema)(spec.handler) for spec in _TOOL_SPECS],
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # ``dnd_tools`` used to be built at import time
+    if name == "dnd_tools":
+        return mcp_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # =============================================================================
@@ -75,8 +463,16 @@ SYSTEM_PROMPT = """You are an experienced Dungeon Master for D&D 5th Edition.
 ## Available Tools
 
 ### Campaign Management
-- roll_dice: Roll dice (1d20+5, 2d6, etc.)
+- roll_dice: Roll dice (1d20+5, 2d6+1d4, (1d8+2)*2 for crits, 1d20+STR+PROF with variables)
+- roll_dice_batch: Roll many expressions at once, with advantage/disadvantage, keep/drop (4d6kh3), rerolls and exploding dice
+- dice_odds: Exact probability of meeting a DC, mean and percentiles for any dice expression (no roll)
 - create_campaign_instance: Create a campaign instance from a template
+- get_campaign_section: Table of contents of a campaign, or just the act/beat/encounter/location/NPC section you need
+- log_campaign_event: Append a notable event (beat completed, NPC met, decision) to the campaign's event log
+- get_campaign_events: The last N events of the campaign's log, filtered by kind/act/beat/time, or as markdown
+- get_character_stats: Quick lookup of a character's HP, AC, spell slots, conditions and inventory
+- update_character_stats: Set HP, conditions, spell slots used, gold or XP on a character sheet
+- resolve_attack: Resolve a whole weapon attack (to-hit vs AC, crits, damage, HP applied) in one call; use it instead of rolling and editing HP separately
 - Skill (campaign-guide): Load campaigns, track progress through Acts/Beats, manage pre-generated characters
 
 ### Character Management (via character-management skill)
@@ -86,6 +482,7 @@ SYSTEM_PROMPT = """You are an experienced Dungeon Master for D&D 5th Edition.
 - Read: Read character files
 
 ### D&D Knowledge Base (via dnd-knowledge-store skill)
+- search_knowledge: Ranked search over the knowledge base; returns the relevant sections in one call (use first)
 - Skill (dnd-knowledge-store): Access D&D 5e reference for classes, spells, monsters, and DM guidance
 - Grep: Search knowledge files by pattern
 - Glob: Find knowledge files by name pattern
@@ -97,21 +494,91 @@ When playing active campaigns, ALWAYS use campaign-guide skill after each conver
 - Use campaign-guide skill to list available campaigns and create campaign instances
 - Use character-management skill for character creation and updates (provides templates and patterns)
 - Characters belong to campaign instances (stored in campaigns/[instance]/characters/)
-- Use dnd-knowledge-store skill when players ask about D&D rules, spells, monsters, or class features
+- Use search_knowledge (or the dnd-knowledge-store skill) when players ask about D&D rules, spells, monsters, or class features
 - Track campaign progress through Acts and Beats
+- Record campaign events with log_campaign_event and recall them with get_campaign_events; do not edit campaign_log.md
 """
 
 
-def get_options(permission_mode: str = "acceptEdits", campaign: str = "", character: str = "") -> ClaudeAgentOptions:
-    system_prompt = SYSTEM_PROMPT
+def session_context(campaign: str, character: str) -> str:
+    """Session-specific context block for a campaign/character pair."""
+    return (
+        f"## Current Session\n"
+        f"Campaign: {campaign}\n"
+        f"Active character: {character}\n"
+        f"Always maintain awareness of this campaign and character throughout the session. "
+        f"Load the campaign via the campaign-guide skill at the start of the session; pull the current "
+        f"beat and any encounter, location or NPC details with get_campaign_section rather than reading "
+        f"whole campaign files."
+    )
+
+
+# =============================================================================
+# Prompt Layers
+# =============================================================================
+#
+# The prompt is assembled from layers ordered from most to least shared, so the
+# prompt-cache prefix of one session is reused by every other session that
+# shares its leading layers:
+#   global    - DM rules and tool guide, identical for every session
+#   campaign  - condensed guide of the campaign template, shared by all parties
+#               playing it (no instance names, dates or other per-session data)
+#   character - the session's campaign instance and active character
+
+
+class PromptLayer(NamedTuple):
+    name: str
+    text: str
+
+
+def campaign_context(template: str) -> str:
+    """Condensed guide of a campaign template: its overview and section table of contents."""
+    index = section_index(TEMPLATES_DIR / template)
+    overview = index.find("campaign_guide/campaign-overview")
+    lines = [f"## Campaign Template: {template}"]
+    if overview:
+        lines.append(overview.text.split("\n", 1)[-1].strip().rstrip("-").strip())
+    lines.append("Sections available via get_campaign_section: " + ", ".join(s.id for s in index.sections))
+    return "\n\n".join(lines)
+
+
+def session_layers(campaign: str, character: str) -> list[PromptLayer]:
+    """The per-campaign and per-character layers of a session's prompt."""
+    layers = []
+    template = campaign_template(campaign)
+    if template:
+        layers.append(PromptLayer("campaign", campaign_context(template)))
     if campaign and character:
-        system_prompt += (
-            f"\n\n## Current Session\n"
-            f"Campaign: {campaign}\n"
-            f"Active character: {character}\n"
-            f"Always maintain awareness of this campaign and character throughout the session. "
-            f"Load the campaign via the campaign-guide skill at the start of the session."
-        )
+        layers.append(PromptLayer("character", session_context(campaign, character)))
+    return layers
+
+
+def prompt_layers(campaign: str = "", character: str = "") -> list[PromptLayer]:
+    """All prompt layers of a session, most shared first."""
+    return [PromptLayer("global", SYSTEM_PROMPT), *session_layers(campaign, character)]
+
+
+def render_layers(layers: list[PromptLayer]) -> str:
+    """Join layers, each marked so the boundaries (and so the cacheable prefixes) are explicit."""
+    return "\n\n".join(f"<!-- prompt-layer: {layer.name} -->\n{layer.text}" for layer in layers)
+
+
+def get_options(
+    permission_mode: str = "acceptEdits",
+    campaign: str = "",
+    character: str = "",
+    hooks: dict[str, list["HookMatcher"]] | None = None,
+    stream_text: bool = False,
+) -> "ClaudeAgentOptions":
+    """Agent options.
+
+    Args:
+        stream_text: Also yield partial-message StreamEvents, so narration can be
+            shown word by word (see ``text_delta``) before each TextBlock completes
+    """
+    from claude_agent_sdk import ClaudeAgentOptions
+
+    system_prompt = render_layers(prompt_layers(campaign, character))
 
     return ClaudeAgentOptions(
         # ============================================
@@ -134,19 +601,30 @@ def get_options(permission_mode: str = "acceptEdits", campaign: str = "", charac
 
             # Custom MCP tools
             "mcp__dnd__roll_dice",
+            "mcp__dnd__roll_dice_batch",
+            "mcp__dnd__dice_odds",
             "mcp__dnd__create_campaign_instance",
+            "mcp__dnd__get_character_stats",
+            "mcp__dnd__update_character_stats",
+            "mcp__dnd__resolve_attack",
+            "mcp__dnd__search_knowledge",
+            "mcp__dnd__get_campaign_section",
+            "mcp__dnd__log_campaign_event",
+            "mcp__dnd__get_campaign_events",
         ],
 
         # ============================================
         # MCP SERVER
         # ============================================
-        mcp_servers={"dnd": dnd_tools},
+        mcp_servers={"dnd": mcp_server()},
 
         # ============================================
         # OTHER SETTINGS
         # ============================================
         system_prompt=system_prompt,
         permission_mode=permission_mode,
+        hooks=hooks,
+        include_partial_messages=stream_text,
     )
 
 
@@ -156,6 +634,8 @@ def process_message(message: Any) -> str | None:
     Returns text content if it's a TextBlock, None otherwise.
     This function can be imported and used by REPL or other interfaces.
     """
+    from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock
+
     if isinstance(message, AssistantMessage):
         text_content = None
         for block in message.content:
@@ -163,41 +643,74 @@ def process_message(message: Any) -> str | None:
                 text_content = block.text
             elif isinstance(block, ToolUseBlock):
                 # Log ALL tool uses for debugging
-                logger.debug(f"Tool invoked: {block.name} with input: {block.input}")
+                logger.debug("Tool invoked: %s with input: %s", block.name, block.input)
 
                 # Note: Skills are NOT tools - they're instruction sets loaded into context
                 # This logging is kept for backward compatibility but will likely never trigger
                 if block.name == "Skill":
                     skill_name = block.input.get("skill", "unknown")
                     skill_args = block.input.get("args", "")
-                    logger.info(f"Skill invoked: {skill_name}" +
-                               (f" with args: {skill_args}" if skill_args else ""))
+                    logger.info("Skill invoked: %s", skill_name, extra={"skill": skill_name})
+                    if skill_args:
+                        logger.debug("Skill %s args: %s", skill_name, skill_args)
         return text_content
     return None
 
 
+def text_delta(message: Any) -> str | None:
+    """Narration text carried by a partial-message StreamEvent, if any.
+
+    Deltas of subagent (tool) messages are ignored; the complete TextBlock that
+    follows the deltas stays the authoritative text.
+    """
+    from claude_agent_sdk import StreamEvent
+
+    if not isinstance(message, StreamEvent) or message.parent_tool_use_id:
+        return None
+    event = message.event
+    if event.get("type") != "content_block_delta":
+        return None
+    delta = event.get("delta", {})
+    return delta.get("text") if delta.get("type") == "text_delta" else None
+
+
 BOOKKEEPING_PROMPT = """Silently review the last exchange and perform any needed record-keeping.
 Do not narrate or explain — only use tools if updates are actually needed:
 - If the character's HP, conditions, spell slots, or equipment changed, update their character sheet
 - If a story beat or objective was completed, mark it in the campaign guide
-- If notable NPCs were encountered or locations visited for the first time, record them"""
+- If notable NPCs were encountered or locations visited for the first time, record them
+  with log_campaign_event (never by editing campaign_log.md)"""
+
 
+def bookkeeping_prompt(transcript: str, campaign: str = "", character: str = "") -> str:
+    """Bookkeeping prompt for a client that did not see the exchanges itself.
 
-async def post_turn_bookkeeping(client: ClaudeSDKClient):
+    Args:
+        transcript: The exchanges to review (player input, DM narration, tool activity)
+        campaign: Campaign instance the records belong to
+        character: Active character whose sheet should be kept current
+    """
+    prompt = BOOKKEEPING_PROMPT.replace("the last exchange", "the exchanges below")
+    if campaign and character:
+        prompt += f"\n\nCampaign: {campaign}\nActive character: {character}"
+    return f"{prompt}\n\n## Exchanges to review\n\n{transcript}"
+
+
+async def post_turn_bookkeeping(client: "ClaudeSDKClient", prompt: str = BOOKKEEPING_PROMPT):
     """
     Run a silent post-turn bookkeeping pass after each player turn.
     Yields agent messages so callers can optionally react to tool-use events.
     Any text the agent produces is intentionally ignored.
     """
     logger.debug("Starting post-turn bookkeeping")
-    await client.query(BOOKKEEPING_PROMPT)
+    await client.query(prompt)
     async for message in client.receive_response():
         process_message(message)
         yield message
     logger.debug("Post-turn bookkeeping complete")
 
 
-async def run_query(prompt: str, options: ClaudeAgentOptions | None = None) -> AsyncIterator[Any]:
+async def run_query(prompt: str, options: "ClaudeAgentOptions | None" = None) -> AsyncIterator[Any]:
     """
     Run agent query with logging applied to all messages.
     This is an async generator that yields messages with logging applied.
@@ -212,16 +725,19 @@ async def run_query(prompt: str, options: ClaudeAgentOptions | None = None) -> A
             # All messages have logging applied automatically
             print(message)
     """
+    from claude_agent_sdk import query
+
     if options is None:
         options = get_options()
 
-    logger.info(f"Starting agent query: {prompt[:100]}...")
+    logger.info("Starting agent query (%d chars)", len(prompt))
+    logger.debug("Agent query: %s", prompt)
 
     # Use async generator to work around SDK bug with MCP servers
     # See: https://github.com/anthropics/claude-agent-sdk-python/issues/266
     async def prompt_generator():
         session_id = str(uuid.uuid4())
-        logger.debug(f"Session ID: {session_id}")
+        logger.debug("Session ID: %s", session_id)
         yield {
             "type": "user",
             "message": {"role": "user", "content": prompt},
@@ -239,7 +755,7 @@ async def run_query(prompt: str, options: ClaudeAgentOptions | None = None) -> A
         logger.info("Agent query completed successfully")
 
     except Exception as e:
-        logger.error(f"Agent query failed: {e}", exc_info=True)
+        logger.error("Agent query failed: %s", e, exc_info=True)
         raise
 
 
@@ -248,6 +764,8 @@ async def run(prompt: str) -> str:
     Run agent with a prompt and return the text response.
     This is the original CLI interface (backward compatible).
     """
+    from claude_agent_sdk import AssistantMessage, TextBlock
+
     responses = []
     async for message in run_query(prompt):
         if isinstance(message, AssistantMessage):
@@ -0,0 +1,183 @@
+"""Pool of pre-warmed ClaudeSDKClient instances for WebSocket sessions."""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable
+
+from .claude_agent import render_layers, session_layers
+from .logging_config import logger
+
+
+class BoundClient:
+    """A pooled client bound to one player session.
+
+    The session context is prefixed onto the first query; everything else is
+    delegated to the underlying client.
+    """
+
+    def __init__(self, client: Any, context: str | None = None):
+        self.client = client
+        self._pending_context = context
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        if self._pending_context:
+            prompt = f"{self._pending_context}\n\n{prompt}"
+            self._pending_context = None
+        await self.client.query(prompt, session_id=session_id)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+class ClientPool:
+    """Keeps up to ``size`` connected, unbound clients ready for new sessions.
+
+    Args:
+        factory: Builds a new (unconnected) client, e.g. ``lambda: ClaudeSDKClient(options)``
+        size: Number of warm clients to keep ready; 0 disables pre-warming
+        retry_delay: Seconds to wait before retrying after a failed warm-up,
+            doubled after each further failure in a row
+        max_failures: Failed warm-ups in a row after which pre-warming pauses;
+            sessions then connect on demand, and the first that succeeds resumes it
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 2, retry_delay: float = 5.0, max_failures: int = 5):
+        self.factory = factory
+        self.size = size
+        self.retry_delay = retry_delay
+        self.max_failures = max_failures
+        self._ready: asyncio.Queue[Any] = asyncio.Queue()
+        self._warming: set[asyncio.Task] = set()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.warm_failures = 0
+        self._failures_in_a_row = 0
+        # Recent timings only, so long-running servers don't grow without bound
+        self._ready_times: deque[float] = deque(maxlen=1000)
+        self._warm_times: deque[float] = deque(maxlen=1000)
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Begin warming clients in the background."""
+        self._closed = False
+        self._top_up()
+
+    async def close(self) -> None:
+        """Stop warming and disconnect every idle client."""
+        self._closed = True
+        for task in list(self._warming):
+            task.cancel()
+        if self._warming:
+            await asyncio.gather(*self._warming, return_exceptions=True)
+        while not self._ready.empty():
+            await self._disconnect(self._ready.get_nowait())
+
+    @property
+    def paused(self) -> bool:
+        """Whether pre-warming has paused after repeated failures."""
+        return self._failures_in_a_row >= self.max_failures
+
+    def _top_up(self) -> None:
+        if self._closed or self.paused:
+            return
+        missing = self.size - self._ready.qsize() - len(self._warming)
+        for _ in range(max(missing, 0)):
+            task = asyncio.create_task(self._warm_one())
+            self._warming.add(task)
+            task.add_done_callback(self._warming.discard)
+
+    async def _connect_new(self) -> tuple[Any, float]:
+        start = time.perf_counter()
+        client = self.factory()
+        await client.connect()
+        return client, time.perf_counter() - start
+
+    async def _warm_one(self) -> None:
+        while True:
+            try:
+                client, elapsed = await self._connect_new()
+                break
+            except Exception as e:
+                self.warm_failures += 1
+                self._failures_in_a_row += 1
+                if self.paused:
+                    logger.warning("Client pool warm-up keeps failing, pausing pre-warming: %s", e)
+                    return
+                delay = self.retry_delay * 2 ** (self._failures_in_a_row - 1)
+                if self._failures_in_a_row == 1:
+                    logger.error("Client pool warm-up failed, retrying in %ss: %s", delay, e, exc_info=True)
+                else:
+                    logger.warning("Client pool warm-up failed again, retrying in %ss: %s", delay, e)
+                await asyncio.sleep(delay)
+        self._failures_in_a_row = 0
+        self._warm_times.append(elapsed)
+        if self._closed:
+            await self._disconnect(client)
+            return
+        self._ready.put_nowait(client)
+        logger.debug("Client pool warmed a client in %.2fs (%d ready)", elapsed, self._ready.qsize())
+
+    # -------------------------------------------------------------------------
+    # Sessions
+    # -------------------------------------------------------------------------
+
+    async def acquire(self, campaign: str = "", character: str = "") -> BoundClient:
+        """Hand out a connected client bound to the given campaign/character.
+
+        Uses a warm client when one is ready (a hit); otherwise connects a new
+        one inline (a miss). Either way the pool is topped up afterwards.
+        """
+        start = time.perf_counter()
+        try:
+            client = self._ready.get_nowait()
+            self.hits += 1
+            outcome = "hit"
+        except asyncio.QueueEmpty:
+            client, _ = await self._connect_new()
+            self._failures_in_a_row = 0  # connecting works again: resume pre-warming
+            self.misses += 1
+            outcome = "miss"
+        elapsed = time.perf_counter() - start
+        self._ready_times.append(elapsed)
+        self._top_up()
+
+        logger.info(
+            "Client pool %s: ready in %.3fs (%d warm left)",
+            outcome,
+            elapsed,
+            self._ready.qsize(),
+            extra={"pool": outcome, "elapsed": round(elapsed, 3)},
+        )
+        layers = session_layers(campaign, character) if campaign and character else []
+        return BoundClient(client, render_layers(layers) if layers else None)
+
+    async def release(self, client: BoundClient) -> None:
+        """Disconnect a session's client; bound clients carry conversation state and are never reused."""
+        await self._disconnect(client.client)
+
+    async def _disconnect(self, client: Any) -> None:
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.warning("Error disconnecting pooled client: %s", e)
+
+    def stats(self) -> dict[str, Any]:
+        """Pool hit/miss counts and time-to-ready figures (seconds)."""
+        ready_times = sorted(self._ready_times)
+        return {
+            "size": self.size,
+            "ready": self._ready.qsize(),
+            "warming": len(self._warming),
+            "hits": self.hits,
+            "misses": self.misses,
+            "warm_failures": self.warm_failures,
+            "warming_paused": self.paused,
+            "time_to_ready_avg": sum(ready_times) / len(ready_times) if ready_times else None,
+            "time_to_ready_max": ready_times[-1] if ready_times else None,
+            "warm_connect_avg": sum(self._warm_times) / len(self._warm_times) if self._warm_times else None,
+        }
@@ -0,0 +1,335 @@
+"""Append-only structured event log of a campaign instance."""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from .file_locks import locked
+from .logging_config import logger
+
+# Segment size at which the log rotates to a new segment file
+SEGMENT_BYTES = 1024 * 1024
+
+# Unsynced appends that force an fsync
+FSYNC_BATCH = 32
+
+# Longest an append stays unsynced, in seconds
+FSYNC_INTERVAL = 1.0
+
+INDEX_FILE = "index.json"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _segment_name(number: int) -> str:
+    return f"events-{number:06d}.jsonl"
+
+
+def _read_events(path: Path) -> list[dict[str, Any]]:
+    events = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue  # torn final line after a crash
+    return events
+
+
+def _segment_meta(name: str) -> dict[str, Any]:
+    return {
+        "file": name,
+        "bytes": 0,
+        "first_seq": None,
+        "last_seq": None,
+        "first_ts": None,
+        "last_ts": None,
+        "acts": [],
+        "beats": [],
+        "kinds": [],
+    }
+
+
+def _add_to_meta(meta: dict[str, Any], event: dict[str, Any]) -> None:
+    if meta["first_seq"] is None:
+        meta["first_seq"], meta["first_ts"] = event["seq"], event["ts"]
+    meta["last_seq"], meta["last_ts"] = event["seq"], event["ts"]
+    for key, field in (("acts", "act"), ("beats", "beat"), ("kinds", "kind")):
+        value = event.get(field)
+        if value is not None and value not in meta[key]:
+            meta[key].append(value)
+
+
+def _last_seq(segments: list[dict[str, Any]]) -> int:
+    return next((m["last_seq"] for m in reversed(segments) if m["last_seq"] is not None), 0)
+
+
+def _matches(event: dict[str, Any], kind: str | None, act: str | None, beat: str | None, since: str | None) -> bool:
+    return (
+        (kind is None or event.get("kind") == kind)
+        and (act is None or event.get("act") == act)
+        and (beat is None or event.get("beat") == beat)
+        and (since is None or event["ts"] >= since)
+    )
+
+
+def _may_match(meta: dict[str, Any], kind: str | None, act: str | None, beat: str | None, since: str | None) -> bool:
+    return (
+        meta["last_seq"] is not None
+        and (kind is None or kind in meta["kinds"])
+        and (act is None or act in meta["acts"])
+        and (beat is None or beat in meta["beats"])
+        and (since is None or meta["last_ts"] >= since)
+    )
+
+
+class EventLog:
+    """Segmented JSONL event log in one directory.
+
+    Args:
+        directory: Directory holding the segments and their index (created on first append)
+        segment_bytes: Segment size that triggers rotation
+        fsync_batch: Unsynced appends that force an fsync
+        fsync_interval: Seconds an append may stay unsynced
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_bytes: int = SEGMENT_BYTES,
+        fsync_batch: int = FSYNC_BATCH,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.fsyncs = 0
+        self._lock = threading.RLock()
+        self._segments: list[dict[str, Any]] | None = None
+        self._file = None
+        self._unsynced = 0
+        self._timer: threading.Timer | None = None
+
+    # -- index -----------------------------------------------------------------
+
+    def _load(self) -> list[dict[str, Any]]:
+        # Loaded lazily so opening a log never touches the disk
+        if self._segments is not None:
+            return self._segments
+        recorded = {}
+        try:
+            recorded = {meta["file"]: meta for meta in json.loads((self.directory / INDEX_FILE).read_text())}
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            pass
+        segments = []
+        for path in sorted(self.directory.glob("events-*.jsonl")):
+            meta = recorded.get(path.name)
+            size = path.stat().st_size
+            if meta is None or meta["bytes"] != size:
+                # Appended after the last index write (or the index is gone): rescan this segment
+                meta = _segment_meta(path.name)
+                for event in _read_events(path):
+                    _add_to_meta(meta, event)
+                meta["bytes"] = size
+            segments.append(meta)
+        self._segments = segments
+        return segments
+
+    def _refresh(self) -> list[dict[str, Any]]:
+        # Another worker may have appended or rotated since this one last looked
+        # (a campaign moves when its worker goes down), so check the tail on disk
+        segments = self._segments
+        if segments is not None:
+            try:
+                size = (self.directory / segments[-1]["file"]).stat().st_size if segments else 0
+            except FileNotFoundError:
+                size = None
+            rotated = (self.directory / _segment_name(len(segments) + 1)).exists()
+            if rotated or (segments and size != segments[-1]["bytes"]):
+                logger.debug("Event log %s changed on disk, reloading", self.directory)
+                self._sync()
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._segments = None
+        return self._load()
+
+    @contextmanager
+    def _current(self, create: bool = False) -> Iterator[list[dict[str, Any]]]:
+        """Hold the log against other threads and processes, yielding its up-to-date segment list."""
+        with self._lock:
+            if create:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            elif not self.directory.is_dir():
+                yield self._load()
+                return
+            with locked(self.directory / INDEX_FILE):
+                yield self._refresh()
+
+    def _write_index(self) -> None:
+        tmp = self.directory / f".{INDEX_FILE}.tmp"
+        tmp.write_text(json.dumps(self._segments))
+        os.replace(tmp, self.directory / INDEX_FILE)
+
+    @property
+    def last_seq(self) -> int:
+        with self._current() as segments:
+            return _last_seq(segments)
+
+    # -- writing ---------------------------------------------------------------
+
+    def append(
+        self,
+        kind: str,
+        text: str,
+        act: str | None = None,
+        beat: str | None = None,
+        data: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Append one event and return it (with its ``seq`` and ``ts``)."""
+        with self._current(create=True) as segments:
+            event = {"seq": _last_seq(segments) + 1, "ts": _now(), "kind": kind, "act": act, "beat": beat, "text": text}
+            if data:
+                event["data"] = data
+            line = (json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+            if not segments or (segments[-1]["bytes"] and segments[-1]["bytes"] + len(line) > self.segment_bytes):
+                self._rotate()
+            meta = segments[-1]
+            if self._file is None:
+                self._file = open(self.directory / meta["file"], "ab")
+            self._file.write(line)
+            self._file.flush()
+            meta["bytes"] += len(line)
+            _add_to_meta(meta, event)
+
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_batch:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+            return event
+
+    def _rotate(self) -> None:
+        self._sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        number = len(self._segments) + 1
+        self._segments.append(_segment_meta(_segment_name(number)))
+        if number > 1:
+            logger.debug("Event log %s rotated to segment %d", self.directory, number)
+
+    def _sync(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._file is None or not self._unsynced:
+            return
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self.fsyncs += 1
+        self._write_index()
+
+    def sync(self) -> None:
+        """Fsync pending appends and write the index."""
+        with self._lock:
+            if self._file is None:
+                return
+            with locked(self.directory / INDEX_FILE):
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            with locked(self.directory / INDEX_FILE):
+                self._sync()
+            self._file.close()
+            self._file = None
+
+    # -- reading ---------------------------------------------------------------
+
+    def _segments_newest_first(
+        self, kind: str | None, act: str | None, beat: str | None, since: str | None
+    ) -> Iterator[dict[str, Any]]:
+        with self._current() as current:
+            segments = list(current)
+        for meta in reversed(segments):
+            if _may_match(meta, kind, act, beat, since):
+                yield meta
+
+    def tail(
+        self,
+        last: int | None = 20,
+        kind: str | None = None,
+        act: str | None = None,
+        beat: str | None = None,
+        since: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """The last ``last`` events matching every given filter (all of them if ``last`` is None), oldest first.
+
+        Args:
+            since: ISO 8601 timestamp; only events at or after it
+        """
+        if last is not None and last <= 0:
+            return []
+        if since is not None:
+            since = datetime.fromisoformat(since).astimezone(timezone.utc).isoformat(timespec="seconds")
+        found: list[dict[str, Any]] = []
+        for meta in self._segments_newest_first(kind, act, beat, since):
+            matched = [e for e in _read_events(self.directory / meta["file"]) if _matches(e, kind, act, beat, since)]
+            found = matched + found
+            if last is not None and len(found) >= last:
+                return found[-last:]
+        return found
+
+    def render_markdown(self, title: str, last: int | None = None, **filters: Any) -> str:
+        """Markdown view of the log (as ``campaign_log.md`` used to read)."""
+        lines = [f"# {title} - Event Log", ""]
+        for event in self.tail(last, **filters):
+            stamp = datetime.fromisoformat(event["ts"]).astimezone().strftime("%Y-%m-%d %H:%M")
+            where = " / ".join(part for part in (event.get("act"), event.get("beat")) if part)
+            prefix = f"**{stamp}**" + (f" [{where}]" if where else "") + f" ({event['kind']})"
+            lines += [f"{prefix} - {event['text']}", ""]
+        return "\n".join(lines)
+
+
+class EventLogs:
+    """Open event logs of the campaign instances in one directory.
+
+    Args:
+        campaigns_dir: Directory holding the campaign instances
+    """
+
+    def __init__(self, campaigns_dir: str | Path):
+        self.campaigns_dir = Path(campaigns_dir)
+        self._logs: dict[str, EventLog] = {}
+        self._lock = threading.Lock()
+
+    def get(self, instance: str) -> EventLog | None:
+        """The event log of an existing campaign instance, or None."""
+        directory = self.campaigns_dir / instance
+        if not instance or not directory.is_dir() or directory.resolve().parent != self.campaigns_dir.resolve():
+            return None
+        with self._lock:
+            log = self._logs.get(instance)
+            if log is None:
+                log = self._logs[instance] = EventLog(directory / "events")
+            return log
+
+    def close(self) -> None:
+        with self._lock:
+            for log in self._logs.values():
+                log.close()
+            self._logs.clear()
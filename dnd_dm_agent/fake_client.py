@@ -0,0 +1,147 @@
+"""Offline stand-in for ClaudeSDKClient."""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator
+
+from claude_agent_sdk import (
+    AssistantMessage,
+    ClaudeSDKClient,
+    ResultMessage,
+    StreamEvent,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+# Offline stand-in agent (no API calls), for local multi-worker and load testing
+FAKE_AGENT = os.environ.get("DND_FAKE_AGENT") == "1"
+
+# Scripted turns the fake agent replays (JSON file), instead of its canned narration
+FAKE_SCRIPT = os.environ.get("DND_FAKE_SCRIPT")
+
+
+def load_script(path: str | os.PathLike) -> list[list[dict[str, Any]]]:
+    """Turns for a FakeAgentClient to replay: a JSON list of turns, each a list of steps.
+
+    Steps play in order, and the turns start over once all have played:
+
+    - ``{"text": ...}``: narration, streamed word by word (``delay`` seconds
+      apart) unless ``"stream": false``, then sent as a TextBlock
+    - ``{"tool_use": name, "input": {...}}``: a tool call (optional ``id``)
+    - ``{"tool_result": ...}``: the result of the preceding tool call (or ``tool_use_id``)
+    - ``{"sleep": seconds}``: a pause, e.g. for model or tool latency
+
+    ``steps_from_messages`` turns a recorded message stream into steps.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def agent_client(options: Any) -> "ClaudeSDKClient | FakeAgentClient":
+    """An agent client for ``options``: a FakeAgentClient when DND_FAKE_AGENT=1."""
+    if not FAKE_AGENT:
+        return ClaudeSDKClient(options=options)
+    return FakeAgentClient(options, script=load_script(FAKE_SCRIPT) if FAKE_SCRIPT else None)
+
+
+def steps_from_messages(messages: list[Any]) -> list[dict[str, Any]]:
+    """Script steps that replay one recorded turn (the messages of a ``receive_response``)."""
+    steps: list[dict[str, Any]] = []
+    for message in messages:
+        if isinstance(message, (AssistantMessage, UserMessage)) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, TextBlock):
+                    steps.append({"text": block.text})
+                elif isinstance(block, ToolUseBlock):
+                    steps.append({"tool_use": block.name, "input": block.input, "id": block.id})
+                elif isinstance(block, ToolResultBlock):
+                    steps.append({"tool_result": block.content, "tool_use_id": block.tool_use_id})
+    return steps
+
+
+class FakeAgentClient:
+    """Answers every query with a canned narration, or the next turn of a script.
+
+    Args:
+        options: Accepted for signature compatibility with ClaudeSDKClient; unused
+        delay: Seconds between streamed words
+        script: Turns to replay, each a list of steps (see load_script)
+    """
+
+    def __init__(self, options: Any = None, delay: float = 0.05, script: list[list[dict[str, Any]]] | None = None):
+        self.options = options
+        self.delay = delay
+        self.script = script
+        self.queries: list[str] = []
+        self._interrupted = False
+        self._turns = 0
+
+    async def connect(self, prompt: str | None = None) -> None:
+        pass
+
+    async def disconnect(self) -> None:
+        pass
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        self.queries.append(prompt)
+        self._interrupted = False
+
+    async def interrupt(self) -> None:
+        self._interrupted = True
+
+    def _next_steps(self) -> list[dict[str, Any]]:
+        if self.script:
+            steps = self.script[self._turns % len(self.script)]
+        else:
+            prompt = self.queries[-1][:80] if self.queries else "..."
+            steps = [{"text": f"The DM considers: {prompt}"}]
+        self._turns += 1
+        return steps
+
+    async def _stream(self, text: str, delay: float) -> AsyncIterator[StreamEvent]:
+        for i, word in enumerate(text.split()):
+            if self._interrupted:
+                return
+            await asyncio.sleep(delay)
+            yield StreamEvent(
+                uuid=f"fake-{self._turns}-{i}",
+                session_id="fake",
+                event={"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": f"{word} "}},
+            )
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        tool_use_id = None
+        for n, step in enumerate(self._next_steps()):
+            if self._interrupted:
+                break
+            if "sleep" in step:
+                await asyncio.sleep(step["sleep"])
+            elif "text" in step:
+                if step.get("stream", True):
+                    async for event in self._stream(step["text"], step.get("delay", self.delay)):
+                        yield event
+                    if self._interrupted:
+                        break
+                yield AssistantMessage(content=[TextBlock(text=step["text"])], model="fake")
+            elif "tool_use" in step:
+                tool_use_id = step.get("id", f"fake-tool-{self._turns}-{n}")
+                yield AssistantMessage(
+                    content=[ToolUseBlock(id=tool_use_id, name=step["tool_use"], input=step.get("input", {}))],
+                    model="fake",
+                )
+            elif "tool_result" in step:
+                result = ToolResultBlock(tool_use_id=step.get("tool_use_id", tool_use_id), content=step["tool_result"])
+                yield UserMessage(content=[result])
+        yield ResultMessage(
+            subtype="success",
+            duration_ms=0,
+            duration_api_ms=0,
+            is_error=False,
+            num_turns=1,
+            session_id="fake",
+            total_cost_usd=0.0,
+            usage={},
+        )
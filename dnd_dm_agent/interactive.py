@@ -1,64 +1,166 @@
 """Interactive D&D REPL using ClaudeSDKClient."""
 
 import asyncio
-from claude_agent_sdk import ClaudeSDKClient, AssistantMessage, TextBlock
-from .claude_agent import get_options, process_message, post_turn_bookkeeping
-from .logging_config import logger
+import threading
+from typing import Any
+
+from .logging_config import bind_log_context, logger
+
+
+async def _connect_bookkeeping_client() -> Any:
+    from .bookkeeping import copy_on_write_hooks
+    from .claude_agent import get_options
+    from .fake_client import agent_client
+
+    client = agent_client(get_options(hooks=copy_on_write_hooks()))
+    await client.connect()
+    return client
+
+
+async def _connect_narrator() -> Any:
+    """Load the agent stack and connect the narrating client."""
+    from .bookkeeping import agent_hooks
+    from .claude_agent import get_options
+    from .fake_client import agent_client
+
+    client = agent_client(get_options(hooks=agent_hooks(), stream_text=True))
+    await client.connect()
+    return client
+
+
+async def _read_line(prompt: str) -> str:
+    """``input()`` off the event loop, so background bookkeeping keeps running.
+
+    The read runs in a daemon thread rather than the default executor: a prompt
+    left waiting by Ctrl+C would otherwise hold up interpreter exit until Enter.
+    """
+    loop = asyncio.get_running_loop()
+    line: asyncio.Future[str] = loop.create_future()
+
+    def settle(result: str | None, error: BaseException | None) -> None:
+        if line.done():
+            return
+        if error is not None:
+            line.set_exception(error)
+        else:
+            line.set_result(result)
+
+    def read() -> None:
+        try:
+            result, error = input(prompt), None
+        except BaseException as e:  # EOFError, KeyboardInterrupt
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:  # the loop is already closed
+            pass
+
+    threading.Thread(target=read, name="repl-input", daemon=True).start()
+    return await line
 
 
 async def repl():
     """Interactive session with automatic conversation history."""
     print("🎲 D&D Dungeon Master (type 'exit' to quit)\n")
     logger.info("Starting interactive REPL session")
+    connecting = asyncio.create_task(_connect_narrator())
+    client = None
+    bookkeeper = None
+    turn_count = 0
+
+    try:
+        first_input: str | None = (await _read_line("You: ")).strip()
+        client = await connecting
+
+        from claude_agent_sdk import AssistantMessage, TextBlock
+
+        from .bookkeeping import BookkeepingWorker, Exchange
+        from .claude_agent import process_message, text_delta
+
+        # Bookkeeping runs on its own client in the background between turns
+        bookkeeper = BookkeepingWorker(connect=_connect_bookkeeping_client, disconnect=lambda c: c.disconnect())
 
-    async with ClaudeSDKClient(options=get_options()) as client:
-        turn_count = 0
         while True:
             try:
-                user_input = input("You: ").strip()
+                if first_input is not None:
+                    user_input, first_input = first_input, None
+                else:
+                    user_input = (await _read_line("You: ")).strip()
                 if not user_input:
                     continue
                 if user_input.lower() in ['exit', 'quit']:
                     break
 
                 turn_count += 1
-                logger.info(f"[Turn {turn_count}] User input: {user_input[:100]}...")
+                bind_log_context(turn=turn_count)
+                logger.info("[Turn %d] User input (%d chars)", turn_count, len(user_input))
+                logger.debug("[Turn %d] User input: %s", turn_count, user_input)
 
                 # Send message and collect response
+                exchange = Exchange(player_input=user_input)
                 await client.query(user_input)
 
-                response_parts = []
+                # Narration is printed as it streams; a block that arrived without
+                # deltas is printed whole
+                print("\nDM: ", end="", flush=True)
+                streamed = False
                 async for message in client.receive_response():
                     # Apply logging to each message (same as CLI)
                     process_message(message)
+                    exchange.observe(message)
 
-                    if isinstance(message, AssistantMessage):
+                    delta = text_delta(message)
+                    if delta:
+                        print(delta, end="", flush=True)
+                        streamed = True
+                    elif isinstance(message, AssistantMessage):
                         for block in message.content:
                             if isinstance(block, TextBlock):
-                                response_parts.append(block.text)
+                                print(block.text if not streamed else "", end="\n", flush=True)
+                                streamed = False
 
-                response = "\n".join(response_parts)
-                print(f"\nDM: {response}\n")
-                logger.info(f"[Turn {turn_count}] Response completed")
+                print()
+                logger.info("[Turn %d] Response completed", turn_count)
 
-                # Silent post-turn bookkeeping (tool calls logged at DEBUG level)
-                async for _ in post_turn_bookkeeping(client):
-                    pass
+                # Silent post-turn bookkeeping in the background (tool calls logged at DEBUG level)
+                bookkeeper.submit(exchange)
 
-            except (EOFError, KeyboardInterrupt):
-                logger.info("REPL interrupted by user")
-                break
+            except EOFError:
+                raise
             except Exception as e:
-                logger.error(f"Error in REPL: {e}", exc_info=True)
+                logger.error("Error in REPL: %s", e, exc_info=True)
                 print(f"\n❌ Error: {e}\n")
 
-    logger.info(f"REPL session ended after {turn_count} turns")
+    # Ctrl+C reaches the awaiting task as a cancellation (asyncio.run turns it
+    # back into KeyboardInterrupt once this returns)
+    except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+        logger.info("REPL interrupted by user")
+
+    finally:
+        # Release both agent clients (and their CLI subprocesses) however the session ended
+        try:
+            if bookkeeper is not None:
+                await bookkeeper.close()
+        finally:
+            if client is None:
+                connecting.cancel()
+                await asyncio.wait([connecting])
+                if not connecting.cancelled() and connecting.exception() is None:
+                    client = connecting.result()
+            if client is not None:
+                await client.disconnect()
+
+    logger.info("REPL session ended after %d turns", turn_count, extra={"turns": turn_count})
     print("\n👋 Thanks for playing!")
 
 
 def main():
     """Entry point."""
-    asyncio.run(repl())
+    try:
+        asyncio.run(repl())
+    except KeyboardInterrupt:
+        # Raised by asyncio.run after an interrupted session has shut down
+        pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+"""Inverted index (BM25 over markdown sections) for the rules knowledge base."""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .file_locks import atomic_write, locked
+from .logging_config import logger
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Knowledge files indexed by default (the skills' reference markdown)
+KNOWLEDGE_DIR = Path(os.environ.get("DND_KNOWLEDGE_DIR", PROJECT_ROOT / ".claude" / "skills"))
+
+# Persisted index, kept out of the skills directory (the CLI reads everything in it as skill content)
+CACHE_DIR = Path(os.environ.get("DND_CACHE_DIR", PROJECT_ROOT / ".cache"))
+INDEX_FILE = CACHE_DIR / "knowledge_index.json"
+INDEX_VERSION = 1
+
+# Seconds between checks of the knowledge files for changes when searching
+REFRESH_INTERVAL = float(os.environ.get("DND_KNOWLEDGE_REFRESH", "60"))
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in into is it its of on or that the "
+    "their then there these this to was what when where which who will with you your".split()
+)
+
+
+class Section(NamedTuple):
+    """A heading-delimited piece of a markdown file."""
+
+    heading: str
+    level: int
+    text: str
+
+
+def split_sections(markdown: str) -> list[Section]:
+    """Split markdown at headings; text before the first heading becomes an untitled section."""
+    sections = []
+    matches = list(_HEADING.finditer(markdown))
+    preamble = markdown[: matches[0].start()] if matches else markdown
+    if preamble.strip():
+        sections.append(Section("", 0, preamble.strip()))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(markdown)
+        sections.append(Section(match.group(2).strip(), len(match.group(1)), markdown[match.start() : end].strip()))
+    return sections
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class KnowledgeIndex:
+    """BM25 search over the sections of every markdown file in a directory.
+
+    Searches re-check the files for changes at most every ``refresh_interval``
+    seconds; ``refresh`` re-checks them right away.
+
+    Args:
+        root: Directory of knowledge markdown files (searched recursively)
+        index_path: Where the index is persisted; None keeps it in memory only
+        refresh_interval: Seconds a search trusts the index before re-checking the files
+    """
+
+    def __init__(
+        self, root: str | Path, index_path: str | Path | None = None, refresh_interval: float = REFRESH_INTERVAL
+    ):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else None
+        self.refresh_interval = refresh_interval
+        self._checked: float | None = None
+        # relative path -> {"mtime_ns", "size", "sections": [{"heading", "text", "length", "terms"}]}
+        self._files: dict[str, dict[str, Any]] = {}
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._docs: list[tuple[str, dict[str, Any]]] = []
+        self._avg_length = 0.0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.files_indexed = 0
+
+    # -------------------------------------------------------------------------
+    # Building
+    # -------------------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Re-index added, changed and removed files. Returns True if anything changed."""
+        with self._lock:
+            self._checked = time.monotonic()
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+            current = {}
+            if self.root.is_dir():
+                for path in sorted(self.root.rglob("*.md")):
+                    stat = path.stat()
+                    current[path.relative_to(self.root).as_posix()] = (path, stat.st_mtime_ns, stat.st_size)
+
+            changed = set(self._files) - set(current)
+            for name in changed:
+                del self._files[name]
+            for name, (path, mtime_ns, size) in current.items():
+                entry = self._files.get(name)
+                if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+                    continue
+                self._files[name] = {"mtime_ns": mtime_ns, "size": size, "sections": self._index_file(path)}
+                self.files_indexed += 1
+                changed.add(name)
+
+            if changed or (self._files and not self._docs):
+                self._build_postings()
+            if changed:
+                logger.info("Knowledge index: re-indexed %d file(s), %d sections", len(changed), len(self._docs))
+                self._save()
+            return bool(changed)
+
+    def _index_file(self, path: Path) -> list[dict[str, Any]]:
+        sections = []
+        for section in split_sections(path.read_text(encoding="utf-8", errors="replace")):
+            terms = tokenize(section.text)
+            if terms:
+                sections.append(
+                    {
+                        "heading": section.heading,
+                        "text": section.text,
+                        "length": len(terms),
+                        "terms": dict(Counter(terms)),
+                    }
+                )
+        return sections
+
+    def _build_postings(self) -> None:
+        self._docs = [(name, s) for name, entry in sorted(self._files.items()) for s in entry["sections"]]
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for doc_id, (_, section) in enumerate(self._docs):
+            for term, count in section["terms"].items():
+                postings.setdefault(term, []).append((doc_id, count))
+        self._postings = postings
+        self._avg_length = sum(s["length"] for _, s in self._docs) / len(self._docs) if self._docs else 0.0
+
+    def _load(self) -> None:
+        if not self.index_path or not self.index_path.exists():
+            return
+        try:
+            with locked(self.index_path):
+                data = json.loads(self.index_path.read_text())
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable knowledge index %s: %s", self.index_path, e)
+            return
+        if data.get("version") == INDEX_VERSION:
+            self._files = data["files"]
+
+    def _save(self) -> None:
+        if not self.index_path:
+            return
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with locked(self.index_path):
+                atomic_write(self.index_path, json.dumps({"version": INDEX_VERSION, "files": self._files}))
+        except OSError as e:
+            logger.warning("Could not persist knowledge index to %s: %s", self.index_path, e)
+
+    # -------------------------------------------------------------------------
+    # Searching
+    # -------------------------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        """Top ``top_k`` sections for ``query`` by BM25 score, best first."""
+        if self._checked is None or time.monotonic() - self._checked >= self.refresh_interval:
+            self.refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            return self._search(terms, top_k)
+
+    def _search(self, terms: set[str], top_k: int) -> list[dict[str, Any]]:
+        if not terms or not self._docs:
+            return []
+        scores: dict[int, float] = {}
+        total = len(self._docs)
+        for term in terms:
+            postings = self._postings.get(term, [])
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, count in postings:
+                length = self._docs[doc_id][1]["length"]
+                norm = count * (BM25_K1 + 1) / (count + BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {
+                "file": self._docs[doc_id][0],
+                "heading": self._docs[doc_id][1]["heading"],
+                "score": round(score, 3),
+                "text": self._docs[doc_id][1]["text"],
+            }
+            for doc_id, score in ranked
+        ]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"files": len(self._files), "sections": len(self._docs), "terms": len(self._postings)}
+
+
+knowledge_index = KnowledgeIndex(KNOWLEDGE_DIR, INDEX_FILE)
+
+
+if __name__ == "__main__":
+    knowledge_index.refresh()
+    print(f"Knowledge index for {KNOWLEDGE_DIR}: {knowledge_index.stats()}")
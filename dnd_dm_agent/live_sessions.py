@@ -0,0 +1,203 @@
+"""Live agent sessions that outlive their WebSocket."""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from .logging_config import logger
+from .session_inputs import InputQueue
+from .ws_writer import INDICATOR_EVENTS, MERGEABLE_EVENTS, EventWriter
+
+# Seconds a session is kept after its socket dropped (0 ends it right away)
+RECONNECT_GRACE = float(os.environ.get("DND_RECONNECT_GRACE", "120"))
+
+# Parked sessions kept at most; the longest-parked is evicted beyond this
+MAX_PARKED_SESSIONS = int(os.environ.get("DND_MAX_PARKED_SESSIONS", "50"))
+
+# Events buffered for replay while detached (after merging text)
+REPLAY_LIMIT = 500
+
+
+class LiveSession:
+    """One player session's agent state and the socket currently attached to it.
+
+    Args:
+        session_id: Session id chosen by the browser
+        campaign: Campaign instance the session was opened for
+        character: Active character the session was opened for
+        client: The session's agent client
+        replay_limit: Events buffered while detached; the oldest are dropped beyond this
+    """
+
+    def __init__(self, session_id: str, campaign: str, character: str, client: Any, replay_limit: int = REPLAY_LIMIT):
+        self.session_id = session_id
+        self.campaign = campaign
+        self.character = character
+        self.client = client
+        self.inputs = InputQueue()
+        self.in_turn = False
+        self.task: asyncio.Task | None = None
+        self.writer: EventWriter | None = None
+        self.detached_at: float | None = None
+        self._replay: deque[dict[str, Any]] = deque(maxlen=replay_limit)
+        self._on_close: Callable[[], Awaitable[None]] | None = None
+        self._closed = False
+
+    def on_close(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Register the coroutine that releases the session's resources."""
+        self._on_close = callback
+
+    @property
+    def buffered(self) -> int:
+        """Events waiting to be replayed to the next socket."""
+        return len(self._replay)
+
+    @property
+    def ended(self) -> bool:
+        """Whether the turn loop has stopped (after an error, or because the session was closed)."""
+        return self.task is not None and self.task.done()
+
+    async def send(self, event: dict[str, Any]) -> None:
+        """Send to the attached socket, or buffer for replay while detached."""
+        if self.writer is not None and not self.writer.closed:
+            await self.writer.send(event)
+        else:
+            self._buffer(event)
+
+    def _buffer(self, event: dict[str, Any]) -> None:
+        kind = event.get("type")
+        if kind in INDICATOR_EVENTS:
+            return  # stale by the time anyone reconnects
+        field = MERGEABLE_EVENTS.get(kind)
+        if field and self._replay and self._replay[-1].get("type") == kind:
+            self._replay[-1][field] += event[field]
+            return
+        self._replay.append(dict(event))
+
+    async def attach(self, writer: EventWriter) -> None:
+        """Replay what was buffered to ``writer``, then make it the session's output."""
+        self.detached_at = None
+        # Events sent while the replay waits on the writer are buffered behind it, keeping their order
+        while self._replay:
+            await writer.send(self._replay.popleft())
+        self.writer = writer
+
+    async def detach(self, writer: EventWriter) -> bool:
+        """Close ``writer`` and keep what it could not deliver; False if another socket has taken over."""
+        if self.writer is not writer:
+            await writer.close()
+            return False
+        self.writer = None
+        self.detached_at = time.monotonic()
+        await writer.close()
+        # Undelivered events predate anything buffered since the detach
+        self._replay.extendleft(reversed(writer.take_unsent()))
+        return True
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.inputs.close()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            await asyncio.wait([self.task])
+        if self._on_close is not None:
+            await self._on_close()
+
+
+class SessionRegistry:
+    """Live sessions by id, with parking and eviction of detached ones.
+
+    Args:
+        grace: Seconds a detached session is kept for a reconnect
+        max_parked: Detached sessions kept at most
+    """
+
+    def __init__(self, grace: float = RECONNECT_GRACE, max_parked: int = MAX_PARKED_SESSIONS):
+        self.grace = grace
+        self.max_parked = max_parked
+        self._sessions: dict[str, LiveSession] = {}
+        self._reaper: asyncio.Task | None = None
+        self.reattached = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def session_ids(self) -> list[str]:
+        return sorted(self._sessions)
+
+    def campaigns(self) -> list[str]:
+        return sorted({live.campaign for live in self._sessions.values() if live.campaign})
+
+    async def take(self, session_id: str, campaign: str, character: str) -> LiveSession | None:
+        """The live session to reattach for a connect, if any.
+
+        A session opened for another campaign or character is closed instead.
+        """
+        live = self._sessions.get(session_id)
+        if live is None:
+            return None
+        if live.ended or (live.campaign, live.character) != (campaign, character):
+            await self.discard(live)
+            return None
+        self.reattached += 1
+        logger.info("[%s] Reattached live session", session_id)
+        return live
+
+    def add(self, live: LiveSession) -> None:
+        self._sessions[live.session_id] = live
+
+    async def discard(self, live: LiveSession) -> None:
+        """Remove and close a session."""
+        if self._sessions.get(live.session_id) is live:
+            del self._sessions[live.session_id]
+        await live.close()
+
+    async def park(self, live: LiveSession) -> None:
+        """Keep a detached session for a reconnect, evicting the longest-parked beyond the limit."""
+        if self.grace <= 0:
+            await self.discard(live)
+            return
+        logger.info("[%s] Session parked for %.0fs", live.session_id, self.grace)
+        parked = sorted((s for s in self._sessions.values() if s.detached_at is not None), key=lambda s: s.detached_at)
+        for oldest in parked[: max(len(parked) - self.max_parked, 0)]:
+            await self._evict(oldest, "parked session limit reached")
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def _evict(self, live: LiveSession, reason: str) -> None:
+        logger.info("[%s] Evicting live session: %s", live.session_id, reason, extra={"reason": reason})
+        self.evicted += 1
+        await self.discard(live)
+
+    async def _reap(self) -> None:
+        while True:
+            now = time.monotonic()
+            parked = [s for s in self._sessions.values() if s.detached_at is not None]
+            if not parked:
+                return
+            for live in parked:
+                # Skips sessions reattached while an earlier eviction was awaited
+                if live.detached_at is not None and now - live.detached_at >= self.grace:
+                    await self._evict(live, "reconnect grace period expired")
+            await asyncio.sleep(min(self.grace, 1.0))
+
+    async def close(self) -> None:
+        """Close every session (server shutdown)."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.wait([self._reaper])
+        for live in list(self._sessions.values()):
+            await self.discard(live)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "live": len(self._sessions),
+            "parked": sum(1 for s in self._sessions.values() if s.detached_at is not None),
+            "reattached": self.reattached,
+            "evicted": self.evicted,
+        }
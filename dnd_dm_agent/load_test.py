@@ -0,0 +1,260 @@
+"""WebSocket load generator for the server."""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import httpx
+from websockets.asyncio.client import connect
+
+try:
+    import psutil
+except ImportError:  # optional "load" extra
+    psutil = None
+
+try:
+    import msgpack
+except ImportError:  # optional "msgpack" extra
+    msgpack = None
+
+# Seconds between server CPU/memory samples
+SAMPLE_INTERVAL = 0.2
+
+# Seconds a spawned server gets to start answering
+SPAWN_TIMEOUT = 30.0
+
+# Percentiles reported for each timing
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(values: list[float], points: tuple[int, ...] = PERCENTILES) -> dict[str, float | None]:
+    """Nearest-rank percentiles of ``values`` (None when there are none)."""
+    ordered = sorted(values)
+    result: dict[str, float | None] = {}
+    for point in points:
+        if not ordered:
+            result[f"p{point}"] = None
+            continue
+        rank = max(1, -(-point * len(ordered) // 100))  # ceil(point/100 * n)
+        result[f"p{point}"] = ordered[rank - 1]
+    return result
+
+
+async def run_session(
+    ws_url: str,
+    session_id: str,
+    turns: int,
+    prompt: str,
+    timeout: float,
+    encoding: str = "json",
+) -> dict[str, Any]:
+    """Play ``turns`` turns on one WebSocket session and time them."""
+    first_chunks: list[float] = []
+    durations: list[float] = []
+    errors: list[str] = []
+    try:
+        url = f"{ws_url}/ws/{session_id}?encoding={encoding}"
+        async with connect(url, open_timeout=timeout, max_size=None) as ws:
+            for turn in range(turns):
+                sent = time.perf_counter()
+                await ws.send(json.dumps({"type": "user_input", "content": f"{prompt} ({turn + 1})"}))
+                first = None
+                while True:
+                    frame = await asyncio.wait_for(ws.recv(), timeout)
+                    event = msgpack.unpackb(frame) if isinstance(frame, bytes) else json.loads(frame)
+                    if first is None and event["type"] in ("text_delta", "text_chunk"):
+                        first = time.perf_counter() - sent
+                        first_chunks.append(first)
+                    elif event["type"] == "error":
+                        errors.append(str(event.get("error")))
+                    elif event["type"] == "turn_complete":
+                        durations.append(time.perf_counter() - sent)
+                        break
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    return {"first_chunk": first_chunks, "turn": durations, "errors": errors}
+
+
+async def _sample_process(pid: int, samples: dict[str, Any], stop: asyncio.Event) -> None:
+    process = psutil.Process(pid)
+    start = process.cpu_times()
+    started = time.perf_counter()
+    while True:
+        samples["peak_rss_mb"] = max(samples.get("peak_rss_mb", 0.0), process.memory_info().rss / 2**20)
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_INTERVAL)
+            break
+        except asyncio.TimeoutError:
+            continue
+    end = process.cpu_times()
+    cpu_seconds = (end.user - start.user) + (end.system - start.system)
+    samples["cpu_seconds"] = cpu_seconds
+    samples["cpu_percent"] = 100 * cpu_seconds / max(time.perf_counter() - started, 1e-9)
+
+
+async def _server_pid(url: str) -> int | None:
+    try:
+        async with httpx.AsyncClient(timeout=5) as http:
+            return (await http.get(f"{url}/api/load")).json().get("pid")
+    except (httpx.HTTPError, ValueError):
+        return None
+
+
+async def run_load(
+    url: str,
+    sessions: int = 10,
+    turns: int = 3,
+    prompt: str = "I look around the tavern",
+    timeout: float = 60.0,
+    encoding: str = "json",
+) -> dict[str, Any]:
+    """Run ``sessions`` concurrent sessions of ``turns`` turns against a server and report the timings."""
+    url = url.rstrip("/")
+    ws_url = "ws" + url.removeprefix("http")
+
+    server: dict[str, Any] = {}
+    sampler = None
+    stop = asyncio.Event()
+    pid = await _server_pid(url)
+    if pid is not None and psutil is not None:
+        server["pid"] = pid
+        sampler = asyncio.create_task(_sample_process(pid, server, stop))
+
+    run_id = uuid.uuid4().hex[:8]
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(ws_url, f"load-{run_id}-{i}", turns, prompt, timeout, encoding) for i in range(sessions))
+    )
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    if sampler is not None:
+        try:
+            await sampler
+        except psutil.Error:
+            pass  # server went away, or is not on this machine
+
+    first_chunks = [t for r in results for t in r["first_chunk"]]
+    durations = [t for r in results for t in r["turn"]]
+    return {
+        "sessions": sessions,
+        "turns": len(durations),
+        "errors": [e for r in results for e in r["errors"]],
+        "seconds": elapsed,
+        "turns_per_second": len(durations) / elapsed if elapsed else 0.0,
+        "first_chunk": percentiles(first_chunks),
+        "turn_duration": percentiles(durations),
+        "server": server,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def spawn_server(script: str | None = None, extra_env: dict[str, str] | None = None) -> Iterator[str]:
+    """Run a local server on a fake agent for the duration of the block; yields its URL."""
+    port = _free_port()
+    env = {**os.environ, "DND_FAKE_AGENT": "1", **(extra_env or {})}
+    env.setdefault("DND_LOG_LEVEL", "WARNING")  # keep per-turn logs out of the report
+    if script:
+        env["DND_FAKE_SCRIPT"] = os.path.abspath(script)
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "dnd_dm_agent.server:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + SPAWN_TIMEOUT
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                httpx.get(f"{url}/api/load", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Server did not start within {SPAWN_TIMEOUT:.0f}s")
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def format_report(report: dict[str, Any]) -> str:
+    def ms(value: float | None) -> str:
+        return "-" if value is None else f"{value * 1000:.0f} ms"
+
+    lines = [
+        f"{report['sessions']} sessions, {report['turns']} turns in {report['seconds']:.1f}s "
+        f"({report['turns_per_second']:.1f} turns/s), {len(report['errors'])} errors",
+    ]
+    for label, key in (("time to first chunk", "first_chunk"), ("turn duration", "turn_duration")):
+        values = "  ".join(f"{name} {ms(value)}" for name, value in report[key].items())
+        lines.append(f"{label:<20} {values}")
+    server = report["server"]
+    if "cpu_seconds" in server:
+        lines.append(
+            f"{'server':<20} pid {server['pid']}  cpu {server['cpu_seconds']:.2f}s ({server['cpu_percent']:.0f}%)  "
+            f"peak rss {server['peak_rss_mb']:.0f} MB"
+        )
+    elif psutil is None:
+        lines.append(f"{'server':<20} install psutil to sample CPU and memory")
+    for error in sorted(set(report["errors"]))[:5]:
+        lines.append(f"error: {error}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the D&D DM Agent WebSocket server")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server (or router) base URL")
+    parser.add_argument("--spawn", action="store_true", help="Start a local server on the fake agent instead")
+    parser.add_argument("--script", help="Fake agent script for --spawn (see fake_client.py)")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--prompt", default="I look around the tavern")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for any one event")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json", help="WebSocket event encoding")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if args.encoding == "msgpack" and msgpack is None:
+        parser.error("--encoding msgpack needs the msgpack package")
+
+    def run(url: str) -> dict[str, Any]:
+        return asyncio.run(run_load(url, args.sessions, args.turns, args.prompt, args.timeout, args.encoding))
+
+    if args.spawn:
+        with spawn_server(args.script) as url:
+            report = run(url)
+    else:
+        report = run(args.url)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
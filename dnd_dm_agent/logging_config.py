@@ -1,21 +1,215 @@
 """Logging configuration for DnD DM Agent."""
 
+import atexit
+import json
 import logging
 import os
+import queue
 import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
 
-# Log directory
+# Log directory (created when the first record is written)
 LOG_DIR = Path(__file__).parent.parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
 
+# JSON log size at which it rotates, and rotated files kept
+LOG_MAX_BYTES = int(os.environ.get("DND_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = 5
 
-def setup_logging(level: str = "INFO") -> logging.Logger:
+# Fraction of DEBUG records kept per call site (1 keeps all)
+DEBUG_SAMPLE_RATE = float(os.environ.get("DND_LOG_SAMPLE", "1"))
+
+# Most records written per batch
+LOG_BATCH = 256
+
+_session_var: ContextVar[str | None] = ContextVar("log_session", default=None)
+_turn_var: ContextVar[int | None] = ContextVar("log_turn", default=None)
+
+
+def bind_log_context(session: str | None = None, turn: int | None = None) -> None:
+    """Tag records logged from the current task, and tasks it starts afterwards, with a session and turn."""
+    if session is not None:
+        _session_var.set(session)
+    if turn is not None:
+        _turn_var.set(turn)
+
+
+class _ContextFilter(logging.Filter):
+    """Captures the context on the logging thread, before the record is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session = _session_var.get()
+        record.turn = _turn_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keeps one in ``1 / rate`` DEBUG records of each call site.
+
+    Args:
+        rate: Fraction of DEBUG records kept
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._seen: dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.every == 1:
+            return True
+        if not self.every:
+            return False
+        # Sampled per call site, so one chatty log line cannot crowd out the rest
+        site = f"{record.pathname}:{record.lineno}"
+        seen = self._seen.get(site, 0)
+        self._seen[site] = seen + 1
+        record.sampled = self.every
+        return seen % self.every == 0
+
+
+# Attributes every LogRecord has; the rest were added by filters or ``extra=``
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the session/turn context."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        # Context, sampling and any ``extra=`` fields of the call
+        for field, value in record.__dict__.items():
+            if field not in _RECORD_ATTRS and value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class JsonLinesFileHandler(RotatingFileHandler):
+    """Rotating JSON-lines file that writes a batch of records at once."""
+
+    def __init__(self, filename: str | Path, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self.setFormatter(JsonFormatter())
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+    def emit_batch(self, records: list[logging.LogRecord]) -> None:
+        text = "".join(f"{self.format(record)}\n" for record in records if record.levelno >= self.level)
+        if not text:
+            return
+        with self.lock:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes and self.stream.tell() and self.stream.tell() + len(text) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:  # delayed handlers reopen lazily
+                    self.stream = self._open()
+            self.stream.write(text)
+            self.stream.flush()
+
+
+class _LazyQueueHandler(QueueHandler):
+    """Queues records without formatting them; the writer thread formats.
+
+    The writer thread is started by the first record, so importing the package
+    starts no thread and creates no files.
+    """
+
+    def __init__(self, records: queue.SimpleQueue, writer: "LogWriter"):
+        super().__init__(records)
+        self.writer = writer
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.writer.ensure_started()
+        super().enqueue(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks pin their frames; render them now and drop the references
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogWriter:
+    """Background thread that drains the log queue in batches.
+
+    Args:
+        records: Queue the logger's handler puts records on
+        console: Handler for console output (INFO and above by default)
+        file: JSON-lines file handler
+    """
+
+    _STOP = object()
+
+    def __init__(self, records: queue.SimpleQueue, console: logging.Handler, file: JsonLinesFileHandler):
+        self.records = records
+        self.console = console
+        self.file = file
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        if self._thread.ident is not None:
+            return
+        with self._start_lock:
+            if self._thread.ident is None:
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.records.get()]
+            while len(batch) < LOG_BATCH:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            stop = self._STOP in batch
+            records = [record for record in batch if record is not self._STOP]
+            try:
+                for record in records:
+                    if record.levelno >= self.console.level:
+                        self.console.handle(record)
+                self.file.emit_batch(records)
+            except Exception as e:
+                # Never let a bad record or a full disk kill the writer
+                print(f"Log writer failed: {e!r}", file=sys.stderr)
+            self.batches += 1
+            if stop:
+                return
+
+    def stop(self) -> None:
+        """Write what is queued, then stop the thread."""
+        if self._thread.is_alive():
+            self.records.put(self._STOP)
+            self._thread.join()
+        self.file.close()
+
+
+def setup_logging(level: str = "INFO", log_dir: Path = LOG_DIR, name: str = "dnd_dm_agent") -> logging.Logger:
     """Configure logging for the DnD DM Agent.
 
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR). Default: INFO
                Can be overridden by DND_LOG_LEVEL environment variable.
+        log_dir: Directory of the JSON-lines log
+        name: Logger to configure
 
     Returns:
         Configured logger instance
@@ -23,33 +217,42 @@ def setup_logging(level: str = "INFO") -> logging.Logger:
     # Allow env var to override default
     level = os.environ.get("DND_LOG_LEVEL", level)
 
-    logger = logging.getLogger("dnd_dm_agent")
+    logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, level.upper()))
 
     # Avoid duplicate handlers
     if logger.handlers:
         return logger
 
-    # Format: timestamp - level - message
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-    # Console handler (INFO and above)
+    # Console: timestamp - level - message (INFO and above)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    )
 
-    # File handler (DEBUG and above)
-    file_handler = logging.FileHandler(LOG_DIR / "agent.log")
+    # File: JSON lines (DEBUG and above)
+    file_handler = JsonLinesFileHandler(Path(log_dir) / "agent.jsonl")
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    writer = LogWriter(records, console_handler, file_handler)
+    handler = _LazyQueueHandler(records, writer)
+    handler.addFilter(DebugSampler(DEBUG_SAMPLE_RATE))
+    handler.addFilter(_ContextFilter())
+    logger.addHandler(handler)
 
     return logger
 
 
+def stop_logging(logger: logging.Logger) -> None:
+    """Flush and detach a logger's queued handlers (their records are written first)."""
+    for handler in list(logger.handlers):
+        writer = getattr(handler, "writer", None)
+        if writer is not None:
+            logger.removeHandler(handler)
+            writer.stop()
+
+
 # Singleton logger instance
 logger = setup_logging()
@@ -0,0 +1,170 @@
+"""Per-turn latency, tool and token/cost metrics in Prometheus text format."""
+
+import time
+from typing import Any
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, StreamEvent, TextBlock, ToolUseBlock
+
+from .logging_config import logger
+
+SECONDS_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+TOKEN_BUCKETS = (0, 1_000, 5_000, 10_000, 20_000, 50_000, 100_000, 200_000)
+
+# ResultMessage.usage keys summed into token counters
+USAGE_KEYS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+# Prompt tokens of a turn: sent uncached, written to the prompt cache, or read from it
+PROMPT_KEYS = ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes them."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class TurnMetrics:
+    """Measurements of one agent turn, fed from its message stream."""
+
+    def __init__(self, phase: str, session_id: str = ""):
+        self.phase = phase
+        self.session_id = session_id
+        self.started = time.perf_counter()
+        self.time_to_first_text: float | None = None
+        self.duration: float | None = None
+        self.tool_calls = 0
+        self.usage: dict[str, int] = {}
+        self.cost_usd = 0.0
+        self.is_error = False
+
+    def observe(self, message: Any) -> None:
+        if isinstance(message, StreamEvent):
+            # With partial messages on, the first visible word is the first text delta
+            delta = message.event.get("delta", {}) if message.event.get("type") == "content_block_delta" else {}
+            if delta.get("type") == "text_delta" and self.time_to_first_text is None:
+                self.time_to_first_text = time.perf_counter() - self.started
+        elif isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock):
+                    self.tool_calls += 1
+                elif isinstance(block, TextBlock) and block.text and self.time_to_first_text is None:
+                    self.time_to_first_text = time.perf_counter() - self.started
+        elif isinstance(message, ResultMessage):
+            self.duration = time.perf_counter() - self.started
+            self.usage = {key: int((message.usage or {}).get(key) or 0) for key in USAGE_KEYS}
+            self.cost_usd = message.total_cost_usd or 0.0
+            self.is_error = message.is_error
+
+
+class MetricsRegistry:
+    """Aggregates turn metrics by phase (and by session while it is open)."""
+
+    HISTOGRAMS = {
+        "dnd_turn_duration_seconds": ("Wall time of an agent turn", SECONDS_BUCKETS),
+        "dnd_time_to_first_text_seconds": ("Time from query to the first narration text shown", SECONDS_BUCKETS),
+        "dnd_tool_calls_per_turn": ("Tool calls made in one turn", COUNT_BUCKETS),
+        "dnd_cache_read_tokens_per_turn": ("Prompt-cache read tokens in one turn", TOKEN_BUCKETS),
+    }
+
+    def __init__(self):
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._counters: dict[tuple[str, str], float] = {}
+        self.sessions: dict[str, dict[str, float]] = {}
+
+    def turn(self, phase: str, session_id: str = "") -> TurnMetrics:
+        """Start timing a turn; pass its messages to ``observe`` and hand it back to ``record``."""
+        return TurnMetrics(phase, session_id)
+
+    def _observe(self, name: str, phase: str, value: float) -> None:
+        key = (name, phase)
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(self.HISTOGRAMS[name][1])
+        self._histograms[key].observe(value)
+
+    def _add(self, name: str, phase: str, value: float) -> None:
+        self._counters[(name, phase)] = self._counters.get((name, phase), 0) + value
+
+    def record(self, turn: TurnMetrics) -> None:
+        phase = turn.phase
+        duration = turn.duration if turn.duration is not None else time.perf_counter() - turn.started
+        self._observe("dnd_turn_duration_seconds", phase, duration)
+        if turn.time_to_first_text is not None:
+            self._observe("dnd_time_to_first_text_seconds", phase, turn.time_to_first_text)
+        self._observe("dnd_tool_calls_per_turn", phase, turn.tool_calls)
+        self._observe("dnd_cache_read_tokens_per_turn", phase, turn.usage.get("cache_read_input_tokens", 0))
+
+        self._add("dnd_turns_total", phase, 1)
+        self._add("dnd_turn_errors_total", phase, int(turn.is_error))
+        self._add("dnd_cost_usd_total", phase, turn.cost_usd)
+        for key, value in turn.usage.items():
+            self._add(f"dnd_{key}_total", phase, value)
+
+        if turn.session_id in self.sessions:
+            totals = self.sessions[turn.session_id]
+            totals[f"{phase}_turns"] = totals.get(f"{phase}_turns", 0) + 1
+            totals["tool_calls"] = totals.get("tool_calls", 0) + turn.tool_calls
+            totals["cost_usd"] = totals.get("cost_usd", 0.0) + turn.cost_usd
+            for key, value in turn.usage.items():
+                totals[key] = totals.get(key, 0) + value
+
+    def open_session(self, session_id: str) -> None:
+        self.sessions.setdefault(session_id, {})
+
+    def close_session(self, session_id: str) -> dict[str, float]:
+        """Stop tracking a session and return (and log) its totals."""
+        totals = self.sessions.pop(session_id, {})
+        if totals:
+            logger.info("[%s] Session metrics: %s", session_id, totals, extra={"metrics": totals})
+        return totals
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, (help_text, _) in self.HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (hist_name, phase), hist in sorted(self._histograms.items()):
+                if hist_name != name:
+                    continue
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'{name}_bucket{{phase="{phase}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{phase="{phase}",le="+Inf"}} {hist.count}')
+                lines.append(f'{name}_sum{{phase="{phase}"}} {hist.sum}')
+                lines.append(f'{name}_count{{phase="{phase}"}} {hist.count}')
+
+        for name in sorted({name for name, _ in self._counters}):
+            lines += [f"# TYPE {name} counter"]
+            for (counter_name, phase), value in sorted(self._counters.items()):
+                if counter_name == name:
+                    lines.append(f'{name}{{phase="{phase}"}} {value}')
+
+        # Share of prompt tokens read from the cache, from the usage the API reported
+        ratios = []
+        for phase in sorted({phase for _, phase in self._counters}):
+            prompt = sum(self._counters.get((f"dnd_{key}_total", phase), 0) for key in PROMPT_KEYS)
+            if prompt:
+                cached = self._counters.get(("dnd_cache_read_input_tokens_total", phase), 0)
+                ratios.append(f'dnd_prompt_cache_read_ratio{{phase="{phase}"}} {cached / prompt:.4f}')
+        if ratios:
+            lines += [
+                "# HELP dnd_prompt_cache_read_ratio Share of prompt tokens read from the prompt cache",
+                "# TYPE dnd_prompt_cache_read_ratio gauge",
+                *ratios,
+            ]
+
+        lines += ["# TYPE dnd_active_sessions gauge", f"dnd_active_sessions {len(self.sessions)}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
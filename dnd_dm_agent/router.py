@@ -0,0 +1,292 @@
+"""Session-affinity router for running the server as several worker processes."""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, Query, Request, Response, WebSocket
+from starlette.websockets import WebSocketState
+from websockets.asyncio.client import ClientConnection, connect
+
+from .logging_config import logger
+
+# Seconds between load reports polled from each worker
+LOAD_POLL_INTERVAL = 2.0
+
+# Seconds a session's worker pin is kept after its last socket closed
+PIN_TTL = 600.0
+
+# Seconds a placement waits for the worker's load report to confirm it
+PENDING_TTL = 30.0
+
+# Headers that describe one hop and are not forwarded
+_HOP_HEADERS = frozenset(
+    ("connection", "keep-alive", "transfer-encoding", "upgrade", "host", "content-length", "content-encoding")
+)
+
+
+# REST paths about one campaign instance, served by the worker hosting it
+_CAMPAIGN_PATH = re.compile(r"^api/(?:campaigns|character)/([^/]+)/")
+
+
+def _rendezvous(key: str, url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{key}|{url}".encode(), digest_size=8).digest(), "big")
+
+
+class WorkerState:
+    """Last known load of one worker, plus the sessions placed on it since that report."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.reported_sessions = 0
+        self.reported_campaigns: set[str] = set()
+        # session_id -> (campaign, time placed) of placements no load report has confirmed yet
+        self.pending: dict[str, tuple[str, float]] = {}
+        self.pid: int | None = None
+
+    @property
+    def sessions(self) -> int:
+        return self.reported_sessions + len(self.pending)
+
+    @property
+    def campaigns(self) -> set[str]:
+        return self.reported_campaigns | {campaign for campaign, _ in self.pending.values() if campaign}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "pid": self.pid,
+            "sessions": self.sessions,
+            "pending_sessions": len(self.pending),
+            "campaigns": sorted(self.campaigns),
+        }
+
+
+class SessionRouter:
+    """Chooses the worker for each session and keeps it pinned there.
+
+    A campaign instance has a single writer: its event log numbers events and
+    its file claims order writes within one process, so every session of a
+    campaign, and every REST request about it, goes to the one worker hosting
+    it. A placement counts towards its worker's load and campaigns until a load
+    report lists the session (or ``PENDING_TTL`` passes), so sessions picked
+    between two reports are not spread over workers. Only if the hosting
+    worker goes down can a campaign move (its old worker no longer serves it).
+
+    Args:
+        worker_urls: Base URLs of the workers, e.g. ``http://127.0.0.1:8001``
+        pin_ttl: Seconds a pin outlives its session's last open socket
+    """
+
+    def __init__(self, worker_urls: list[str], pin_ttl: float = PIN_TTL):
+        self.workers = {url: WorkerState(url) for url in worker_urls}
+        self.pin_ttl = pin_ttl
+        # session_id -> [worker url, open sockets, time the last socket closed]
+        self._pins: dict[str, list[Any]] = {}
+
+    def _candidates(self) -> list[WorkerState]:
+        return [w for w in self.workers.values() if w.healthy] or list(self.workers.values())
+
+    def pick(self, session_id: str, campaign: str = "") -> str:
+        """Worker URL for a session's socket; call ``release`` when the socket closes."""
+        self._evict()
+        pin = self._pins.get(session_id)
+        if pin is None or not self.workers[pin[0]].healthy:
+            candidates = self._candidates()
+            hosts = [w for w in candidates if campaign and campaign in w.campaigns]
+            worker = min(hosts or candidates, key=lambda w: (w.sessions, -_rendezvous(session_id, w.url)))
+            # Counted right away so a burst of new sessions spreads (and a campaign's
+            # sessions gather) before the next load report
+            worker.pending[session_id] = (campaign, time.monotonic())
+            pin = self._pins[session_id] = [worker.url, 0, 0.0]
+            logger.info("Session %s pinned to %s", session_id, worker.url, extra={"worker": worker.url})
+        pin[1] += 1
+        return pin[0]
+
+    def release(self, session_id: str) -> None:
+        pin = self._pins.get(session_id)
+        if pin:
+            pin[1] -= 1
+            pin[2] = time.monotonic()
+
+    def least_loaded(self) -> str:
+        return min(self._candidates(), key=lambda w: w.sessions).url
+
+    def campaign_worker(self, campaign: str) -> str:
+        """Worker URL for a request about a campaign instance: its host, else the least-loaded worker."""
+        hosts = [w for w in self._candidates() if campaign in w.campaigns]
+        return min(hosts, key=lambda w: w.sessions).url if hosts else self.least_loaded()
+
+    def report(self, url: str, load: dict[str, Any] | None) -> None:
+        """Record a worker's load report; None marks it unreachable."""
+        worker = self.workers[url]
+        if load is None:
+            if worker.healthy:
+                logger.warning("Worker %s is unreachable", url, extra={"worker": url})
+            worker.healthy = False
+            return
+        worker.healthy = True
+        worker.pid = load.get("pid")
+        worker.reported_sessions = load.get("sessions", 0)
+        worker.reported_campaigns = set(load.get("campaigns", []))
+        # Placements the report includes are now counted by it; unconfirmed ones expire
+        confirmed = set(load.get("session_ids", []))
+        cutoff = time.monotonic() - PENDING_TTL
+        worker.pending = {
+            session_id: placed
+            for session_id, placed in worker.pending.items()
+            if session_id not in confirmed and placed[1] >= cutoff
+        }
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.pin_ttl
+        stale = [s for s, (_, open_sockets, closed) in self._pins.items() if not open_sockets and closed < cutoff]
+        for session_id in stale:
+            del self._pins[session_id]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": {url: worker.stats() for url, worker in self.workers.items()},
+            "pinned_sessions": len(self._pins),
+        }
+
+
+async def _pump(websocket: WebSocket, upstream: ClientConnection) -> None:
+    """Relay frames both ways until either side closes."""
+
+    async def to_browser():
+        async for message in upstream:
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_text(message)
+
+    async def to_worker():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            await upstream.send(message["text"] if message.get("text") is not None else message["bytes"])
+
+    tasks = [asyncio.create_task(to_browser()), asyncio.create_task(to_worker())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+
+
+def create_app(worker_urls: list[str], poll_interval: float = LOAD_POLL_INTERVAL) -> FastAPI:
+    """The router ASGI app in front of the given workers."""
+    router = SessionRouter(worker_urls)
+    http = httpx.AsyncClient(timeout=30.0)
+
+    async def poll_load():
+        while True:
+            for url in worker_urls:
+                try:
+                    response = await http.get(f"{url}/api/load", timeout=2.0)
+                    response.raise_for_status()
+                    router.report(url, response.json())
+                except httpx.HTTPError:
+                    router.report(url, None)
+            await asyncio.sleep(poll_interval)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        poller = asyncio.create_task(poll_load())
+        yield
+        poller.cancel()
+        await asyncio.wait([poller])
+        await http.aclose()
+
+    app = FastAPI(title="D&D DM Agent router", lifespan=lifespan)
+    app.state.router = router
+
+    @app.get("/router/workers")
+    async def worker_stats():
+        return router.stats()
+
+    @app.websocket("/ws/{session_id}")
+    async def proxy_websocket(websocket: WebSocket, session_id: str, campaign: str = Query("")):
+        url = router.pick(session_id, campaign)
+        target = f"ws{url.removeprefix('http')}{websocket.url.path}"
+        if websocket.url.query:
+            target += f"?{websocket.url.query}"
+        await websocket.accept()
+        try:
+            async with connect(target, compression=None, max_size=None) as upstream:
+                await _pump(websocket, upstream)
+        except OSError as e:
+            logger.warning("Session %s: worker %s unavailable: %s", session_id, url, e, extra={"worker": url})
+            router.report(url, None)
+        finally:
+            router.release(session_id)
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.close()
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"])
+    async def proxy_http(request: Request, path: str):
+        campaign = _CAMPAIGN_PATH.match(path)
+        url = router.campaign_worker(campaign.group(1)) if campaign else router.least_loaded()
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+        try:
+            upstream = await http.request(
+                request.method,
+                f"{url}/{path}",
+                params=request.query_params,
+                headers=headers,
+                content=await request.body(),
+            )
+        except httpx.HTTPError as e:
+            logger.warning("Worker %s failed %s /%s: %s", url, request.method, path, e, extra={"worker": url})
+            router.report(url, None)
+            return Response(status_code=502)
+        return Response(
+            content=upstream.content,
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k.lower() not in _HOP_HEADERS},
+        )
+
+    return app
+
+
+def main():
+    """Run N server workers behind the session-affinity router."""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the D&D DM Agent server as several worker processes")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("DND_WORKERS", "2")))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="Public port; workers use the ones after it")
+    args = parser.parse_args()
+
+    ports = [args.port + i for i in range(1, args.workers + 1)]
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "dnd_dm_agent.server:app", "--host", "127.0.0.1", "--port", str(port)]
+        )
+        for port in ports
+    ]
+    logger.info("Started %d workers on ports %d-%d", args.workers, ports[0], ports[-1])
+    try:
+        uvicorn.run(create_app([f"http://127.0.0.1:{port}" for port in ports]), host=args.host, port=args.port)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+
+
+if __name__ == "__main__":
+    main()
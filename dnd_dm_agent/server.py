@@ -1,20 +1,74 @@
 """FastAPI WebSocket server exposing the D&D DM Agent."""
 
+import asyncio
 import json
+import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any, Awaitable, Callable
 
-from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from starlette.websockets import WebSocketState
+
+from claude_agent_sdk import ClaudeSDKClient, AssistantMessage, TextBlock, ToolUseBlock, ToolResultBlock, UserMessage
+
+from .bookkeeping import BookkeepingWorker, Exchange, agent_hooks, copy_on_write_hooks
+from .campaign_index import CampaignIndex
+from .character_store import CharacterPatcher, character_store
+from .claude_agent import get_options, process_message, text_delta, tool_event
+from .client_pool import ClientPool
+from .fake_client import FakeAgentClient, agent_client
+from .live_sessions import LiveSession, SessionRegistry
+from .logging_config import bind_log_context, logger
+from .metrics import metrics
+from .tool_results import parse_result
+from .tools.campaign_instance_tools import NAME_PATTERN, create_campaign_instances
+from .tools.campaign_log_tools import event_logs
+from .ws_writer import EventWriter, negotiate_encoding
 
-from claude_agent_sdk import ClaudeSDKClient, AssistantMessage, TextBlock, ToolUseBlock, ToolResultBlock
+PROJECT_ROOT = Path(__file__).parent.parent
 
-from .claude_agent import get_options, process_message, post_turn_bookkeeping
-from .logging_config import logger
+# Number of pre-connected agent clients kept ready for new WebSocket sessions (0 disables)
+CLIENT_POOL_SIZE = int(os.environ.get("DND_CLIENT_POOL_SIZE", "2"))
+
+client_pool = ClientPool(
+    factory=lambda: agent_client(
+        get_options(permission_mode="bypassPermissions", hooks=agent_hooks(), stream_text=True)
+    ),
+    size=CLIENT_POOL_SIZE,
+)
+
+
+campaign_index = CampaignIndex(PROJECT_ROOT / "campaigns")
+
+# Outbound event writer of each open WebSocket session
+connections: dict[str, EventWriter] = {}
+
+# Agent sessions by session id, kept through reconnects
+session_registry = SessionRegistry()
 
-PROJECT_ROOT = Path(__file__).parent.parent
 
-app = FastAPI(title="D&D DM Agent API")
+async def _connect_bookkeeping_client() -> ClaudeSDKClient | FakeAgentClient:
+    # No file-claim hooks here: the bookkeeper would otherwise wait on its own claims
+    client = agent_client(get_options(permission_mode="bypassPermissions", hooks=copy_on_write_hooks()))
+    await client.connect()
+    return client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    client_pool.start()
+    yield
+    await session_registry.close()
+    await client_pool.close()
+    campaign_index.close()
+    event_logs.close()
+
+
+app = FastAPI(title="D&D DM Agent API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,30 +89,112 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/pool")
+async def pool_stats():
+    return client_pool.stats()
+
+
+def _not_modified(response: Response, etag: str, if_none_match: str | None) -> Response | None:
+    """Attach the ETag; returns a 304 when the client's copy (If-None-Match) is current.
+
+    Browsers revalidate with If-None-Match, so unchanged resources cost a 304 and no body.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+@app.get("/api/connections")
+async def connection_stats():
+    return {"connections": {session_id: writer.stats() for session_id, writer in connections.items()}}
+
+
+@app.get("/api/load")
+async def worker_load():
+    """Load report polled by the multi-worker router (see router.py)."""
+    return {
+        "pid": os.getpid(),
+        "sessions": len(session_registry),
+        "session_ids": session_registry.session_ids(),
+        "campaigns": session_registry.campaigns(),
+    }
+
+
+@app.get("/api/sessions")
+async def session_stats():
+    return session_registry.stats()
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/campaigns")
-async def list_campaigns():
-    campaigns_dir = PROJECT_ROOT / "campaigns"
-    if not campaigns_dir.exists():
-        return {"instances": []}
-    instances = [d.name for d in campaigns_dir.iterdir() if d.is_dir()]
-    return {"instances": sorted(instances)}
+async def list_campaigns(response: Response, if_none_match: str | None = Header(default=None)):
+    listing = await campaign_index.instances()
+    not_modified = _not_modified(response, listing.etag, if_none_match)
+    if not_modified is not None:
+        return not_modified
+    return {"instances": listing.names}
+
+
+class CampaignBatch(BaseModel):
+    """Instances to create from one template."""
+
+    template: str = Field(pattern=NAME_PATTERN)
+    instances: list[Annotated[str, Field(pattern=NAME_PATTERN)]]
+
+
+@app.post("/api/campaigns")
+async def create_campaigns(batch: CampaignBatch):
+    """Create many campaign instances at once, e.g. one per table at an event."""
+    result = await campaign_index.run(create_campaign_instances, batch.template, batch.instances)
+    if "created" not in result:
+        raise HTTPException(status_code=404, detail=result["error_message"])
+    return result
 
 
 @app.get("/api/campaigns/{campaign_instance}/characters")
-async def list_characters(campaign_instance: str):
-    chars_dir = PROJECT_ROOT / "campaigns" / campaign_instance / "characters"
-    if not chars_dir.exists():
-        return {"characters": []}
-    characters = [f.stem for f in chars_dir.glob("*.md")]
-    return {"characters": sorted(characters)}
+async def list_characters(
+    campaign_instance: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+):
+    listing = await campaign_index.characters(campaign_instance)
+    not_modified = _not_modified(response, listing.etag, if_none_match)
+    if not_modified is not None:
+        return not_modified
+    return {"characters": listing.names}
+
+
+@app.get("/api/campaigns/{campaign_instance}/log", response_class=PlainTextResponse)
+async def campaign_log(campaign_instance: str, last: int | None = Query(default=None, ge=1)):
+    """Markdown view of a campaign instance's event log, rendered on demand."""
+    log = event_logs.get(campaign_instance)
+    if log is None:
+        raise HTTPException(status_code=404, detail=f"Campaign instance {campaign_instance} not found")
+    title = campaign_instance.replace("_", " ").title()
+    markdown = await campaign_index.run(log.render_markdown, title, last)
+    return PlainTextResponse(markdown, media_type="text/markdown")
 
 
 @app.get("/api/character/{campaign_instance}/{character_name}")
-async def get_character(campaign_instance: str, character_name: str):
-    path = PROJECT_ROOT / "campaigns" / campaign_instance / "characters" / f"{character_name}.md"
-    if not path.exists():
+async def get_character(
+    campaign_instance: str,
+    character_name: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+):
+    record = await campaign_index.run(character_store.get, campaign_instance, character_name)
+    if record is None:
         raise HTTPException(status_code=404, detail=f"Character {character_name} not found")
-    return {"markdown": path.read_text(), "name": character_name}
+    not_modified = _not_modified(response, record["etag"], if_none_match)
+    if not_modified is not None:
+        return not_modified
+    return {"markdown": record["markdown"], "name": character_name, "sheet": record["fields"]}
 
 
 # =============================================================================
@@ -70,7 +206,16 @@ def _make_tool_display_name(tool_name: str) -> str:
     """Convert internal tool name to user-friendly display string."""
     names = {
         "mcp__dnd__roll_dice": "rolling dice",
+        "mcp__dnd__roll_dice_batch": "rolling dice",
+        "mcp__dnd__dice_odds": "weighing the odds",
         "mcp__dnd__create_campaign_instance": "creating campaign",
+        "mcp__dnd__get_character_stats": "checking the character sheet",
+        "mcp__dnd__update_character_stats": "updating the character sheet",
+        "mcp__dnd__resolve_attack": "resolving the attack",
+        "mcp__dnd__search_knowledge": "searching knowledge",
+        "mcp__dnd__get_campaign_section": "consulting the campaign",
+        "mcp__dnd__log_campaign_event": "recording the event",
+        "mcp__dnd__get_campaign_events": "recalling past events",
         "Read": "reading files",
         "Write": "writing files",
         "Edit": "updating files",
@@ -81,110 +226,256 @@ def _make_tool_display_name(tool_name: str) -> str:
     return names.get(tool_name, tool_name.lower().replace("_", " "))
 
 
+def _writes_sheet(block: ToolUseBlock, patcher: CharacterPatcher, character: str) -> bool:
+    """Whether a tool use changes the active character's sheet."""
+    if block.name in ("Write", "Edit"):
+        return patcher.is_sheet(block.input.get("file_path", ""))
+    if block.name == "mcp__dnd__resolve_attack":
+        return block.input.get("target") == character
+    return block.name == "mcp__dnd__update_character_stats" and block.input.get("character_name") == character
+
+
+async def _open_session(session_id: str, campaign: str, character: str) -> LiveSession:
+    """Connect a session's agent client and start its turn loop."""
+    client = await client_pool.acquire(campaign=campaign, character=character)
+    live = LiveSession(session_id, campaign, character, client)
+
+    # Pushes only the sheet fields that changed, so the UI doesn't re-fetch the sheet
+    patcher = CharacterPatcher(character_store, campaign, character) if campaign and character else None
+    if patcher:
+        await campaign_index.run(patcher.snapshot)
+
+    async def push_character_patch():
+        if patcher is None:
+            return
+        patch = await campaign_index.run(patcher.refresh)
+        if patch:
+            await live.send(patch)
+
+    async def on_bookkeeping_complete(files: set[str]):
+        try:
+            if patcher and any(patcher.is_sheet(f) for f in files):
+                await push_character_patch()
+            await live.send({"type": "bookkeeping_complete", "files": sorted(files)})
+        except Exception as e:
+            logger.warning("[%s] Could not push bookkeeping results: %s", session_id, e)
+
+    bookkeeper = BookkeepingWorker(
+        connect=_connect_bookkeeping_client,
+        disconnect=lambda c: c.disconnect(),
+        campaign=campaign,
+        character=character,
+        on_complete=on_bookkeeping_complete,
+        session_id=session_id,
+    )
+    metrics.open_session(session_id)
+    live.task = asyncio.create_task(_run_turns(live, bookkeeper, patcher, push_character_patch))
+
+    async def close():
+        await bookkeeper.close()
+        await client_pool.release(client)
+        metrics.close_session(session_id)
+        logger.info("[%s] Live session closed", session_id)
+
+    live.on_close(close)
+    return live
+
+
+async def _run_turns(
+    live: LiveSession,
+    bookkeeper: BookkeepingWorker,
+    patcher: CharacterPatcher | None,
+    push_character_patch: Callable[[], Awaitable[None]],
+) -> None:
+    """Run a turn for each (merged) input until the session is closed or a turn fails."""
+    session_id, character = live.session_id, live.character
+    turn_number = 0
+    try:
+        while (content := await live.inputs.get()) is not None:
+            turn_number += 1
+            bind_log_context(turn=turn_number)
+            # Stream agent response
+            exchange = Exchange(player_input=content)
+            sheet_writes: set[str] = set()
+            # tool_use_id -> (event type, tool) of the typed tool calls awaiting their result
+            typed_events: dict[str, tuple[str, str]] = {}
+            turn = metrics.turn("narration", session_id)
+            live.in_turn = True
+            await live.client.query(content)
+
+            async for message in live.client.receive_response():
+                # Apply standard logging
+                process_message(message)
+                exchange.observe(message)
+                turn.observe(message)
+
+                # Word-by-word narration; the complete text_chunk that follows replaces these deltas
+                delta = text_delta(message)
+                if delta:
+                    await live.send({"type": "text_delta", "content": delta})
+                    continue
+
+                if isinstance(message, UserMessage) and isinstance(message.content, list):
+                    results = [b for b in message.content if isinstance(b, ToolResultBlock)]
+                    # Typed results of our tools go to the browser as their own events, as returned
+                    for block in results:
+                        event = typed_events.pop(block.tool_use_id, None)
+                        if event is None:
+                            continue
+                        result = parse_result(block.content)
+                        if result is not None:
+                            await live.send({"type": event[0], "tool": event[1], "result": result})
+                    # A finished write to the active character's sheet pushes a patch right away
+                    finished = {b.tool_use_id for b in results}
+                    if finished & sheet_writes:
+                        sheet_writes -= finished
+                        await push_character_patch()
+
+                if not isinstance(message, AssistantMessage):
+                    continue
+
+                for block in message.content:
+                    if isinstance(block, TextBlock) and block.text:
+                        await live.send({
+                            "type": "text_chunk",
+                            "content": block.text,
+                        })
+
+                    elif isinstance(block, ToolUseBlock):
+                        # Emit tool_use event for UI indicator
+                        await live.send({
+                            "type": "tool_use",
+                            "tool_name": block.name,
+                            "tool_input": block.input,
+                            "display_name": _make_tool_display_name(block.name),
+                        })
+                        event = tool_event(block.name)
+                        if event is not None:
+                            typed_events[block.id] = (event, block.name.removeprefix("mcp__dnd__"))
+                        if patcher and _writes_sheet(block, patcher, character):
+                            sheet_writes.add(block.id)
+                        # If agent is reading a character file, open the sheet in the UI
+                        if block.name == "Read":
+                            file_path = block.input.get("file_path", "")
+                            if "/characters/" in str(file_path) and str(file_path).endswith(".md"):
+                                await live.send({"type": "open_character_sheet"})
+
+            # Post-turn bookkeeping (character sheet / campaign state) runs in the
+            # background, and only for turns that changed state; the next turn
+            # only waits if it touches the same files.
+            live.in_turn = False
+            metrics.record(turn)
+            bookkeeper.submit(exchange)
+
+            # Catches sheet changes made any other way during the turn
+            await push_character_patch()
+            await live.send({"type": "turn_complete"})
+            logger.info("[%s] Turn complete", session_id)
+
+    except Exception as e:
+        logger.error("WebSocket error [%s]: %s", session_id, e, exc_info=True)
+        await live.send({"type": "error", "error": str(e)})
+
+
+async def _read_inputs(websocket: WebSocket, live: LiveSession, writer: EventWriter) -> None:
+    """Feed a socket's messages into its session while turns run.
+
+    Mid-turn inputs are merged into one follow-up query, and an interrupt
+    reaches the running turn.
+    """
+    session_id = live.session_id
+    try:
+        async for raw in websocket.iter_text():
+            try:
+                msg = json.loads(raw)
+            except json.JSONDecodeError:
+                await writer.send({"type": "error", "error": "invalid_json"})
+                continue
+
+            if msg.get("type") == "interrupt":
+                if live.in_turn:
+                    logger.info("[%s] Interrupt requested", session_id)
+                    try:
+                        await live.client.interrupt()
+                    except Exception as e:
+                        logger.warning("[%s] Interrupt failed: %s", session_id, e)
+                continue
+
+            if msg.get("type") != "user_input":
+                continue
+
+            content = msg.get("content", "").strip()
+            if content:
+                logger.info("[%s] User input (%d chars)", session_id, len(content))
+                logger.debug("[%s] User input: %s", session_id, content)
+                live.inputs.put(content)
+    except WebSocketDisconnect:
+        logger.info("WebSocket disconnected: session=%s", session_id)
+    except Exception as e:
+        logger.error("WebSocket read error [%s]: %s", session_id, e, exc_info=True)
+
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     session_id: str,
     campaign: str = Query(""),
     character: str = Query(""),
+    encoding: str = Query("json"),
 ):
     await websocket.accept()
-    logger.info(f"WebSocket connected: session={session_id} campaign={campaign!r} character={character!r}")
-
-    async with ClaudeSDKClient(options=get_options(
-        permission_mode="bypassPermissions",
-        campaign=campaign,
-        character=character,
-    )) as client:
+    # Tags this handler's records and those of the tasks it starts (turn loop, bookkeeping)
+    bind_log_context(session=session_id)
+    logger.info(
+        "WebSocket connected: session=%s campaign=%r character=%r",
+        session_id,
+        campaign,
+        character,
+        extra={"campaign": campaign, "character": character},
+    )
+
+    # A reconnect within the grace period picks up the live session, conversation included
+    live = await session_registry.take(session_id, campaign, character)
+    resumed = live is not None
+    if live is None:
+        live = await _open_session(session_id, campaign, character)
+        session_registry.add(live)
+
+    # All outbound events go through the writer, so a slow browser never stalls the agent loop
+    writer = EventWriter(websocket, encoding=negotiate_encoding(encoding))
+    writer.start()
+    connections[session_id] = writer
+
+    # The newest socket of a session takes over from any older one still open
+    previous = live.writer
+    if previous is not None:
+        await live.detach(previous)
         try:
-            async for raw in websocket.iter_text():
-                try:
-                    msg = json.loads(raw)
-                except json.JSONDecodeError:
-                    await websocket.send_json({"type": "error", "error": "invalid_json"})
-                    continue
-
-                if msg.get("type") != "user_input":
-                    continue
-
-                content = msg.get("content", "").strip()
-                if not content:
-                    continue
-
-                logger.info(f"[{session_id}] User input: {content[:100]}")
-
-                # Stream agent response
-                await client.query(content)
-
-                async for message in client.receive_response():
-                    # Apply standard logging
-                    process_message(message)
-
-                    if not isinstance(message, AssistantMessage):
-                        continue
-
-                    for block in message.content:
-                        if isinstance(block, TextBlock) and block.text:
-                            await websocket.send_json({
-                                "type": "text_chunk",
-                                "content": block.text,
-                            })
-
-                        elif isinstance(block, ToolUseBlock):
-                            # Emit tool_use event for UI indicator
-                            await websocket.send_json({
-                                "type": "tool_use",
-                                "tool_name": block.name,
-                                "tool_input": block.input,
-                                "display_name": _make_tool_display_name(block.name),
-                            })
-                            # If agent is reading a character file, open the sheet in the UI
-                            if block.name == "Read":
-                                file_path = block.input.get("file_path", "")
-                                if "/characters/" in str(file_path) and str(file_path).endswith(".md"):
-                                    await websocket.send_json({"type": "open_character_sheet"})
-
-                        elif isinstance(block, ToolResultBlock):
-                            # Parse dice roll results for special display
-                            if hasattr(block, "content") and block.content:
-                                result_text = (
-                                    block.content[0].text
-                                    if hasattr(block.content[0], "text")
-                                    else str(block.content)
-                                )
-                                try:
-                                    result_data = json.loads(result_text.replace("'", '"'))
-                                except (json.JSONDecodeError, AttributeError):
-                                    result_data = {"raw": result_text}
-
-                                await websocket.send_json({
-                                    "type": "tool_result",
-                                    "result": result_data,
-                                })
-
-                # Post-turn bookkeeping: update character sheet / campaign state silently.
-                # Tool indicators are forwarded so the UI shows brief "updating files..." feedback.
-                # Text output from the agent is suppressed (bookkeeping should not narrate).
-                async for message in post_turn_bookkeeping(client):
-                    if not isinstance(message, AssistantMessage):
-                        continue
-                    for block in message.content:
-                        if isinstance(block, ToolUseBlock):
-                            await websocket.send_json({
-                                "type": "tool_use",
-                                "tool_name": block.name,
-                                "tool_input": block.input,
-                                "display_name": _make_tool_display_name(block.name),
-                            })
-
-                await websocket.send_json({"type": "turn_complete"})
-                logger.info(f"[{session_id}] Turn complete")
-
-        except WebSocketDisconnect:
-            logger.info(f"WebSocket disconnected: session={session_id}")
+            await previous.websocket.close()
         except Exception as e:
-            logger.error(f"WebSocket error [{session_id}]: {e}", exc_info=True)
-            try:
-                await websocket.send_json({"type": "error", "error": str(e)})
-            except Exception:
-                pass
+            logger.debug("[%s] Previous socket already closed: %s", session_id, e)
+    if resumed:
+        await writer.send({"type": "session_resumed", "replayed": live.buffered, "turn_in_progress": live.in_turn})
+    await live.attach(writer)
+
+    reader = asyncio.create_task(_read_inputs(websocket, live, writer))
+    try:
+        await asyncio.wait([reader, live.task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Shielded, so the session is parked (or closed) even if this handler is cancelled
+        await asyncio.shield(asyncio.ensure_future(_end_connection(websocket, live, writer, reader)))
+
+
+async def _end_connection(websocket: WebSocket, live: LiveSession, writer: EventWriter, reader: asyncio.Task) -> None:
+    """Detach a closed socket from its session, then park the session or close it if its turn loop ended."""
+    reader.cancel()
+    await asyncio.wait([reader])
+    attached = await live.detach(writer)
+    if connections.get(live.session_id) is writer:
+        del connections[live.session_id]
+    if live.ended:
+        await session_registry.discard(live)
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
+    elif attached:
+        await session_registry.park(live)
@@ -0,0 +1,63 @@
+"""Per-session queue of player inputs, merged while a turn is in flight."""
+
+import asyncio
+
+from .logging_config import logger
+
+# Inputs kept while a turn is in flight; older ones are dropped beyond this
+MAX_PENDING_INPUTS = 20
+
+# Joins inputs that arrived during the same turn into one query
+MERGE_SEPARATOR = "\n\n"
+
+
+class InputQueue:
+    """Player inputs of one session, handed to the turn loop as merged queries.
+
+    Args:
+        max_pending: Inputs kept between two turns; the oldest are dropped beyond this
+    """
+
+    def __init__(self, max_pending: int = MAX_PENDING_INPUTS):
+        self.max_pending = max_pending
+        self._pending: list[str] = []
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.received = 0
+        self.merged = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def put(self, text: str) -> None:
+        """Queue an input; it joins any inputs not yet taken by the turn loop."""
+        if self._closed:
+            return
+        self.received += 1
+        if self._pending:
+            self.merged += 1
+        self._pending.append(text)
+        if len(self._pending) > self.max_pending:
+            self._pending.pop(0)
+            self.dropped += 1
+            logger.warning("Input queue full, dropped the oldest of %d pending inputs", self.max_pending)
+        self._ready.set()
+
+    async def get(self) -> str | None:
+        """Wait for input and return everything queued as one query; None once closed."""
+        while not self._pending:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        text = MERGE_SEPARATOR.join(self._pending)
+        self._pending.clear()
+        return text
+
+    def close(self) -> None:
+        """Stop accepting input and discard what nobody is left to answer."""
+        self._closed = True
+        self._pending.clear()
+        self._ready.set()
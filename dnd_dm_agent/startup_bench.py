@@ -0,0 +1,115 @@
+"""Cold-start benchmark for the CLI, REPL and server entry points."""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+# Entry modules whose import time is tracked
+ENTRY_MODULES = ("dnd_dm_agent.claude_agent", "dnd_dm_agent.interactive", "dnd_dm_agent.server")
+
+# Dependencies a bare import of the CLI/REPL modules should not load
+HEAVY_MODULES = ("claude_agent_sdk", "mcp", "numpy", "sqlite3")
+
+_IMPORT_SCRIPT = """
+import json, sys, threading, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+    "threads": threading.active_count(),
+}}))
+"""
+
+_FIRST_QUERY_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+from dnd_dm_agent.claude_agent import get_options
+from dnd_dm_agent.fake_client import FakeAgentClient
+
+async def first_response():
+    client = FakeAgentClient(get_options(), delay=0)
+    await client.connect()
+    await client.query("I open the tavern door")
+    async for _ in client.receive_response():
+        return
+
+asyncio.run(first_response())
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def _run(script: str) -> dict[str, Any]:
+    env = {**os.environ, "DND_FAKE_AGENT": "1"}
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module: str, runs: int = 5) -> dict[str, Any]:
+    """Median import time of ``module`` in fresh interpreters, and the heavy modules it loaded."""
+    results = [_run(_IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)) for _ in range(runs)]
+    return {
+        "seconds": statistics.median(r["seconds"] for r in results),
+        "loaded": results[-1]["loaded"],
+        "threads": results[-1]["threads"],
+    }
+
+
+def measure_first_query(runs: int = 5) -> float:
+    """Median seconds from interpreter start to the first response on a fake client."""
+    return statistics.median(_run(_FIRST_QUERY_SCRIPT)["seconds"] for _ in range(runs))
+
+
+def run_benchmark(runs: int = 5) -> dict[str, Any]:
+    return {
+        "imports": {module: measure_import(module, runs) for module in ENTRY_MODULES},
+        "first_query_seconds": measure_first_query(runs),
+    }
+
+
+def regressions(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Timings more than ``tolerance`` (a fraction) slower than the baseline."""
+    pairs = [("first query", result["first_query_seconds"], baseline.get("first_query_seconds"))]
+    for module, measured in result["imports"].items():
+        previous = baseline.get("imports", {}).get(module)
+        pairs.append((f"import {module}", measured["seconds"], previous and previous["seconds"]))
+    return [
+        f"{name}: {seconds * 1000:.0f} ms (baseline {before * 1000:.0f} ms)"
+        for name, seconds, before in pairs
+        if before and seconds > before * (1 + tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the D&D DM Agent entry points")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with results saved earlier; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown as a fraction")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.runs)
+    for module, measured in result["imports"].items():
+        loaded = ", ".join(measured["loaded"]) or "none"
+        print(f"import {module:<28} {measured['seconds'] * 1000:7.1f} ms   heavy modules loaded: {loaded}")
+    print(f"first query (fake client)           {result['first_query_seconds'] * 1000:7.1f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = regressions(result, json.load(f), args.tolerance)
+        for line in slower:
+            print(f"REGRESSION {line}")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
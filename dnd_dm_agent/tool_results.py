@@ -0,0 +1,223 @@
+"""Typed results of the custom MCP tools."""
+
+import json
+from typing import Any
+
+
+def _result_schema(properties: dict[str, Any], required: tuple[str, ...] = ()) -> dict[str, Any]:
+    """Schema of a ``{"status": ...}`` result whose ``required`` fields are present on success."""
+    return {
+        "type": "object",
+        "properties": {
+            "status": {"enum": ["success", "error"]},
+            "error_message": {"type": "string"},
+            **properties,
+        },
+        "required": ["status"],
+        "if": {"properties": {"status": {"const": "success"}}},
+        "then": {"required": list(required)},
+        "else": {"required": ["error_message"]},
+    }
+
+
+_INTS = {"type": "array", "items": {"type": "integer"}}
+
+_ROLL = {
+    "notation": {"type": "string"},
+    "individual_rolls": _INTS,
+    "dropped_rolls": _INTS,
+    "total": {"type": "integer"},
+    "modifier": {"type": "integer"},
+}
+
+DICE_ROLL_SCHEMA = _result_schema(_ROLL, ("notation", "individual_rolls", "total"))
+
+DICE_BATCH_SCHEMA = _result_schema(
+    {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {**_ROLL, "success": {"type": "boolean"}},
+                "required": ["notation", "individual_rolls", "total"],
+            },
+        },
+        "grand_total": {"type": "integer"},
+        "target": {"type": "integer"},
+        "successes": {"type": "integer"},
+    },
+    ("results", "grand_total"),
+)
+
+DICE_ODDS_SCHEMA = _result_schema(
+    {
+        "notation": {"type": "string"},
+        "min": {"type": "integer"},
+        "max": {"type": "integer"},
+        "mean": {"type": "number"},
+        "std_dev": {"type": "number"},
+        "percentiles": {"type": "object", "additionalProperties": {"type": "integer"}},
+        "dc": {"type": "integer"},
+        "p_success": {"type": "number"},
+    },
+    ("notation", "min", "max", "mean"),
+)
+
+CAMPAIGN_CREATED_SCHEMA = _result_schema(
+    {
+        "message": {"type": "string"},
+        "instance_path": {"type": "string"},
+        "files_copied": {"type": "string"},
+    },
+    ("instance_path",),
+)
+
+CHARACTER_STATS_SCHEMA = _result_schema(
+    {
+        "name": {"type": "string"},
+        "class_level": {"type": "string"},
+        "race": {"type": "string"},
+        "xp": {"type": "integer"},
+        "ac": {"type": "integer"},
+        "hp_current": {"type": "integer"},
+        "hp_max": {"type": "integer"},
+        "speed": {"type": "integer"},
+        "conditions": {"type": "array", "items": {"type": "string"}},
+        "spell_slots": {"type": "object"},
+        "gold": {"type": "integer"},
+        "inventory": {"type": "array", "items": {"type": "string"}},
+        "attacks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "attack_bonus": {"type": "integer"},
+                    "damage": {"type": "string"},
+                    "damage_type": {"type": "string"},
+                },
+            },
+        },
+    },
+    ("name", "hp_current", "hp_max", "ac"),
+)
+
+ATTACK_RESULT_SCHEMA = _result_schema(
+    {
+        "attacker": {"type": "string"},
+        "target": {"type": "string"},
+        "weapon": {"type": ["string", "null"]},
+        "attack": DICE_ROLL_SCHEMA,
+        "natural": {"type": "integer", "minimum": 1, "maximum": 20},
+        "target_ac": {"type": "integer"},
+        "hit": {"type": "boolean"},
+        "critical": {"type": "boolean"},
+        "damage": {"anyOf": [DICE_ROLL_SCHEMA, {"type": "null"}]},
+        "damage_type": {"type": "string"},
+        "target_hp": {
+            "anyOf": [
+                {
+                    "type": "object",
+                    "properties": {
+                        "before": {"type": "integer"},
+                        "after": {"type": "integer"},
+                        "max": {"type": ["integer", "null"]},
+                    },
+                    "required": ["before", "after"],
+                },
+                {"type": "null"},
+            ]
+        },
+    },
+    ("attacker", "target", "attack", "natural", "target_ac", "hit", "critical"),
+)
+
+KNOWLEDGE_SCHEMA = _result_schema(
+    {"query": {"type": "string"}, "results": {"type": "array", "items": {"type": "object"}}},
+    ("results",),
+)
+
+CAMPAIGN_SECTION_SCHEMA = _result_schema(
+    {
+        "campaign": {"type": "string"},
+        "table_of_contents": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "string"}, "kind": {"type": "string"}, "chars": {"type": "integer"}},
+                "required": ["id", "kind", "chars"],
+            },
+        },
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "text": {"type": "string"},
+    },
+    ("campaign",),
+)
+
+_EVENT = {
+    "type": "object",
+    "properties": {
+        "seq": {"type": "integer"},
+        "ts": {"type": "string"},
+        "kind": {"type": "string"},
+        "act": {"type": ["string", "null"]},
+        "beat": {"type": ["string", "null"]},
+        "text": {"type": "string"},
+        "data": {"type": "object"},
+    },
+    "required": ["seq", "ts", "kind", "text"],
+}
+
+CAMPAIGN_EVENT_SCHEMA = _result_schema({"event": _EVENT}, ("event",))
+
+CAMPAIGN_EVENTS_SCHEMA = _result_schema(
+    {
+        "campaign_instance": {"type": "string"},
+        "events": {"type": "array", "items": _EVENT},
+        "markdown": {"type": "string"},
+    },
+)
+
+# Result schema of each custom tool. The SDK's in-process MCP server has no way
+# to declare a tool's output schema, so these are not sent to the CLI: they
+# document (and tests check) what each tool returns and is forwarded as.
+RESULT_SCHEMAS = {
+    "roll_dice": DICE_ROLL_SCHEMA,
+    "roll_dice_batch": DICE_BATCH_SCHEMA,
+    "dice_odds": DICE_ODDS_SCHEMA,
+    "create_campaign_instance": CAMPAIGN_CREATED_SCHEMA,
+    "get_character_stats": CHARACTER_STATS_SCHEMA,
+    "update_character_stats": CHARACTER_STATS_SCHEMA,
+    "resolve_attack": ATTACK_RESULT_SCHEMA,
+    "search_knowledge": KNOWLEDGE_SCHEMA,
+    "get_campaign_section": CAMPAIGN_SECTION_SCHEMA,
+    "log_campaign_event": CAMPAIGN_EVENT_SCHEMA,
+    "get_campaign_events": CAMPAIGN_EVENTS_SCHEMA,
+}
+
+
+def tool_result(result: dict[str, Any]) -> dict[str, Any]:
+    """MCP tool response for a result dict: the result as JSON text, flagged as an error on error."""
+    return {
+        "content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, default=str)}],
+        "is_error": result.get("status") == "error",
+    }
+
+
+def result_text(content: Any) -> str:
+    """Text of a ToolResultBlock's content (a string or a list of content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else getattr(block, "text", "") for block in content or []
+    )
+
+
+def parse_result(content: Any) -> dict[str, Any] | None:
+    """The result dict a tool returned, from its ToolResultBlock's content (None if not a JSON object)."""
+    try:
+        result = json.loads(result_text(content))
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
@@ -1,12 +1,195 @@
 """Campaign instance management tools for DnD DM Agent."""
 
+import os
+import re
+import shutil
+import stat
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
+
+from ..event_log import EventLog
+
+try:
+    import fcntl
+except ImportError:  # not POSIX
+    fcntl = None
 
 # Base directory for campaign instances (project root)
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 CAMPAIGNS_DIR = PROJECT_ROOT / "campaigns"
+TEMPLATES_DIR = PROJECT_ROOT / "available_campaigns"
+
+# Template and instance names become directory names under CAMPAIGNS_DIR
+NAME_PATTERN = r"^[A-Za-z0-9_-]+$"
+_NAME = re.compile(NAME_PATTERN)
+
+# Template documents an instance shares with its template until it modifies them
+TEMPLATE_FILES = ("campaign_guide.md", "npcs.md", "locations.md", "encounters.md")
+
+# Linux FICLONE ioctl: clone src's extents into dst (btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+
+def _invalid_name(kind: str, name: str) -> Dict[str, Any] | None:
+    """Error result for a template or instance name that is not a plain directory name."""
+    if _NAME.match(name):
+        return None
+    return {"status": "error", "error_message": f"Invalid {kind} name '{name}': use only letters, digits, '_' and '-'"}
+
+
+def instance_template(campaign: str) -> str | None:
+    """Template a campaign instance was created from ("<template>_<instance>"), or the template itself."""
+    if not campaign or not TEMPLATES_DIR.is_dir():
+        return None
+    templates = sorted((d.name for d in TEMPLATES_DIR.iterdir() if d.is_dir()), key=len, reverse=True)
+    return next((t for t in templates if campaign == t or campaign.startswith(f"{t}_")), None)
+
+
+def _template_source(path: Path) -> Path | None:
+    """Template document an instance document is layered over, if any."""
+    path = Path(path)
+    if path.name not in TEMPLATE_FILES:
+        return None
+    template = instance_template(path.parent.name)
+    if template is None:
+        return None
+    source = TEMPLATES_DIR / template / path.name
+    return source if source.is_file() else None
+
+
+def instance_file(instance_path: Path, filename: str) -> Path | None:
+    """The instance's own copy of a document, else the template's (reads fall through)."""
+    own = Path(instance_path) / filename
+    if own.is_file():
+        return own
+    return _template_source(own)
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    with open(src, "rb") as source, open(dst, "wb") as target:
+        try:
+            fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            dst.unlink()
+            raise
+
+
+def link_file(src: Path, dst: Path) -> str | None:
+    """Share ``src`` at ``dst`` without copying its data.
+
+    Returns:
+        "reflink" or "hardlink", or None if the filesystem supports neither
+        (``dst`` is then not created)
+    """
+    if fcntl is not None:
+        try:
+            _reflink(src, dst)
+            return "reflink"
+        except OSError:
+            pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        return None
+    # The inode is the template's: make it read-only, so a write that skips
+    # materialize fails instead of changing the template
+    os.chmod(dst, stat.S_IMODE(os.stat(dst).st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+    return "hardlink"
+
+
+def materialize(path: str | Path) -> bool:
+    """Give an instance document its own data before it is modified (or first read, if missing).
+
+    A document the instance does not have yet is copied from its template; a
+    hardlink shared with the template is replaced by a private copy. Copies
+    keep the source's mtime. Reflinked and already-private documents are left
+    alone.
+
+    Returns:
+        Whether a copy was made
+    """
+    path = Path(path)
+    if not path.exists():
+        source = _template_source(path)
+        if source is None or not path.parent.is_dir():
+            return False
+    elif path.is_file() and path.stat().st_nlink > 1:
+        source = path
+    else:
+        return False
+    # Copy next to the target and rename over it, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(fd)
+    try:
+        # copy2 keeps the mtime, so a Read of the shared file still counts as current for an Edit
+        shutil.copy2(source, tmp)
+        os.chmod(tmp, stat.S_IMODE(os.stat(tmp).st_mode) | stat.S_IWUSR)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return True
+
+
+def _create_instance(campaign_template: str, instance_name: str, template_path: Path) -> Dict[str, Any]:
+    invalid = _invalid_name("template", campaign_template) or _invalid_name("instance", instance_name)
+    if invalid is not None:
+        return invalid
+    campaign_instance_name = f"{campaign_template}_{instance_name}"
+    instance_path = CAMPAIGNS_DIR / campaign_instance_name
+
+    # mkdir is atomic, so two server workers can't both create the same instance
+    CAMPAIGNS_DIR.mkdir(exist_ok=True)
+    try:
+        instance_path.mkdir()
+    except FileExistsError:
+        return {"status": "error", "error_message": f"Campaign instance '{campaign_instance_name}' already exists"}
+
+    # Create characters directory
+    characters_path = instance_path / "characters"
+    characters_path.mkdir(exist_ok=True)
+
+    # Create campaign_progress.md
+    progress_path = instance_path / "campaign_progress.md"
+    with open(progress_path, "w") as f:
+        f.write(f"# {campaign_template.replace('_', ' ').title()} - {instance_name}\n\n")
+        f.write(f"**Instance:** {instance_name}\n")
+        f.write(f"**Template:** {campaign_template}\n")
+        f.write(f"**Created:** {datetime.now().strftime('%Y-%m-%d')}\n\n")
+        f.write("## Current Progress\n")
+        f.write("- **Act:** Not started\n")
+        f.write("- **Beat:** Not started\n\n")
+        f.write("## Party\n\n")
+        f.write("## Key Decisions\n\n")
+
+    # Start the event log (its markdown view replaces campaign_log.md)
+    event_log = EventLog(instance_path / "events")
+    event_log.append("campaign_created", "Campaign instance created", data={"template": campaign_template})
+    event_log.close()
+
+    # Layer template files into the instance
+    if template_path.exists():
+        linked = {}
+        for filename in TEMPLATE_FILES:
+            src_file = template_path / filename
+            if src_file.exists():
+                linked[filename] = link_file(src_file, instance_path / filename) or "template"
+        if linked:
+            copy_message = "Shared with template: " + ", ".join(f"{name} ({how})" for name, how in linked.items())
+        else:
+            copy_message = "No files copied"
+    else:
+        copy_message = f"Template '{campaign_template}' not found"
+
+    return {
+        "status": "success",
+        "message": f"Campaign instance '{campaign_instance_name}' created!",
+        "instance_path": str(instance_path),
+        "files_copied": copy_message,
+    }
 
 
 def create_campaign_instance(
@@ -15,6 +198,10 @@ def create_campaign_instance(
 ) -> Dict[str, Any]:
     """Create a new campaign instance from a template.
 
+    Template documents are reflinked or hardlinked into the instance rather
+    than copied, and materialized as its own files only when modified;
+    ``files_copied`` reports how each one was shared.
+
     Args:
         campaign_template: Name of the campaign template (e.g., "a_most_potent_brew")
         instance_name: Unique name for this campaign instance (e.g., "party1", "weekenders")
@@ -27,70 +214,47 @@ def create_campaign_instance(
         Creates: campaigns/a_most_potent_brew_party1/
     """
     try:
-        # Create campaigns directory if it doesn't exist
-        CAMPAIGNS_DIR.mkdir(exist_ok=True)
-
-        # Create campaign instance folder
-        campaign_instance_name = f"{campaign_template}_{instance_name}"
-        instance_path = CAMPAIGNS_DIR / campaign_instance_name
-
-        if instance_path.exists():
-            return {
-                "status": "error",
-                "error_message": f"Campaign instance '{campaign_instance_name}' already exists"
-            }
-
-        instance_path.mkdir(exist_ok=True)
-
-        # Create characters directory
-        characters_path = instance_path / "characters"
-        characters_path.mkdir(exist_ok=True)
-
-        # Create campaign_progress.md
-        progress_path = instance_path / "campaign_progress.md"
-        with open(progress_path, "w") as f:
-            f.write(f"# {campaign_template.replace('_', ' ').title()} - {instance_name}\n\n")
-            f.write(f"**Instance:** {instance_name}\n")
-            f.write(f"**Template:** {campaign_template}\n")
-            f.write(f"**Created:** {datetime.now().strftime('%Y-%m-%d')}\n\n")
-            f.write("## Current Progress\n")
-            f.write("- **Act:** Not started\n")
-            f.write("- **Beat:** Not started\n\n")
-            f.write("## Party\n\n")
-            f.write("## Key Decisions\n\n")
-
-        # Create campaign_log.md for event logging
-        log_path = instance_path / "campaign_log.md"
-        with open(log_path, "w") as f:
-            f.write(f"# {campaign_template.replace('_', ' ').title()} - Event Log\n\n")
-            f.write(f"**{datetime.now().strftime('%Y-%m-%d %H:%M')}** - Campaign instance created\n\n")
-
-        # Copy campaign files from template if they exist
-        template_path = PROJECT_ROOT / "available_campaigns" / campaign_template
-        if template_path.exists():
-            files_to_copy = ["campaign_guide.md", "npcs.md", "locations.md", "encounters.md"]
-            copied_files = []
-
-            for filename in files_to_copy:
-                src_file = template_path / filename
-                if src_file.exists():
-                    dst_file = instance_path / filename
-                    dst_file.write_text(src_file.read_text())
-                    copied_files.append(filename)
-
-            copy_message = f"Copied: {', '.join(copied_files)}" if copied_files else "No files copied"
-        else:
-            copy_message = f"Template '{campaign_template}' not found"
-
-        return {
-            "status": "success",
-            "message": f"Campaign instance '{campaign_instance_name}' created!",
-            "instance_path": str(instance_path),
-            "files_copied": copy_message,
-        }
+        return _create_instance(campaign_template, instance_name, TEMPLATES_DIR / campaign_template)
 
     except Exception as e:
         return {
             "status": "error",
             "error_message": f"Failed to create campaign instance: {str(e)}"
         }
+
+
+def create_campaign_instances(
+    campaign_template: str,
+    instance_names: List[str],
+) -> Dict[str, Any]:
+    """Create many instances of one template at once (e.g. for a convention or a class).
+
+    Args:
+        campaign_template: Name of the campaign template
+        instance_names: Unique names of the instances to create
+
+    Returns:
+        Dictionary with the created instance names and an error message per failed name
+    """
+    invalid = _invalid_name("template", campaign_template)
+    if invalid is not None:
+        return invalid
+    template_path = TEMPLATES_DIR / campaign_template
+    if not template_path.is_dir():
+        return {"status": "error", "error_message": f"Template '{campaign_template}' not found"}
+
+    created, errors = [], {}
+    for instance_name in dict.fromkeys(instance_names):
+        try:
+            result = _create_instance(campaign_template, instance_name, template_path)
+        except Exception as e:
+            result = {"status": "error", "error_message": str(e)}
+        if result["status"] == "success":
+            created.append(f"{campaign_template}_{instance_name}")
+        else:
+            errors[instance_name] = result["error_message"]
+
+    result = {"status": "success", "created": created, "errors": errors}
+    if not created:
+        result.update(status="error", error_message="No campaign instances created")
+    return result
@@ -0,0 +1,80 @@
+"""Campaign event log tools for DnD DM Agent."""
+
+from typing import Any, Dict
+
+from ..event_log import EventLogs
+from .campaign_instance_tools import CAMPAIGNS_DIR
+
+# Most events one query returns
+MAX_EVENTS = 200
+
+event_logs = EventLogs(CAMPAIGNS_DIR)
+
+
+def log_campaign_event(
+    campaign_instance: str,
+    kind: str,
+    text: str,
+    act: str | None = None,
+    beat: str | None = None,
+) -> Dict[str, Any]:
+    """Append an event to a campaign instance's event log.
+
+    Args:
+        campaign_instance: Campaign instance folder (e.g., "a_most_potent_brew_party1")
+        kind: Event kind (e.g., "beat_completed", "npc_met", "location_visited", "combat", "decision")
+        text: One-line description of what happened
+        act: Act the event belongs to (e.g., "Act 1")
+        beat: Beat the event belongs to (e.g., "Beat 1.2")
+
+    Returns:
+        Dictionary with the logged event (including its sequence number)
+    """
+    log = event_logs.get(campaign_instance)
+    if log is None:
+        return {"status": "error", "error_message": f"Campaign instance '{campaign_instance}' not found"}
+    try:
+        event = log.append(kind, text, act=act, beat=beat)
+    except Exception as e:
+        return {"status": "error", "error_message": f"Failed to log event: {str(e)}"}
+    return {"status": "success", "event": event}
+
+
+def get_campaign_events(
+    campaign_instance: str,
+    last: int = 20,
+    kind: str | None = None,
+    act: str | None = None,
+    beat: str | None = None,
+    since: str | None = None,
+    markdown: bool = False,
+) -> Dict[str, Any]:
+    """Query the most recent events of a campaign instance, optionally filtered.
+
+    Args:
+        campaign_instance: Campaign instance folder
+        last: Number of most recent matching events (1-200)
+        kind: Only events of this kind
+        act: Only events of this act
+        beat: Only events of this beat
+        since: Only events at or after this ISO 8601 timestamp
+        markdown: Return the events as a markdown log instead of a list
+
+    Returns:
+        Dictionary with the matching events, oldest first
+    """
+    log = event_logs.get(campaign_instance)
+    if log is None:
+        return {"status": "error", "error_message": f"Campaign instance '{campaign_instance}' not found"}
+    filters = {"kind": kind, "act": act, "beat": beat, "since": since}
+    try:
+        last = max(1, min(last, MAX_EVENTS))
+        if markdown:
+            title = campaign_instance.replace("_", " ").title()
+            return {"status": "success", "markdown": log.render_markdown(title, last, **filters)}
+        events = log.tail(last, **filters)
+    except ValueError as e:
+        return {"status": "error", "error_message": f"Invalid filter: {str(e)}"}
+    except Exception as e:
+        return {"status": "error", "error_message": f"Failed to read events: {str(e)}"}
+    return {"status": "success", "campaign_instance": campaign_instance, "events": events}
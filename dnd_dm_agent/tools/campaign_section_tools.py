@@ -0,0 +1,35 @@
+"""Section-addressable campaign document tool for DnD DM Agent."""
+
+from typing import Any, Dict
+
+from ..campaign_sections import campaign_directory, section_index
+
+
+def get_campaign_section(campaign: str, section: str = "") -> Dict[str, Any]:
+    """Get one section of a campaign's documents, or the table of contents.
+
+    Args:
+        campaign: Campaign instance (e.g., "a_most_potent_brew_party1") or template name
+        section: Section id from the table of contents (e.g., "campaign_guide/beat-1-2-into-the-cellar")
+            or a title such as "Beat 1.2"; empty returns the table of contents
+
+    Returns:
+        Dictionary with the section text, or the table of contents
+    """
+    directory = campaign_directory(campaign)
+    if directory is None:
+        return {"status": "error", "error_message": f"Campaign '{campaign}' not found"}
+    try:
+        index = section_index(directory)
+    except Exception as e:
+        return {"status": "error", "error_message": f"Failed to index campaign: {str(e)}"}
+
+    if not section:
+        return {"status": "success", "campaign": campaign, "table_of_contents": index.toc()}
+    found = index.find(section)
+    if found is None:
+        return {
+            "status": "error",
+            "error_message": f"Section '{section}' not found; call without a section for the table of contents",
+        }
+    return {"status": "success", "campaign": campaign, "id": found.id, "title": found.title, "text": found.text}
@@ -0,0 +1,48 @@
+"""Character sheet lookup and update tools for DnD DM Agent."""
+
+from typing import Any, Dict
+
+from ..character_store import character_store
+
+
+def get_character_stats(campaign_instance: str, character_name: str) -> Dict[str, Any]:
+    """Look up a character's structured stats without reading the whole sheet.
+
+    Args:
+        campaign_instance: Campaign instance folder (e.g., "a_most_potent_brew_party1")
+        character_name: Character file name without extension (e.g., "thork")
+
+    Returns:
+        Dictionary with the character's parsed fields (HP, AC, speed, spell slots,
+        conditions, inventory, gold, XP)
+    """
+    try:
+        record = character_store.get(campaign_instance, character_name)
+    except Exception as e:
+        return {"status": "error", "error_message": f"Failed to read character: {str(e)}"}
+    if record is None:
+        return {"status": "error", "error_message": f"Character '{character_name}' not found in {campaign_instance}"}
+    return {"status": "success", **record["fields"]}
+
+
+def update_character_stats(campaign_instance: str, character_name: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Update structured fields on a character sheet and re-render its markdown.
+
+    Args:
+        campaign_instance: Campaign instance folder
+        character_name: Character file name without extension
+        changes: Fields to set: hp_current, hp_max, ac, speed, xp, gold,
+            conditions (full list) and spell_slots ({"1st": {"used": 1}})
+
+    Returns:
+        Dictionary with the updated fields
+    """
+    try:
+        record = character_store.update(campaign_instance, character_name, changes)
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
+    except Exception as e:
+        return {"status": "error", "error_message": f"Failed to update character: {str(e)}"}
+    if record is None:
+        return {"status": "error", "error_message": f"Character '{character_name}' not found in {campaign_instance}"}
+    return {"status": "success", **record["fields"]}
@@ -0,0 +1,150 @@
+"""Combat resolution tools for DnD DM Agent."""
+
+import re
+from typing import Any, Dict, Optional
+
+from ..character_store import character_store
+from .utility_tools import roll_dice
+
+_DICE_TERM = re.compile(r"(\d*)d(\d+)", re.IGNORECASE)
+
+
+def _critical_damage(damage: str) -> str:
+    """Damage notation of a critical hit: every damage die is rolled twice."""
+    return _DICE_TERM.sub(lambda m: f"{2 * int(m.group(1) or 1)}d{m.group(2)}", damage)
+
+
+def _find_attack(attacks: list, weapon: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not attacks:
+        return None
+    if not weapon:
+        return attacks[0]
+    wanted = weapon.strip().lower()
+    return next((a for a in attacks if a["name"].lower() == wanted), None) or next(
+        (a for a in attacks if wanted in a["name"].lower()), None
+    )
+
+
+def resolve_attack(
+    campaign_instance: str,
+    attacker: str,
+    target: str,
+    weapon: Optional[str] = None,
+    advantage: bool = False,
+    disadvantage: bool = False,
+    attack_bonus: Optional[int] = None,
+    damage: Optional[str] = None,
+    target_ac: Optional[int] = None,
+    target_hp: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Resolve one weapon attack: roll to hit against the target's AC, roll damage and apply it.
+
+    Characters are looked up on their sheets: the attacker's weapon (attack
+    bonus, damage, type) and the target's AC and HP. Creatures without a sheet
+    (monsters, NPCs) are described inline with ``attack_bonus``/``damage`` or
+    ``target_ac``/``target_hp``. Damage to a character is applied to its sheet
+    in one locked read-modify-write, so concurrent updates are not lost.
+
+    A natural 20 always hits and doubles the damage dice; a natural 1 always
+    misses. Advantage and disadvantage cancel out.
+
+    Args:
+        campaign_instance: Campaign instance folder (e.g., "a_most_potent_brew_party1")
+        attacker: Attacking character (sheet file name without extension) or creature name
+        target: Target character (sheet file name) or creature name
+        weapon: Weapon from the attacker's Attacks & Weapons table (default: the first one)
+        advantage: Roll the attack with advantage
+        disadvantage: Roll the attack with disadvantage
+        attack_bonus: Attack bonus of an attacker without a sheet (overrides the weapon's)
+        damage: Damage notation of an attacker without a sheet, e.g. "1d6+2" (overrides the weapon's)
+        target_ac: AC of a target without a sheet (overrides the sheet's)
+        target_hp: Current HP of a target without a sheet, to report what is left
+
+    Returns:
+        Dictionary with the attack and damage rolls, whether it hit or crit, and
+        the target's HP before and after
+    """
+    try:
+        attacker_sheet = character_store.get(campaign_instance, attacker)
+        target_sheet = character_store.get(campaign_instance, target)
+    except Exception as e:
+        return {"status": "error", "error_message": f"Failed to read combatants: {str(e)}"}
+
+    # Attacker: the sheet's weapon, with inline values taking precedence
+    damage_type = ""
+    if attacker_sheet is not None and (attack_bonus is None or damage is None):
+        found = _find_attack(attacker_sheet["fields"].get("attacks", []), weapon)
+        if found is None:
+            return {
+                "status": "error",
+                "error_message": f"Weapon '{weapon}' not found on {attacker}'s sheet"
+                if weapon
+                else f"{attacker}'s sheet lists no attacks; give attack_bonus and damage",
+            }
+        weapon = found["name"]
+        damage_type = found["damage_type"]
+        attack_bonus = found["attack_bonus"] if attack_bonus is None else attack_bonus
+        damage = found["damage"] if damage is None else damage
+    if attack_bonus is None or not damage:
+        return {
+            "status": "error",
+            "error_message": f"No sheet for attacker '{attacker}' in {campaign_instance}; give attack_bonus and damage",
+        }
+
+    # Target: AC from the sheet unless given
+    if target_ac is None:
+        if target_sheet is None:
+            return {
+                "status": "error",
+                "error_message": f"No sheet for target '{target}' in {campaign_instance}; give target_ac",
+            }
+        target_ac = target_sheet["fields"]["ac"]
+
+    mode = " adv" if advantage and not disadvantage else " dis" if disadvantage and not advantage else ""
+    attack = roll_dice(f"1d20{attack_bonus:+d}{mode}")
+    if attack["status"] != "success":
+        return attack
+    natural = attack["individual_rolls"][0]
+    critical = natural == 20
+    hit = critical or (natural != 1 and attack["total"] >= target_ac)
+
+    result: Dict[str, Any] = {
+        "status": "success",
+        "attacker": attacker,
+        "target": target,
+        "weapon": weapon,
+        "attack": attack,
+        "natural": natural,
+        "target_ac": target_ac,
+        "hit": hit,
+        "critical": critical,
+        "damage": None,
+        "damage_type": damage_type,
+        "target_hp": None,
+    }
+    if not hit:
+        return result
+
+    rolled = roll_dice(_critical_damage(damage) if critical else damage)
+    if rolled["status"] != "success":
+        return {"status": "error", "error_message": f"Invalid damage '{damage}': {rolled['error_message']}"}
+    dealt = max(0, rolled["total"])
+    result["damage"] = rolled
+
+    if target_sheet is not None:
+        hp: Dict[str, int] = {}
+
+        def take_damage(fields: Dict[str, Any]) -> Dict[str, Any]:
+            hp["before"] = fields["hp_current"]
+            return {"hp_current": max(0, fields["hp_current"] - dealt)}
+
+        try:
+            record = character_store.modify(campaign_instance, target, take_damage)
+        except Exception as e:
+            return {"status": "error", "error_message": f"Failed to apply damage to {target}: {str(e)}"}
+        if record is not None:
+            fields = record["fields"]
+            result["target_hp"] = {"before": hp["before"], "after": fields["hp_current"], "max": fields["hp_max"]}
+    elif target_hp is not None:
+        result["target_hp"] = {"before": target_hp, "after": max(0, target_hp - dealt), "max": None}
+    return result
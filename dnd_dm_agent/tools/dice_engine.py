@@ -0,0 +1,600 @@
+"""Vectorized dice engine for DnD DM Agent."""
+
+import re
+from functools import lru_cache
+from math import comb
+from typing import Any, Callable, Mapping, NamedTuple
+
+import numpy as np
+
+# Safety bound for exploding dice; each extra explosion has probability 1/sides
+MAX_EXPLOSIONS = 100
+
+# Bounds on a single dice term, so one notation cannot ask for an unbounded result
+MAX_DICE = 1000
+MAX_SIDES = 1000
+
+# Exploding-die distributions are truncated once a further explosion is this unlikely
+EXPLOSION_EPSILON = 1e-12
+
+# Bounds on exact distributions: possible totals of any term or subexpression,
+# outcome pairs enumerated for a product or quotient, and dice x faces of a
+# keep/drop pool (whose distribution costs far more than a plain sum's)
+MAX_OUTCOMES = 20_000
+MAX_OUTCOME_PAIRS = 1_000_000
+MAX_KEEP_POOL = 2_000
+
+_DICE_TERM = (
+    r"(\d*)d(\d+)"                       # NdS
+    r"(?:(kh|kl|dh|dl)(\d+))?"           # keep/drop
+    r"(?:r(<=|>=|<|>|=)?(\d+))?"         # reroll once
+    r"(!)?"                              # exploding
+)
+_DICE_TERM_PATTERN = re.compile(_DICE_TERM)
+
+_NOTATION_PATTERN = re.compile(
+    rf"^{_DICE_TERM}"
+    r"([+-]\d+)?"                        # flat modifier
+    r"(adv|advantage|dis|disadvantage)?$"
+)
+
+_TOKEN_PATTERN = re.compile(
+    rf"\s*(?:(?P<dice>{_DICE_TERM})|(?P<number>\d+)|(?P<name>[a-z_][a-z0-9_]*)|(?P<op>[-+*/()]))"
+)
+
+_ADVANTAGE_WORDS = {"adv": "h", "advantage": "h", "dis": "l", "disadvantage": "l"}
+
+_REROLL_OPS = {
+    "=": np.equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+_rng = np.random.default_rng()
+
+
+class DiceSpec(NamedTuple):
+    """Parsed dice notation.
+
+    ``keep`` is ``"h"`` or ``"l"`` (or None) and ``keep_count`` how many dice
+    count toward the total; drop notation is normalized into keep notation.
+    """
+
+    count: int
+    sides: int
+    modifier: int = 0
+    keep: str | None = None
+    keep_count: int = 0
+    reroll_op: str | None = None
+    reroll_value: int = 0
+    explode: bool = False
+
+
+def _dice_spec(groups: tuple, notation: str, modifier: int = 0) -> DiceSpec:
+    """Build a DiceSpec from the groups of a ``_DICE_TERM`` match."""
+    count_str, sides_str, keep_mode, keep_str, reroll_op, reroll_str, explode = groups
+
+    count = int(count_str) if count_str else 1
+    sides = int(sides_str)
+    if count < 1 or sides < 1:
+        raise ValueError(f"Dice count and sides must be positive: {notation}")
+    if count > MAX_DICE or sides > MAX_SIDES:
+        raise ValueError(f"At most {MAX_DICE} dice of at most {MAX_SIDES} sides per term: {notation}")
+
+    keep = None
+    keep_count = 0
+    if keep_mode:
+        n = int(keep_str)
+        if n > count:
+            raise ValueError(f"Cannot keep or drop {n} of {count} dice: {notation}")
+        if keep_mode == "kh":
+            keep, keep_count = "h", n
+        elif keep_mode == "kl":
+            keep, keep_count = "l", n
+        elif keep_mode == "dl":
+            keep, keep_count = "h", count - n
+        else:
+            keep, keep_count = "l", count - n
+
+    if explode and sides == 1:
+        raise ValueError(f"A one-sided die cannot explode: {notation}")
+
+    if reroll_str is not None:
+        reroll_op = reroll_op or "="
+        reroll_value = int(reroll_str)
+    else:
+        reroll_op = None
+        reroll_value = 0
+
+    return DiceSpec(
+        count=count,
+        sides=sides,
+        modifier=modifier,
+        keep=keep,
+        keep_count=keep_count,
+        reroll_op=reroll_op,
+        reroll_value=reroll_value,
+        explode=bool(explode),
+    )
+
+
+def _with_advantage(spec: DiceSpec, keep: str, notation: str) -> DiceSpec:
+    """Turn a single-die spec into its advantage ('h') or disadvantage ('l') form."""
+    if spec.count != 1 or spec.keep:
+        raise ValueError(f"Advantage and disadvantage apply to a single die: {notation}")
+    return spec._replace(count=2, keep=keep, keep_count=1)
+
+
+def parse_roll_notation(notation: str) -> DiceSpec:
+    """Parse single-term notation like '4d6kh3' or '1d20+5 adv' into a DiceSpec."""
+    text = notation.strip().lower().replace(" ", "")
+    match = _NOTATION_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid dice notation: {notation}")
+
+    groups = match.groups()
+    modifier_str, adv = groups[7], groups[8]
+    spec = _dice_spec(groups[:7], notation, int(modifier_str) if modifier_str else 0)
+    if adv:
+        spec = _with_advantage(spec, _ADVANTAGE_WORDS[adv], notation)
+    return spec
+
+
+def roll_spec(spec: DiceSpec, times: int, rng: np.random.Generator | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Roll a DiceSpec ``times`` times in one vectorized pass.
+
+    Returns:
+        (rolls, kept): two ``(times, count)`` arrays holding each die's value
+        (exploded dice accumulate into the die that exploded) and a boolean
+        mask of which dice count toward the total.
+    """
+    rng = rng or _rng
+    shape = (times, spec.count)
+    rolls = rng.integers(1, spec.sides + 1, size=shape)
+
+    if spec.reroll_op:
+        matches = _REROLL_OPS[spec.reroll_op](rolls, spec.reroll_value)
+        if matches.any():
+            rolls = np.where(matches, rng.integers(1, spec.sides + 1, size=shape), rolls)
+
+    if spec.explode:
+        exploding = rolls == spec.sides
+        for _ in range(MAX_EXPLOSIONS):
+            if not exploding.any():
+                break
+            extra = rng.integers(1, spec.sides + 1, size=shape)
+            rolls = rolls + np.where(exploding, extra, 0)
+            exploding &= extra == spec.sides
+
+    if spec.keep:
+        # Rank each die within its row; stable sort keeps ties in roll order
+        ranks = np.argsort(np.argsort(rolls, axis=1, kind="stable"), axis=1, kind="stable")
+        if spec.keep == "h":
+            kept = ranks >= spec.count - spec.keep_count
+        else:
+            kept = ranks < spec.keep_count
+    else:
+        kept = np.ones(shape, dtype=bool)
+
+    return rolls, kept
+
+
+def _die_distribution(spec: DiceSpec) -> np.ndarray:
+    """Probability of each face value for one die of ``spec``, indexed by value."""
+    sides = spec.sides
+    faces = np.arange(sides + 1)
+    probs = np.full(sides + 1, 1.0 / sides)
+    probs[0] = 0.0
+
+    if spec.reroll_op:
+        matches = _REROLL_OPS[spec.reroll_op](faces, spec.reroll_value)
+        matches[0] = False
+        p_reroll = probs[matches].sum()
+        probs = np.where(matches, 0.0, probs) + p_reroll / sides
+        probs[0] = 0.0
+
+    if spec.explode:
+        # A max roll adds a fresh (never rerolled) die on top, possibly exploding again
+        base = probs
+        probs = np.zeros(sides * (MAX_EXPLOSIONS + 1) + 1)
+        probs[:sides] = base[:sides]
+        chain = base[sides]
+        for depth in range(1, MAX_EXPLOSIONS + 1):
+            start = depth * sides
+            probs[start + 1 : start + sides] = chain / sides
+            chain /= sides
+            if chain < EXPLOSION_EPSILON:
+                break
+        probs = np.trim_zeros(probs, "b")
+
+    return probs
+
+
+def _keep_distribution(die: np.ndarray, count: int, keep: str, keep_count: int) -> np.ndarray:
+    """Distribution of the kept dice sum, indexed by total.
+
+    Walks the faces from best to worst (highest first for keep-highest), deciding
+    how many of the remaining dice show each face. The first ``keep_count`` dice
+    assigned are the kept ones; binomial weights count the orderings.
+    """
+    values = [v for v in range(len(die)) if die[v] > 0]
+    if keep == "h":
+        values.reverse()
+
+    max_total = (len(die) - 1) * keep_count
+    # (dice remaining, dice kept so far) -> distribution over kept sum
+    states = {(count, 0): np.zeros(max_total + 1)}
+    states[(count, 0)][0] = 1.0
+    for value in values:
+        p = die[value]
+        next_states: dict[tuple[int, int], np.ndarray] = {}
+        for (remaining, kept), dist in states.items():
+            for c in range(remaining + 1):
+                weight = comb(remaining, c) * p**c
+                take = min(c, keep_count - kept)
+                shifted = np.zeros_like(dist)
+                shift = value * take
+                shifted[shift:] = dist[: len(dist) - shift] if shift else dist
+                key = (remaining - c, kept + take)
+                if key in next_states:
+                    next_states[key] += weight * shifted
+                else:
+                    next_states[key] = weight * shifted
+        states = next_states
+
+    return states.get((0, keep_count), np.zeros(max_total + 1))
+
+
+@lru_cache(maxsize=512)
+def spec_distribution(spec: DiceSpec) -> tuple[int, np.ndarray]:
+    """Exact probability distribution of a DiceSpec's total.
+
+    Cached on the normalized spec, so '4d6dl1' and '4d6kh3' share an entry.
+
+    Returns:
+        (offset, probs): ``probs[i]`` is the probability that the total equals
+        ``offset + i``. The array is read-only since it is shared by the cache.
+    """
+    die = _die_distribution(spec)
+    keeps = spec.keep and spec.keep_count < spec.count
+    counted = spec.keep_count if keeps else spec.count
+    # Bounds come from the faces, not the probabilities: the tails of a large
+    # pool underflow to zero, but those totals are still possible
+    start = int(np.flatnonzero(die)[0]) * counted
+    end = (len(die) - 1) * counted
+    if end - start + 1 > MAX_OUTCOMES:
+        raise ValueError(f"Too many possible totals to compute exact odds (limit {MAX_OUTCOMES})")
+
+    if keeps:
+        if spec.count * len(die) > MAX_KEEP_POOL:
+            raise ValueError(f"Keep/drop pool too large to compute exact odds (limit {MAX_KEEP_POOL} dice x faces)")
+        dist = _keep_distribution(die, spec.count, spec.keep, spec.keep_count)
+    else:
+        dist = np.array([1.0])
+        for _ in range(spec.count):
+            dist = np.convolve(dist, die)
+
+    dist = dist[start : end + 1] / dist.sum()
+    dist.flags.writeable = False
+    return start + spec.modifier, dist
+
+
+# =============================================================================
+# Expressions
+# =============================================================================
+
+
+class _Const(NamedTuple):
+    value: int
+
+
+class _Var(NamedTuple):
+    name: str
+
+
+class _Dice(NamedTuple):
+    index: int
+
+
+class _Neg(NamedTuple):
+    operand: Any
+
+
+class _BinOp(NamedTuple):
+    op: str
+    left: Any
+    right: Any
+
+
+def _apply(op: str, left: Any, right: Any) -> Any:
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    # D&D rounds down
+    if np.any(np.asarray(right) == 0):
+        raise ValueError("Division by zero in dice expression")
+    return np.floor_divide(left, right)
+
+
+class _Parser:
+    """Recursive-descent parser producing the expression tree and its dice terms.
+
+    Grammar::
+
+        expr   := term (('+' | '-') term)*
+        term   := factor (('*' | '/') factor)*
+        factor := ('+' | '-') factor | '(' expr ')' | NUMBER | DICE | NAME
+    """
+
+    def __init__(self, notation: str):
+        self.notation = notation
+        self.tokens: list[tuple[str, str]] = []
+        pos = 0
+        while pos < len(notation):
+            match = _TOKEN_PATTERN.match(notation, pos)
+            if not match or not match.lastgroup:
+                raise ValueError(f"Invalid dice expression: {notation}")
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            pos = match.end()
+        self.pos = 0
+        self.dice: list[DiceSpec] = []
+        self.variables: set[str] = set()
+
+    def parse(self) -> tuple[Any, str | None]:
+        advantage = None
+        if len(self.tokens) > 1 and self.tokens[-1][0] == "name" and self.tokens[-1][1] in _ADVANTAGE_WORDS:
+            advantage = _ADVANTAGE_WORDS[self.tokens.pop()[1]]
+        if not self.tokens:
+            raise ValueError(f"Empty dice expression: {self.notation}")
+        root = self._expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.pos][1]}' in dice expression: {self.notation}")
+        return root, advantage
+
+    def _peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _expr(self) -> Any:
+        node = self._term()
+        while (token := self._peek()) and token[1] in ("+", "-"):
+            self.pos += 1
+            node = _BinOp(token[1], node, self._term())
+        return node
+
+    def _term(self) -> Any:
+        node = self._factor()
+        while (token := self._peek()) and token[1] in ("*", "/"):
+            self.pos += 1
+            node = _BinOp(token[1], node, self._factor())
+        return node
+
+    def _factor(self) -> Any:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of dice expression: {self.notation}")
+        kind, value = token
+        self.pos += 1
+        if value == "-":
+            return _Neg(self._factor())
+        if value == "+":
+            return self._factor()
+        if value == "(":
+            node = self._expr()
+            if self._peek() != ("op", ")"):
+                raise ValueError(f"Missing ')' in dice expression: {self.notation}")
+            self.pos += 1
+            return node
+        if kind == "number":
+            return _Const(int(value))
+        if kind == "dice":
+            self.dice.append(_dice_spec(_DICE_TERM_PATTERN.fullmatch(value).groups(), self.notation))
+            return _Dice(len(self.dice) - 1)
+        if kind == "name":
+            self.variables.add(value)
+            return _Var(value)
+        raise ValueError(f"Unexpected '{value}' in dice expression: {self.notation}")
+
+
+def _has_dice(node: Any) -> bool:
+    if isinstance(node, _Dice):
+        return True
+    if isinstance(node, _Neg):
+        return _has_dice(node.operand)
+    if isinstance(node, _BinOp):
+        return _has_dice(node.left) or _has_dice(node.right)
+    return False
+
+
+def _is_additive(node: Any, sign: int = 1) -> bool:
+    """Whether every dice term is added, unscaled, to the rest of the expression."""
+    if isinstance(node, _Dice):
+        return sign == 1
+    if isinstance(node, _Neg):
+        return _is_additive(node.operand, -sign)
+    if not isinstance(node, _BinOp):
+        return True
+    if node.op == "+":
+        return _is_additive(node.left, sign) and _is_additive(node.right, sign)
+    if node.op == "-":
+        return _is_additive(node.left, sign) and _is_additive(node.right, -sign)
+    return not _has_dice(node.left) and not _has_dice(node.right)
+
+
+def _compile_node(node: Any) -> Callable[[Mapping[str, Any], list], Any]:
+    """Compile an expression tree into a closure over (variables, dice_totals)."""
+    if isinstance(node, _Const):
+        value = node.value
+        return lambda variables, dice: value
+    if isinstance(node, _Var):
+        name = node.name
+        return lambda variables, dice: variables[name]
+    if isinstance(node, _Dice):
+        index = node.index
+        return lambda variables, dice: dice[index]
+    if isinstance(node, _Neg):
+        operand = _compile_node(node.operand)
+        return lambda variables, dice: -operand(variables, dice)
+    op = node.op
+    left = _compile_node(node.left)
+    right = _compile_node(node.right)
+    return lambda variables, dice: _apply(op, left(variables, dice), right(variables, dice))
+
+
+def _combine_distributions(
+    op: str, left: tuple[int, np.ndarray], right: tuple[int, np.ndarray]
+) -> tuple[int, np.ndarray]:
+    """Distribution of ``left op right`` for independent integer distributions."""
+    left_offset, left_probs = left
+    right_offset, right_probs = right
+    if op in "+-" and len(left_probs) + len(right_probs) - 1 > MAX_OUTCOMES:
+        raise ValueError(f"Too many possible totals to compute exact odds (limit {MAX_OUTCOMES})")
+    if op == "+":
+        return left_offset + right_offset, np.convolve(left_probs, right_probs)
+    if op == "-":
+        negated = (-(right_offset + len(right_probs) - 1), right_probs[::-1])
+        return _combine_distributions("+", left, negated)
+
+    # Products and quotients: enumerate the outer product of outcomes
+    if len(left_probs) * len(right_probs) > MAX_OUTCOME_PAIRS:
+        raise ValueError(f"Too many outcome pairs to compute exact odds (limit {MAX_OUTCOME_PAIRS})")
+    left_values = np.arange(left_offset, left_offset + len(left_probs))
+    right_values = np.arange(right_offset, right_offset + len(right_probs))
+    values = _apply(op, left_values[:, None], right_values[None, :]).ravel()
+    weights = np.outer(left_probs, right_probs).ravel()
+    offset = int(values.min())
+    if int(values.max()) - offset + 1 > MAX_OUTCOMES:
+        raise ValueError(f"Too many possible totals to compute exact odds (limit {MAX_OUTCOMES})")
+    return offset, np.bincount(values - offset, weights=weights)
+
+
+def _node_distribution(node: Any, dice: tuple[DiceSpec, ...], variables: Mapping[str, int]) -> tuple[int, np.ndarray]:
+    if isinstance(node, _Const):
+        return node.value, np.array([1.0])
+    if isinstance(node, _Var):
+        return int(variables[node.name]), np.array([1.0])
+    if isinstance(node, _Dice):
+        return spec_distribution(dice[node.index])
+    if isinstance(node, _Neg):
+        offset, probs = _node_distribution(node.operand, dice, variables)
+        return -(offset + len(probs) - 1), probs[::-1]
+    return _combine_distributions(
+        node.op,
+        _node_distribution(node.left, dice, variables),
+        _node_distribution(node.right, dice, variables),
+    )
+
+
+class ExpressionRoll(NamedTuple):
+    """Vectorized result of rolling a DiceExpression ``times`` times.
+
+    ``dice`` holds one ``(rolls, kept)`` pair per dice term (see roll_spec) and
+    ``modifier`` is the expression's value with every dice term set to zero.
+    The kept dice plus ``modifier`` make up the total only for additive
+    expressions (see DiceExpression.additive).
+    """
+
+    totals: np.ndarray
+    modifier: Any
+    dice: list[tuple[np.ndarray, np.ndarray]]
+
+
+class DiceExpression:
+    """A compiled dice expression; use compile_dice_expression() to obtain one.
+
+    ``additive`` is True when the total is the kept dice plus a flat modifier,
+    as in '2d6+1d4+STR', and False for e.g. '(1d8+2)*2' or '10-1d4'.
+    """
+
+    def __init__(self, text: str, root: Any, dice: list[DiceSpec], variables: set[str]):
+        self.text = text
+        self.dice = tuple(dice)
+        self.variables = frozenset(variables)
+        self.additive = _is_additive(root)
+        self._root = root
+        self._evaluate = _compile_node(root)
+
+    def __repr__(self) -> str:
+        return f"DiceExpression({self.text!r})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DiceExpression) and other.text == self.text
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def _bind(self, variables: Mapping[str, Any] | None) -> dict[str, Any]:
+        bound = {name.lower(): value for name, value in (variables or {}).items()}
+        missing = self.variables - bound.keys()
+        if missing:
+            raise ValueError(f"Unbound variables in '{self.text}': {', '.join(sorted(missing))}")
+        return bound
+
+    def roll(
+        self,
+        times: int = 1,
+        variables: Mapping[str, Any] | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> ExpressionRoll:
+        """Roll the expression ``times`` times in one vectorized pass.
+
+        Variable values may be ints or arrays of length ``times`` (one value per
+        roll), so a single call can roll the same attack for many creatures.
+        """
+        bound = {name: np.asarray(value) for name, value in self._bind(variables).items()}
+        dice = [roll_spec(spec, times, rng) for spec in self.dice]
+        dice_totals = [(rolls * kept).sum(axis=1) for rolls, kept in dice]
+        totals = np.broadcast_to(self._evaluate(bound, dice_totals), (times,))
+        modifier = self._evaluate(bound, [0] * len(self.dice))
+        return ExpressionRoll(totals=totals, modifier=modifier, dice=dice)
+
+    def distribution(self, variables: Mapping[str, int] | None = None) -> tuple[int, np.ndarray]:
+        """Exact distribution of the total as ``(offset, probs)`` (see spec_distribution)."""
+        bound = self._bind(variables)
+        key = tuple(sorted((name, int(bound[name])) for name in self.variables))
+        return _expression_distribution(self, key)
+
+
+@lru_cache(maxsize=512)
+def _expression_distribution(
+    expression: DiceExpression, variables: tuple[tuple[str, int], ...]
+) -> tuple[int, np.ndarray]:
+    offset, probs = _node_distribution(expression._root, expression.dice, dict(variables))
+    probs = probs.copy()
+    probs.flags.writeable = False
+    return offset, probs
+
+
+def normalize_expression(text: str) -> str:
+    """Canonical cache key for an expression: lower case, no whitespace around operators."""
+    return re.sub(r"\s*([-+*/()])\s*", r"\1", " ".join(text.lower().split()))
+
+
+@lru_cache(maxsize=1024)
+def _compile_normalized(text: str) -> DiceExpression:
+    parser = _Parser(text)
+    root, advantage = parser.parse()
+    dice = parser.dice
+    if advantage:
+        # Advantage applies to the d20s; fall back to any lone die (e.g. '1d6 adv')
+        targets = [i for i, spec in enumerate(dice) if spec.count == 1 and not spec.keep and spec.sides == 20]
+        targets = targets or [i for i, spec in enumerate(dice) if spec.count == 1 and not spec.keep][:1]
+        if not targets:
+            raise ValueError(f"Advantage and disadvantage apply to a single die: {text}")
+        for i in targets:
+            dice[i] = _with_advantage(dice[i], advantage, text)
+    return DiceExpression(text, root, dice, parser.variables)
+
+
+@lru_cache(maxsize=1024)
+def compile_dice_expression(notation: str) -> DiceExpression:
+    """Compile a dice expression like '1d20+STR+PROF' or '(1d8+2)*2'.
+
+    Results are cached on both the raw and normalized text, so hot expressions
+    skip tokenizing and parsing entirely.
+    """
+    return _compile_normalized(normalize_expression(notation))
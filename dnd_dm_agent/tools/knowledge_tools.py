@@ -0,0 +1,30 @@
+"""Rules knowledge base search tool for DnD DM Agent."""
+
+from typing import Any, Dict
+
+from ..knowledge_index import knowledge_index
+
+# Long sections are cut so a search result stays a few thousand tokens at most
+MAX_SECTION_CHARS = 2000
+
+
+def search_knowledge(query: str, top_k: int = 5) -> Dict[str, Any]:
+    """Search the D&D rules knowledge base and return the best-matching sections.
+
+    Args:
+        query: Free-text rules question or keywords (e.g., "grappled condition escape")
+        top_k: Number of sections to return (1-10)
+
+    Returns:
+        Dictionary with ranked sections (file, heading, score, text)
+    """
+    if not knowledge_index.root.is_dir():
+        return {"status": "error", "error_message": f"Knowledge base not found at {knowledge_index.root}"}
+    try:
+        results = knowledge_index.search(query, top_k=max(1, min(top_k, 10)))
+    except Exception as e:
+        return {"status": "error", "error_message": f"Knowledge search failed: {str(e)}"}
+    for result in results:
+        if len(result["text"]) > MAX_SECTION_CHARS:
+            result["text"] = result["text"][:MAX_SECTION_CHARS] + "…"
+    return {"status": "success", "query": query, "results": results}
@@ -1,18 +1,29 @@
 """Utility tools for DnD DM Agent - dice rolling and convenience functions."""
 
-import random
 import re
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional
 
+import numpy as np
 
+from .dice_engine import DiceExpression, compile_dice_expression
 
+# Percentiles reported by dice_odds
+ODDS_PERCENTILES = (10, 25, 50, 75, 90)
+
+# Most rolls (notations x times) one roll_dice_batch call may ask for
+MAX_BATCH_ROLLS = 10_000
+
+_SIMPLE_NOTATION = re.compile(r"^(\d*)d(\d+)([+-]\d+)?$")
+
+
+@lru_cache(maxsize=256)
 def parse_dice_notation(notation: str) -> tuple[int, int, int]:
     """Parse dice notation like '2d6+3' into (count, sides, modifier)."""
     notation = notation.strip().lower().replace(" ", "")
 
     # Match patterns like 1d20, 2d6+3, 3d8-1, d20 (implicit 1)
-    pattern = r"^(\d*)d(\d+)([+-]\d+)?$"
-    match = re.match(pattern, notation)
+    match = _SIMPLE_NOTATION.match(notation)
 
     if not match:
         raise ValueError(f"Invalid dice notation: {notation}")
@@ -26,30 +37,169 @@ def parse_dice_notation(notation: str) -> tuple[int, int, int]:
     return count, sides, modifier
 
 
-def roll_dice(notation: str) -> Dict[str, Any]:
+def _roll_results(
+    expression: DiceExpression,
+    notation: str,
+    times: int,
+    variables: Optional[Mapping[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Roll a compiled expression ``times`` times and format one result dict per roll.
+
+    ``modifier`` is only reported for additive expressions, where it and the
+    kept rolls sum to the total; for '(1d8+2)*2' they would not.
+    """
+    rolled = expression.roll(times, variables)
+    modifiers = np.broadcast_to(rolled.modifier, (times,)).tolist()
+    dice = [(rolls.tolist(), kept.tolist()) for rolls, kept in rolled.dice]
+    has_dropped = any(spec.keep for spec in expression.dice)
+
+    results = []
+    for row, (total, modifier) in enumerate(zip(rolled.totals.tolist(), modifiers)):
+        kept_rolls: List[int] = []
+        dropped_rolls: List[int] = []
+        for rolls, kept in dice:
+            for value, keep in zip(rolls[row], kept[row]):
+                (kept_rolls if keep else dropped_rolls).append(value)
+        result = {"notation": notation, "individual_rolls": kept_rolls, "total": total}
+        if expression.additive:
+            result["modifier"] = modifier
+        if has_dropped:
+            result["dropped_rolls"] = dropped_rolls
+        results.append(result)
+    return results
+
+
+def roll_dice(notation: str, variables: Optional[Mapping[str, int]] = None) -> Dict[str, Any]:
     """Roll dice using standard DnD notation (e.g., '1d20+5', '2d6').
 
     Use this tool whenever you need to roll dice for ability checks, attacks,
     damage, saving throws, or any other game mechanic that requires randomness.
 
     Args:
-        notation: Dice notation like '1d20+3', '2d6', or '4d6+2'
+        notation: Dice expression like '1d20+3', '2d6+1d4', '(1d8+2)*2' or '1d20+STR adv'
+        variables: Optional values for named modifiers in the expression (e.g. {'STR': 3})
 
     Returns:
         A dictionary containing the roll results with status, individual rolls,
         total, and notation used.
     """
     try:
-        count, sides, modifier = parse_dice_notation(notation)
-        rolls = [random.randint(1, sides) for _ in range(count)]
-        total = sum(rolls) + modifier
-        result = {"dice_notation": notation, "individual_rolls": rolls, "total": total, "modifier": modifier}
-        return {
+        result = _roll_results(compile_dice_expression(notation), notation, 1, variables)[0]
+        return {"status": "success", **result}
+    except Exception as e:
+        return {"status": "error", "error_message": str(e)}
+
+
+def roll_dice_batch(
+    notations: List[str],
+    times: int = 1,
+    target: Optional[int] = None,
+    variables: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Roll many dice expressions in one call (e.g., thirty goblin attacks).
+
+    Supports full dice expressions ('2d6+1d4+3', '1d20+STR+PROF') with
+    advantage ('1d20+5 adv'), disadvantage ('1d20 dis'), keep/drop ('4d6kh3',
+    '2d20kl1', '4d6dl1'), rerolls ('2d6r<=2') and exploding dice ('1d6!').
+    Identical expressions are rolled together in a single vectorized operation.
+
+    Args:
+        notations: List of dice expressions, e.g. ['1d20+4', '1d20+4', '2d6+2']
+        times: How many times to roll each notation (default 1)
+        target: Optional DC or AC; each result reports whether total >= target
+        variables: Optional named modifier values. Each value is an int, or a
+            list of ``times`` ints to give every repetition its own value
+            (e.g. a different STR per creature).
+
+    Returns:
+        A dictionary with status, one result per roll (in input order, each
+        notation repeated ``times``), and the grand total.
+    """
+    try:
+        if times < 1:
+            raise ValueError("times must be at least 1")
+        if len(notations) * times > MAX_BATCH_ROLLS:
+            raise ValueError(f"At most {MAX_BATCH_ROLLS} rolls per batch, got {len(notations) * times}")
+        for name, value in (variables or {}).items():
+            if isinstance(value, (list, tuple)) and len(value) != times:
+                raise ValueError(f"Variable '{name}' needs {times} values, got {len(value)}")
+
+        # Group equivalent expressions so each distinct one is a single array operation
+        positions: Dict[DiceExpression, List[int]] = {}
+        for index, notation in enumerate(notations):
+            positions.setdefault(compile_dice_expression(notation), []).append(index)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * (len(notations) * times)
+        for expression, indices in positions.items():
+            # Rows run occurrence-major, so per-repetition values tile across occurrences
+            tiled = {
+                name: np.tile(value, len(indices)) if isinstance(value, (list, tuple)) else value
+                for name, value in (variables or {}).items()
+            }
+            rolled = _roll_results(expression, notations[indices[0]], len(indices) * times, tiled)
+            for row, result in enumerate(rolled):
+                index = indices[row // times]
+                result["notation"] = notations[index]
+                if target is not None:
+                    result["success"] = result["total"] >= target
+                results[index * times + row % times] = result
+
+        summary = {
+            "status": "success",
+            "results": results,
+            "grand_total": sum(r["total"] for r in results),
+        }
+        if target is not None:
+            summary["target"] = target
+            summary["successes"] = sum(1 for r in results if r["success"])
+        return summary
+    except Exception as e:
+        return {"status": "error", "error_message": str(e)}
+
+
+def dice_odds(
+    notation: str,
+    dc: Optional[int] = None,
+    variables: Optional[Mapping[str, int]] = None,
+) -> Dict[str, Any]:
+    """Compute exact odds for a dice expression without rolling it.
+
+    Accepts the same expressions as roll_dice_batch ('1d20+5 adv', '4d6kh3',
+    '2d6r<=2', '1d20+STR+PROF'). Distributions are computed by convolution and
+    cached, so repeated questions about the same expression are instant.
+
+    Args:
+        notation: Dice expression like '1d20+5' or '2d20kh1+3'
+        dc: Optional difficulty class (or AC); reports P(total >= dc)
+        variables: Optional values for named modifiers in the expression
+
+    Returns:
+        A dictionary with status, min/max/mean total, selected percentiles,
+        and the chance of meeting the DC if one was given.
+    """
+    try:
+        offset, probs = compile_dice_expression(notation).distribution(variables)
+        totals = np.arange(offset, offset + len(probs))
+        cdf = np.cumsum(probs)
+        mean = float(np.dot(totals, probs))
+
+        result = {
             "status": "success",
-            "notation": result["dice_notation"],
-            "individual_rolls": result["individual_rolls"],
-            "total": result["total"],
-            "modifier": result["modifier"],
+            "notation": notation,
+            "min": int(totals[0]),
+            "max": int(totals[-1]),
+            "mean": round(mean, 3),
+            "std_dev": round(float(np.sqrt(np.dot((totals - mean) ** 2, probs))), 3),
+            "percentiles": {
+                f"p{q}": int(totals[min(np.searchsorted(cdf, q / 100 - 1e-9), len(totals) - 1)])
+                for q in ODDS_PERCENTILES
+            },
         }
+        if dc is not None:
+            # Slicing clamps out-of-range DCs to certain success or failure
+            p_success = float(probs[max(dc - offset, 0) :].sum())
+            result["dc"] = dc
+            result["p_success"] = round(min(p_success, 1.0), 4)
+        return result
     except Exception as e:
         return {"status": "error", "error_message": str(e)}
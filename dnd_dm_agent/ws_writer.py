@@ -0,0 +1,192 @@
+"""Per-connection outbound event queue for WebSocket sessions."""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any
+
+from .logging_config import logger
+
+try:
+    import orjson
+except ImportError:  # optional "fast" extra
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional "msgpack" extra
+    msgpack = None
+
+# Events whose content is concatenated when they sit next to each other in the queue
+MERGEABLE_EVENTS = {"text_chunk": "content", "text_delta": "content"}
+
+# Advisory UI events that may be replaced or dropped when the client lags
+INDICATOR_EVENTS = {"tool_use", "open_character_sheet"}
+
+# Seconds the writer holds a lone text event so following text can join its frame
+COALESCE_WINDOW = 0.02
+
+# Queue depth beyond which indicator events are dropped
+LAG_THRESHOLD = 32
+
+
+def encode_event(event: dict[str, Any]) -> str:
+    """Encode an event as compact JSON (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(event).decode()
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_event_msgpack(event: dict[str, Any]) -> bytes:
+    """Encode an event as MessagePack."""
+    return msgpack.packb(event, use_bin_type=True, default=str)
+
+
+def negotiate_encoding(requested: str) -> str:
+    """Encoding used for a client that asked for ``requested``: msgpack if available, else JSON."""
+    if requested == "msgpack":
+        if msgpack is not None:
+            return "msgpack"
+        logger.warning("MessagePack requested but msgpack is not installed; sending JSON")
+    return "json"
+
+
+class EventWriter:
+    """Bounded, coalescing outbound queue with a single writer task per WebSocket.
+
+    Args:
+        websocket: Connection the events are written to (anything with ``send_text``, and
+            ``send_bytes`` for MessagePack)
+        maxsize: Queue length at which ``send`` waits for the writer
+        coalesce_window: Seconds a lone mergeable event is held for followers
+        lag_threshold: Queue depth beyond which indicator events are dropped
+        encoding: "json" (text frames) or "msgpack" (binary frames)
+    """
+
+    def __init__(
+        self,
+        websocket: Any,
+        maxsize: int = 256,
+        coalesce_window: float = COALESCE_WINDOW,
+        lag_threshold: int = LAG_THRESHOLD,
+        encoding: str = "json",
+    ):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.maxsize = maxsize
+        self.coalesce_window = coalesce_window
+        self.lag_threshold = lag_threshold
+        self._queue: deque[dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.send_time = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def send(self, event: dict[str, Any]) -> None:
+        """Queue an event, merging or dropping it per the policy above."""
+        if self._closed:
+            return
+        if self._absorb(event):
+            return
+        while len(self._queue) >= self.maxsize and not self._closed:
+            self._room.clear()
+            await self._room.wait()
+        self._queue.append(dict(event))
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+
+    def _absorb(self, event: dict[str, Any]) -> bool:
+        """Fold an event into the queue without adding an entry; True if it needs no entry."""
+        kind = event.get("type")
+        tail = self._queue[-1] if self._queue else None
+        field = MERGEABLE_EVENTS.get(kind)
+        if field and tail is not None and tail.get("type") == kind:
+            tail[field] += event[field]
+            self.merged += 1
+            return True
+        if kind in INDICATOR_EVENTS:
+            if len(self._queue) >= self.lag_threshold:
+                self.dropped += 1
+                return True
+            for i in range(len(self._queue) - 1, -1, -1):
+                if self._queue[i].get("type") == kind:
+                    self._queue[i] = dict(event)
+                    self.merged += 1
+                    return True
+                if self._queue[i].get("type") not in INDICATOR_EVENTS:
+                    break
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            if not self._queue:
+                self._ready.clear()
+                continue
+            if len(self._queue) == 1 and self._queue[0].get("type") in MERGEABLE_EVENTS and self.coalesce_window:
+                await asyncio.sleep(self.coalesce_window)
+            event = self._queue.popleft()
+            self._room.set()
+            start = time.perf_counter()
+            try:
+                if self.encoding == "msgpack":
+                    await self.websocket.send_bytes(encode_event_msgpack(event))
+                else:
+                    await self.websocket.send_text(encode_event(event))
+            except Exception as e:
+                logger.debug("WebSocket writer stopped: %s", e)
+                # Kept for take_unsent, so a reconnect can still deliver them
+                self._queue.appendleft(event)
+                self._closed = True
+                self._room.set()
+                return
+            self.send_time += time.perf_counter() - start
+            self.sent += 1
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Flush queued events (up to ``timeout`` seconds), then stop the writer."""
+        if self._task is None:
+            self._closed = True
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue and not self._task.done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+        self._closed = True
+        self._room.set()
+        self._task.cancel()
+        await asyncio.wait([self._task])
+
+    def take_unsent(self) -> list[dict[str, Any]]:
+        """Remove and return the events a closed writer could not deliver."""
+        unsent = list(self._queue)
+        self._queue.clear()
+        return unsent
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "avg_send_ms": round(1000 * self.send_time / self.sent, 3) if self.sent else None,
+        }
@@ -3,7 +3,8 @@ import { useReducer, useCallback, useEffect, useState, useRef, useMemo } from 'r
 import type { ChatEntry, CharacterData, ServerMessage } from './types/messages';
 import { useWebSocket } from './hooks/useWebSocket';
 import type { WSStatus } from './hooks/useWebSocket';
-import { parseCharacterMarkdown } from './services/characterParser';
+import { applyCharacterPatch, characterFromSheet, parseCharacterMarkdown } from './services/characterParser';
+import type { CharacterSheetFields } from './services/characterParser';
 import { AppHeader } from './components/layout/AppHeader';
 import { MapPlaceholder } from './components/map/MapPlaceholder';
 import { ChatLog } from './components/chat/ChatLog';
@@ -75,11 +76,14 @@ interface AppState {
 type Action =
   | { type: 'ADD_PLAYER_MESSAGE'; content: string }
   | { type: 'ADD_SYSTEM_MESSAGE'; content: string; hidden?: boolean }
+  | { type: 'APPEND_TEXT_DELTA'; content: string }
   | { type: 'APPEND_TEXT_CHUNK'; content: string }
   | { type: 'ADD_TOOL_INDICATOR'; display_name: string }
-  | { type: 'ADD_DICE_RESULT'; notation: string; rolls: number[]; total: number; modifier: number }
+  | { type: 'ADD_DICE_RESULT'; notation: string; rolls: number[]; total: number; modifier?: number }
   | { type: 'TURN_COMPLETE' }
+  | { type: 'SESSION_RESUMED'; turnInProgress: boolean }
   | { type: 'SET_CHARACTER'; data: CharacterData; markdown: string }
+  | { type: 'PATCH_CHARACTER'; changes: Partial<CharacterSheetFields> }
   | { type: 'SET_WS_STATUS'; status: WSStatus };
 
 function reducer(state: AppState, action: Action): AppState {
@@ -96,20 +100,33 @@ function reducer(state: AppState, action: Action): AppState {
       const entry: ChatEntry = { id: generateId(), kind: 'tool_indicator', display_name: action.display_name };
       return { ...state, chatEntries: [...state.chatEntries, entry] };
     }
+    case 'APPEND_TEXT_DELTA':
     case 'APPEND_TEXT_CHUNK': {
+      // A text_chunk is the complete block: it replaces the deltas streamed for it
+      const isDelta = action.type === 'APPEND_TEXT_DELTA';
       if (state.currentDMEntryId) {
         return {
           ...state,
-          chatEntries: state.chatEntries.map((e) =>
-            e.id === state.currentDMEntryId && e.kind === 'dm'
-              ? { ...e, content: e.content + action.content }
-              : e
-          ),
+          chatEntries: state.chatEntries.map((e) => {
+            if (e.id !== state.currentDMEntryId || e.kind !== 'dm') return e;
+            const pending = e.pending ?? 0;
+            return {
+              ...e,
+              content: e.content.slice(0, e.content.length - pending) + action.content,
+              pending: isDelta ? pending + action.content.length : 0,
+            };
+          }),
         };
       } else {
         const newId = generateId();
         const filtered = state.chatEntries.filter((e) => e.kind !== 'tool_indicator');
-        const entry: ChatEntry = { id: newId, kind: 'dm', content: action.content, isComplete: false };
+        const entry: ChatEntry = {
+          id: newId,
+          kind: 'dm',
+          content: action.content,
+          isComplete: false,
+          pending: isDelta ? action.content.length : 0,
+        };
         return { ...state, chatEntries: [...filtered, entry], currentDMEntryId: newId };
       }
     }
@@ -134,8 +151,18 @@ function reducer(state: AppState, action: Action): AppState {
           .map((e) => (e.kind === 'dm' && !e.isComplete ? { ...e, isComplete: true } : e)),
       };
     }
+    case 'SESSION_RESUMED': {
+      // Replayed narration continues the DM entry that was streaming when the socket dropped
+      const last = [...state.chatEntries].reverse().find((e) => e.kind === 'dm');
+      const streaming = last && last.kind === 'dm' && !last.isComplete ? last.id : null;
+      return { ...state, currentDMEntryId: streaming, isAgentTyping: action.turnInProgress };
+    }
     case 'SET_CHARACTER':
       return { ...state, character: action.data, characterMarkdown: action.markdown };
+    case 'PATCH_CHARACTER':
+      // The markdown is now stale; it is re-fetched when the sheet is opened
+      if (!state.character) return state;
+      return { ...state, character: applyCharacterPatch(state.character, action.changes) };
     case 'SET_WS_STATUS':
       return { ...state, wsStatus: action.status };
     default:
@@ -184,45 +211,70 @@ function GameView({ session, onLeave }: { session: SessionConfig; onLeave: () =>
       const res = await fetch(`/api/character/${session.campaign}/${characterName}`);
       if (!res.ok) return;
       const data = await res.json();
-      const parsed = parseCharacterMarkdown(data.markdown);
+      // Prefer the server's indexed fields; fall back to parsing the markdown
+      const parsed = data.sheet ? characterFromSheet(data.sheet) : parseCharacterMarkdown(data.markdown);
       if (parsed) dispatch({ type: 'SET_CHARACTER', data: parsed, markdown: data.markdown });
     } catch { /* silently ignore */ }
   }, [session.campaign]);
 
+  // The full markdown is only needed for the sheet modal; revalidating it is a 304 when unchanged
+  const openSheet = useCallback(() => {
+    fetchCharacter(activeCharacter).then(() => setSheetOpen(true));
+  }, [fetchCharacter, activeCharacter]);
+
   const handleMessage = useCallback((msg: ServerMessage) => {
     switch (msg.type) {
+      case 'session_resumed':
+        dispatch({ type: 'SESSION_RESUMED', turnInProgress: msg.turn_in_progress });
+        break;
+      case 'text_delta':
+        dispatch({ type: 'APPEND_TEXT_DELTA', content: msg.content });
+        break;
       case 'text_chunk':
         dispatch({ type: 'APPEND_TEXT_CHUNK', content: msg.content });
         break;
       case 'tool_use':
         dispatch({ type: 'ADD_TOOL_INDICATOR', display_name: msg.display_name });
         break;
-      case 'tool_result': {
-        const r = msg.result as Record<string, unknown>;
-        if (r?.notation && r?.individual_rolls) {
-          dispatch({
-            type: 'ADD_DICE_RESULT',
-            notation: r.notation as string,
-            rolls: r.individual_rolls as number[],
-            total: (r.total as number) ?? 0,
-            modifier: (r.modifier as number) ?? 0,
-          });
+      case 'dice_result':
+      case 'attack_result': {
+        const r = msg.result;
+        const rolls = Array.isArray(r?.results)
+          ? (r.results as Record<string, unknown>[])
+          : msg.type === 'attack_result'
+            ? ([r?.attack, r?.damage] as Record<string, unknown>[])
+            : [r];
+        for (const roll of rolls) {
+          if (roll?.notation && roll?.individual_rolls) {
+            dispatch({
+              type: 'ADD_DICE_RESULT',
+              notation: roll.notation as string,
+              rolls: roll.individual_rolls as number[],
+              total: (roll.total as number) ?? 0,
+              modifier: roll.modifier as number | undefined,
+            });
+          }
         }
         break;
       }
       case 'turn_complete':
         dispatch({ type: 'TURN_COMPLETE' });
-        fetchCharacter(activeCharacter);
+        break;
+      case 'character_patch':
+        // Sheet changes (including background bookkeeping) arrive as field patches
+        if (msg.character === activeCharacter) {
+          dispatch({ type: 'PATCH_CHARACTER', changes: msg.changes as Partial<CharacterSheetFields> });
+        }
         break;
       case 'open_character_sheet':
-        setSheetOpen(true);
+        openSheet();
         break;
       case 'error':
         console.error('Agent error:', msg.error);
         dispatch({ type: 'TURN_COMPLETE' });
         break;
     }
-  }, [fetchCharacter, activeCharacter]);
+  }, [openSheet, activeCharacter]);
 
   const wsQueryString = useMemo(
     () => new URLSearchParams({ campaign: session.campaign, character: activeCharacter }).toString(),
@@ -264,6 +316,11 @@ function GameView({ session, onLeave }: { session: SessionConfig; onLeave: () =>
     sendMessage({ type: 'user_input', content: text });
   }, [wsStatus, state.isAgentTyping, sendMessage]);
 
+  // Cancels the DM's current response; the server still ends the turn with turn_complete
+  const handleStop = useCallback(() => {
+    sendMessage({ type: 'interrupt' });
+  }, [sendMessage]);
+
   const isDisabled = wsStatus !== 'connected' || state.isAgentTyping;
 
   return (
@@ -275,7 +332,7 @@ function GameView({ session, onLeave }: { session: SessionConfig; onLeave: () =>
           character={state.character}
           campaign={session.campaign}
           activeCharacter={activeCharacter}
-          onOpenSheet={() => setSheetOpen(true)}
+          onOpenSheet={openSheet}
           onSelectCharacter={handleSelectCharacter}
         />
 
@@ -287,7 +344,11 @@ function GameView({ session, onLeave }: { session: SessionConfig; onLeave: () =>
         </div>
       </div>
 
-      <InputBar onSend={handleSend} disabled={isDisabled} />
+      <InputBar
+        onSend={handleSend}
+        disabled={isDisabled}
+        onStop={wsStatus === 'connected' && state.isAgentTyping ? handleStop : undefined}
+      />
 
       {sheetOpen && state.characterMarkdown && (
         <CharacterSheetModal
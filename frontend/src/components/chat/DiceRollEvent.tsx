@@ -2,7 +2,7 @@ interface Props {
   notation: string;
   rolls: number[];
   total: number;
-  modifier: number;
+  modifier?: number;
 }
 
 export function DiceRollEvent({ notation, rolls, total }: Props) {
@@ -4,9 +4,10 @@ import { MessageInput } from './MessageInput';
 interface Props {
   onSend: (text: string) => void;
   disabled: boolean;
+  onStop?: () => void;
 }
 
-export function InputBar({ onSend, disabled }: Props) {
+export function InputBar({ onSend, disabled, onStop }: Props) {
   const handleDiceRoll = (die: string) => {
     onSend(`Roll a ${die}`);
   };
@@ -14,7 +15,7 @@ export function InputBar({ onSend, disabled }: Props) {
   return (
     <div className="input-bar">
       <DiceButtons onRoll={handleDiceRoll} disabled={disabled} />
-      <MessageInput onSend={onSend} disabled={disabled} />
+      <MessageInput onSend={onSend} disabled={disabled} onStop={onStop} />
     </div>
   );
 }
@@ -4,9 +4,11 @@ import type { KeyboardEvent } from 'react';
 interface Props {
   onSend: (text: string) => void;
   disabled: boolean;
+  /** While the DM is responding, replaces Send with a Stop button */
+  onStop?: () => void;
 }
 
-export function MessageInput({ onSend, disabled }: Props) {
+export function MessageInput({ onSend, disabled, onStop }: Props) {
   const [value, setValue] = useState('');
 
   const handleSend = () => {
@@ -34,9 +36,15 @@ export function MessageInput({ onSend, disabled }: Props) {
         disabled={disabled}
         rows={1}
       />
-      <button className="send-btn" onClick={handleSend} disabled={disabled || !value.trim()}>
-        Send
-      </button>
+      {onStop ? (
+        <button className="send-btn" onClick={onStop}>
+          Stop
+        </button>
+      ) : (
+        <button className="send-btn" onClick={handleSend} disabled={disabled || !value.trim()}>
+          Send
+        </button>
+      )}
     </div>
   );
 }
@@ -26,3 +26,50 @@ export function parseCharacterMarkdown(markdown: string): CharacterData | null {
     return null;
   }
 }
+
+/** Structured fields served by the backend character store (`sheet` in /api/character). */
+export interface CharacterSheetFields {
+  name: string;
+  class_level: string;
+  race: string;
+  hp_current: number;
+  hp_max: number;
+  ac: number;
+  speed: number;
+  conditions: string[];
+  spell_slots: Record<string, { total: number; used: number }>;
+}
+
+export function characterFromSheet(sheet: CharacterSheetFields): CharacterData {
+  const firstLevel = sheet.spell_slots?.['1st'];
+  return {
+    name: sheet.name,
+    classLevel: sheet.class_level,
+    race: sheet.race,
+    hp_current: sheet.hp_current,
+    hp_max: sheet.hp_max,
+    ac: sheet.ac,
+    speed: sheet.speed,
+    conditions: sheet.conditions ?? [],
+    spell_slots_total: firstLevel?.total ?? 0,
+    spell_slots_used: firstLevel?.used ?? 0,
+  };
+}
+
+/** Apply a `character_patch` (changed sheet fields only) to the current character data. */
+export function applyCharacterPatch(data: CharacterData, changes: Partial<CharacterSheetFields>): CharacterData {
+  const next = { ...data };
+  if (changes.name !== undefined) next.name = changes.name;
+  if (changes.class_level !== undefined) next.classLevel = changes.class_level;
+  if (changes.race !== undefined) next.race = changes.race;
+  if (changes.hp_current !== undefined) next.hp_current = changes.hp_current;
+  if (changes.hp_max !== undefined) next.hp_max = changes.hp_max;
+  if (changes.ac !== undefined) next.ac = changes.ac;
+  if (changes.speed !== undefined) next.speed = changes.speed;
+  if (changes.conditions !== undefined) next.conditions = changes.conditions;
+  if (changes.spell_slots !== undefined) {
+    next.spell_slots_total = changes.spell_slots['1st']?.total ?? 0;
+    next.spell_slots_used = changes.spell_slots['1st']?.used ?? 0;
+  }
+  return next;
+}
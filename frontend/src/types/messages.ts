@@ -1,17 +1,30 @@
-export type ServerMessageType = 'text_chunk' | 'tool_use' | 'tool_result' | 'turn_complete' | 'error' | 'open_character_sheet';
+export type ServerMessageType = 'text_delta' | 'text_chunk' | 'tool_use' | 'dice_result' | 'dice_odds' | 'campaign_created' | 'character_updated' | 'campaign_event' | 'attack_result' | 'turn_complete' | 'bookkeeping_complete' | 'character_patch' | 'error' | 'open_character_sheet' | 'session_resumed';
 
+/** Partial narration as it is generated; the text_chunk for the block replaces the deltas */
+export interface TextDeltaMessage { type: 'text_delta'; content: string; }
 export interface TextChunkMessage { type: 'text_chunk'; content: string; }
 export interface ToolUseMessage { type: 'tool_use'; tool_name: string; tool_input: Record<string, unknown>; display_name: string; }
-export interface ToolResultMessage { type: 'tool_result'; result: Record<string, unknown>; }
+/** A dnd tool's result, as the tool returned it (schemas in dnd_dm_agent/tool_results.py) */
+export interface TypedResultMessage {
+  type: 'dice_result' | 'dice_odds' | 'campaign_created' | 'character_updated' | 'campaign_event' | 'attack_result';
+  tool: string;
+  result: Record<string, unknown>;
+}
 export interface TurnCompleteMessage { type: 'turn_complete'; }
+export interface BookkeepingCompleteMessage { type: 'bookkeeping_complete'; files: string[]; }
+/** Only the character sheet fields (server `sheet` keys) that changed since the last patch */
+export interface CharacterPatchMessage { type: 'character_patch'; character: string; etag: string; changes: Record<string, unknown>; }
 export interface ErrorMessage { type: 'error'; error: string; }
 export interface OpenCharacterSheetMessage { type: 'open_character_sheet'; }
-export type ServerMessage = TextChunkMessage | ToolUseMessage | ToolResultMessage | TurnCompleteMessage | ErrorMessage | OpenCharacterSheetMessage;
+/** Sent on reconnecting to a live session, before the events buffered while away are replayed */
+export interface SessionResumedMessage { type: 'session_resumed'; replayed: number; turn_in_progress: boolean; }
+export type ServerMessage = TextDeltaMessage | TextChunkMessage | ToolUseMessage | TypedResultMessage | TurnCompleteMessage | BookkeepingCompleteMessage | CharacterPatchMessage | ErrorMessage | OpenCharacterSheetMessage | SessionResumedMessage;
 
 export type ChatEntry =
   | { id: string; kind: 'player'; content: string }
-  | { id: string; kind: 'dm'; content: string; isComplete: boolean }
-  | { id: string; kind: 'dice'; notation: string; rolls: number[]; total: number; modifier: number }
+  // pending: length of the streamed tail not yet replaced by its complete text_chunk
+  | { id: string; kind: 'dm'; content: string; isComplete: boolean; pending?: number }
+  | { id: string; kind: 'dice'; notation: string; rolls: number[]; total: number; modifier?: number }
   | { id: string; kind: 'tool_indicator'; display_name: string }
   | { id: string; kind: 'system'; content: string };
 
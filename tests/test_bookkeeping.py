@@ -0,0 +1,210 @@
+"""Tests for background post-turn bookkeeping."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+
+from dnd_dm_agent.bookkeeping import BookkeepingWorker, Exchange, FileClaims, _copy_on_write, session_files
+
+
+def _assistant(*blocks):
+    return AssistantMessage(content=list(blocks), model="fake")
+
+
+def _result():
+    return ResultMessage(
+        subtype="success", duration_ms=1, duration_api_ms=1, is_error=False, num_turns=1, session_id="fake"
+    )
+
+
+class FakeBookkeeper:
+    """Stand-in client that edits the character sheet on every pass."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.prompts: list[str] = []
+        self.disconnected = False
+
+    async def query(self, prompt, session_id="default"):
+        self.prompts.append(prompt)
+
+    async def receive_response(self):
+        await asyncio.sleep(self.delay)
+        yield _assistant(ToolUseBlock(id="t1", name="Edit", input={"file_path": "campaigns/brew/characters/thork.md"}))
+        yield _result()
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+def _worker(client, claims, **kwargs):
+    async def connect():
+        return client
+
+    async def disconnect(c):
+        await c.disconnect()
+
+    return BookkeepingWorker(connect, disconnect, campaign="brew", character="thork", claims=claims, **kwargs)
+
+
+def test_exchange_observe():
+    """Test an exchange records narration, tool calls and file targets."""
+    exchange = Exchange(player_input="I drink the potion")
+    exchange.observe(
+        _assistant(
+            TextBlock(text="You feel better."),
+            ToolUseBlock(id="t1", name="Read", input={"file_path": "campaigns/brew/characters/thork.md"}),
+        )
+    )
+    assert exchange.narration == ["You feel better."]
+    assert any(path.endswith("campaigns/brew/characters/thork.md") for path in exchange.files)
+    transcript = exchange.transcript()
+    assert "Player: I drink the potion" in transcript
+    assert "DM: You feel better." in transcript
+
+
+def test_exchange_tracks_state_changes():
+    """Test dice results, sheet access and HP/condition mentions mark an exchange dirty."""
+    exchange = Exchange(player_input="I swing my axe")
+    assert not exchange.dirty
+    exchange.observe(
+        _assistant(
+            ToolUseBlock(id="r1", name="mcp__dnd__roll_dice", input={"notation": "1d20+5"}),
+            ToolUseBlock(id="t1", name="Read", input={"file_path": "campaigns/brew/characters/thork.md"}),
+        )
+    )
+    exchange.observe(
+        UserMessage(
+            content=[
+                ToolResultBlock(tool_use_id="r1", content=[{"type": "text", "text": "{'total': 17}"}]),
+            ]
+        )
+    )
+    exchange.observe(_assistant(TextBlock(text="The goblin is knocked prone and loses 7 hit points.")))
+    assert exchange.changes == [
+        "read character sheet thork",
+        "dice: {'total': 17}",
+        "narration mentions hit points, prone",
+    ]
+    assert "Detected changes: read character sheet thork" in exchange.transcript()
+
+
+@pytest.mark.asyncio
+async def test_worker_skips_clean_exchanges():
+    """Test pure roleplay turns never start a bookkeeping pass."""
+    claims = FileClaims()
+    client = FakeBookkeeper()
+    worker = _worker(client, claims)
+
+    exchange = Exchange(player_input="I ask the innkeeper about the weather")
+    exchange.observe(_assistant(TextBlock(text='"Rain by nightfall," she says.')))
+    assert not worker.submit(exchange)
+    assert not any(claims.is_claimed(p) for p in session_files("brew", "thork"))
+    await worker.close()
+
+    assert client.prompts == []
+    assert worker.passes_skipped == 1 and worker.passes_run == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_in_background_and_releases_claims():
+    """Test submit returns immediately, claims session files, and releases them after the pass."""
+    claims = FileClaims()
+    client = FakeBookkeeper(delay=0.05)
+    completed = []
+
+    async def on_complete(files):
+        completed.append(files)
+
+    worker = _worker(client, claims, on_complete=on_complete)
+    sheet = next(iter(p for p in session_files("brew", "thork") if p.endswith("thork.md")))
+
+    worker.submit(Exchange(player_input="I attack the rat for 4 damage"))
+    assert claims.is_claimed(sheet)
+    assert not client.prompts  # nothing ran on the caller's path
+
+    assert await claims.wait(sheet, timeout=1)
+    await worker.drain()
+    assert not claims.is_claimed(sheet)
+    assert completed == [{"campaigns/brew/characters/thork.md"}]
+    assert "I attack the rat" in client.prompts[0]
+    assert "Detected changes: player mentions damage" in client.prompts[0]
+
+    await worker.close()
+    assert client.disconnected
+
+
+@pytest.mark.asyncio
+async def test_worker_merges_backlog_into_one_pass():
+    """Test exchanges submitted while a pass is running are merged into the next pass."""
+    claims = FileClaims()
+    client = FakeBookkeeper(delay=0.05)
+    worker = _worker(client, claims)
+
+    worker.submit(Exchange(player_input="turn one: I cast a spell"))
+    await asyncio.sleep(0.01)
+    worker.submit(Exchange(player_input="turn two: I cast a spell"))
+    worker.submit(Exchange(player_input="turn three: I cast a spell"))
+    await worker.close()
+
+    assert len(client.prompts) == 2
+    assert "turn two" in client.prompts[1] and "turn three" in client.prompts[1]
+    assert worker.exchanges_merged == 1
+    assert not any(claims.is_claimed(p) for p in session_files("brew", "thork"))
+
+
+@pytest.mark.asyncio
+async def test_unclaimed_files_do_not_wait():
+    """Test a file no pass holds is available immediately."""
+    claims = FileClaims()
+    claims.claim({"/tmp/a.md"})
+    assert await claims.wait("/tmp/b.md", timeout=0.01)
+    assert not await claims.wait("/tmp/a.md", timeout=0.01)
+    claims.release({"/tmp/a.md"})
+    assert await claims.wait("/tmp/a.md", timeout=0.01)
+
+
+@pytest.fixture
+def layered_instance(tmp_path):
+    (tmp_path / "templates" / "tiny").mkdir(parents=True)
+    (tmp_path / "templates" / "tiny" / "npcs.md").write_text("# NPCs\n")
+    (tmp_path / "campaigns" / "tiny_party1").mkdir(parents=True)
+    with (
+        patch("dnd_dm_agent.bookkeeping.CAMPAIGNS_DIR", tmp_path / "campaigns"),
+        patch("dnd_dm_agent.tools.campaign_instance_tools.TEMPLATES_DIR", tmp_path / "templates"),
+    ):
+        yield tmp_path / "templates" / "tiny" / "npcs.md", tmp_path / "campaigns" / "tiny_party1" / "npcs.md"
+
+
+async def _hook(tool_name, path):
+    return await _copy_on_write({"tool_name": tool_name, "tool_input": {"file_path": str(path)}}, None, None)
+
+
+@pytest.mark.asyncio
+async def test_copy_on_write_read_then_edit_of_missing_document(layered_instance):
+    """Test a Read of a document the instance lacks materializes it in place, so the Edit after it is current."""
+    template, document = layered_instance
+    assert await _hook("Read", document) == {}
+    assert document.read_text() == "# NPCs\n"
+    assert document.stat().st_mtime_ns == template.stat().st_mtime_ns
+    read_mtime = document.stat().st_mtime_ns
+
+    assert await _hook("Edit", document) == {}
+    assert document.stat().st_mtime_ns == read_mtime
+
+
+@pytest.mark.asyncio
+async def test_copy_on_write_read_then_edit_of_hardlinked_document(layered_instance):
+    """Test a Read of a hardlinked document reads it as is, and the Edit breaks the link keeping the mtime."""
+    template, document = layered_instance
+    os.link(template, document)
+    assert await _hook("Read", document) == {}
+    assert document.stat().st_nlink == 2
+    read_mtime = document.stat().st_mtime_ns
+
+    assert await _hook("Edit", document) == {}
+    assert document.stat().st_nlink == 1 and template.stat().st_nlink == 1
+    assert document.stat().st_mtime_ns == read_mtime
@@ -0,0 +1,45 @@
+"""Tests for the cached campaign directory index."""
+
+import os
+
+import pytest
+
+from dnd_dm_agent.campaign_index import CampaignIndex
+
+
+def _touch_later(path):
+    """Bump a directory's mtime so coarse filesystem clocks still register the change."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.mark.asyncio
+async def test_listings_are_cached_until_the_directory_changes(tmp_path):
+    """Test repeated listings reuse the index and new entries invalidate it."""
+    (tmp_path / "brew_party1" / "characters").mkdir(parents=True)
+    (tmp_path / "brew_party1" / "characters" / "thork.md").write_text("# Thork")
+    index = CampaignIndex(tmp_path, max_workers=1)
+
+    first = await index.instances()
+    assert first.names == ["brew_party1"]
+    assert await index.instances() == first
+    assert index.scans == 1
+
+    (tmp_path / "brew_party2").mkdir()
+    _touch_later(tmp_path)
+    second = await index.instances()
+    assert second.names == ["brew_party1", "brew_party2"]
+    assert second.etag != first.etag
+
+    characters = await index.characters("brew_party1")
+    assert characters.names == ["thork"]
+    index.close()
+
+
+@pytest.mark.asyncio
+async def test_missing_directories_list_empty(tmp_path):
+    """Test a missing campaigns or characters directory lists nothing."""
+    index = CampaignIndex(tmp_path / "missing", max_workers=1)
+    assert (await index.instances()).names == []
+    assert (await index.characters("nope")).names == []
+    index.close()
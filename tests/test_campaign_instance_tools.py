@@ -2,11 +2,20 @@
 
 import pytest
 from pathlib import Path
+import stat
 import tempfile
 import shutil
 from unittest.mock import patch
+from pydantic import ValidationError
 
-from dnd_dm_agent.tools.campaign_instance_tools import create_campaign_instance, PROJECT_ROOT
+from dnd_dm_agent.server import CampaignBatch
+from dnd_dm_agent.tools.campaign_instance_tools import (
+    create_campaign_instance,
+    create_campaign_instances,
+    instance_file,
+    link_file,
+    materialize,
+)
 
 
 @pytest.fixture
@@ -36,7 +45,7 @@ def test_create_campaign_instance_from_real_template(temp_campaigns_dir):
 
         # Check campaign-specific files created
         assert (instance_path / "campaign_progress.md").exists()
-        assert (instance_path / "campaign_log.md").exists()
+        assert (instance_path / "events" / "events-000001.jsonl").exists()
         assert (instance_path / "characters").is_dir()
 
         # Verify content structure
@@ -56,3 +65,87 @@ def test_create_campaign_instance_already_exists(temp_campaigns_dir):
         result2 = create_campaign_instance("a_most_potent_brew", "test_party")
         assert result2["status"] == "error"
         assert "already exists" in result2["error_message"]
+
+
+@pytest.fixture
+def small_template(temp_campaigns_dir):
+    """A throwaway template and campaigns directory, so tests never touch the real template."""
+    templates = temp_campaigns_dir / "templates"
+    (templates / "tiny").mkdir(parents=True)
+    (templates / "tiny" / "npcs.md").write_text("# NPCs\n\n## Bob\n\nFriendly.\n")
+    campaigns = temp_campaigns_dir / "campaigns"
+    with (
+        patch("dnd_dm_agent.tools.campaign_instance_tools.CAMPAIGNS_DIR", campaigns),
+        patch("dnd_dm_agent.tools.campaign_instance_tools.TEMPLATES_DIR", templates),
+    ):
+        yield templates / "tiny", campaigns
+
+
+def test_template_files_are_shared_not_copied(small_template):
+    """Test instance documents are linked to the template, or read through to it."""
+    template, campaigns = small_template
+    result = create_campaign_instance("tiny", "party1")
+    assert result["status"] == "success"
+
+    instance = campaigns / "tiny_party1"
+    own = instance / "npcs.md"
+    if own.exists() and "hardlink" in result["files_copied"]:
+        assert own.stat().st_ino == (template / "npcs.md").stat().st_ino
+        assert not own.stat().st_mode & stat.S_IWUSR  # writes must go through materialize
+    assert instance_file(instance, "npcs.md").read_text() == (template / "npcs.md").read_text()
+    assert instance_file(instance, "encounters.md") is None
+
+
+def test_materialize_keeps_the_template_unchanged(small_template):
+    """Test a document is given its own data before it is modified."""
+    template, campaigns = small_template
+    create_campaign_instance("tiny", "party1")
+    create_campaign_instance("tiny", "party2")
+    own = campaigns / "tiny_party1" / "npcs.md"
+
+    materialize(own)
+    own.write_text("# NPCs\n\n## Bob\n\nHostile now.\n")
+    assert not materialize(own)  # already private
+
+    assert "Friendly" in (template / "npcs.md").read_text()
+    assert "Friendly" in instance_file(campaigns / "tiny_party2", "npcs.md").read_text()
+    assert own.stat().st_nlink == 1
+    assert own.stat().st_mode & stat.S_IWUSR
+
+
+def test_link_file_falls_back_to_nothing(temp_campaigns_dir):
+    """Test link_file reports how it shared the file, and writes nothing when it cannot link."""
+    src = temp_campaigns_dir / "src.md"
+    src.write_text("shared")
+    assert link_file(src, temp_campaigns_dir / "dst.md") in ("reflink", "hardlink")
+    with (
+        patch("os.link", side_effect=OSError("cross-device link")),
+        patch("dnd_dm_agent.tools.campaign_instance_tools._reflink", side_effect=OSError),
+    ):
+        assert link_file(src, temp_campaigns_dir / "other.md") is None
+    assert not (temp_campaigns_dir / "other.md").exists()
+
+
+def test_create_campaign_instances_in_bulk(small_template):
+    """Test the bulk API creates each new instance and reports the ones that exist."""
+    _, campaigns = small_template
+    create_campaign_instance("tiny", "table2")
+    result = create_campaign_instances("tiny", ["table1", "table2", "table3", "table1"])
+    assert result["status"] == "success"
+    assert result["created"] == ["tiny_table1", "tiny_table3"]
+    assert "already exists" in result["errors"]["table2"]
+    assert (campaigns / "tiny_table3" / "campaign_progress.md").exists()
+
+    missing = create_campaign_instances("no_such_template", ["x"])
+    assert missing["status"] == "error" and "not found" in missing["error_message"]
+
+
+@pytest.mark.parametrize("template, name", [("tiny", "../../x"), ("tiny", "a/b"), ("..", "x"), ("tiny", "")])
+def test_names_that_could_leave_the_campaigns_dir_are_rejected(small_template, template, name):
+    """Test a template or instance name other than a plain name is refused before anything is created."""
+    _, campaigns = small_template
+    assert "Invalid" in create_campaign_instance(template, name)["error_message"]
+    assert not campaigns.exists()
+    assert create_campaign_instances(template, [name])["status"] == "error"
+    with pytest.raises(ValidationError):
+        CampaignBatch(template=template, instances=[name])
@@ -0,0 +1,61 @@
+"""Tests for the campaign section index."""
+
+from dnd_dm_agent.campaign_sections import chunk_document, section_index
+from dnd_dm_agent.tools.campaign_section_tools import get_campaign_section
+
+GUIDE = """# Test Campaign - Campaign Guide
+
+## Act 1: The Cellar
+
+Rats everywhere.
+
+### Beat 1.1: The Job Offer
+Meet the owner.
+
+### Beat 1.2: Into the Cellar
+Fight the rats.
+
+## Branching Outcomes
+It depends.
+"""
+
+
+def test_chunk_document_nests_subsections():
+    """Test an act carries its beats and beats are addressable on their own."""
+    sections = {s.id: s for s in chunk_document("campaign_guide", GUIDE)}
+    act = sections["campaign_guide/act-1-the-cellar"]
+    assert act.kind == "act"
+    assert "Meet the owner." in act.text and "Fight the rats." in act.text
+    assert "It depends." not in act.text
+    beat = sections["campaign_guide/beat-1-2-into-the-cellar"]
+    assert beat.kind == "beat" and beat.text == "### Beat 1.2: Into the Cellar\nFight the rats."
+    assert sections["campaign_guide/branching-outcomes"].kind == "guide"
+
+
+def test_section_index_is_cached_until_a_file_changes(tmp_path):
+    """Test the index is reused until one of the campaign documents changes."""
+    (tmp_path / "campaign_guide.md").write_text(GUIDE)
+    index = section_index(tmp_path)
+    assert section_index(tmp_path) is index
+    assert index.find("beat 1.1").id == "campaign_guide/beat-1-1-the-job-offer"
+
+    (tmp_path / "npcs.md").write_text("# NPCs\n\n## Glowkindle (Brewery Owner)\nA gnome.\n")
+    updated = section_index(tmp_path)
+    assert updated is not index
+    assert updated.find("glowkindle").kind == "npc"
+
+
+def test_get_campaign_section_from_template():
+    """Test the tool serves the table of contents and single sections of a real template."""
+    toc = get_campaign_section("a_most_potent_brew")
+    assert toc["status"] == "success"
+    ids = [entry["id"] for entry in toc["table_of_contents"]]
+    assert "campaign_guide/beat-1-2-into-the-cellar" in ids
+
+    beat = get_campaign_section("a_most_potent_brew", "Beat 1.2")
+    assert beat["status"] == "success"
+    assert beat["text"].startswith("### Beat 1.2: Into the Cellar")
+    assert "Beat 1.3" not in beat["text"]
+
+    assert get_campaign_section("a_most_potent_brew", "no such section")["status"] == "error"
+    assert get_campaign_section("../dnd_dm_agent")["status"] == "error"
@@ -0,0 +1,144 @@
+"""Tests for the structured character store."""
+
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from dnd_dm_agent.character_store import (
+    CharacterPatcher,
+    CharacterStore,
+    parse_character_sheet,
+    render_character_sheet,
+)
+
+TEMPLATE_SHEET = (
+    Path(__file__).parent.parent
+    / "available_campaigns"
+    / "a_most_potent_brew"
+    / "pregenerated_characters"
+    / "halfling_wizard.md"
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    characters = tmp_path / "brew_party1" / "characters"
+    characters.mkdir(parents=True)
+    shutil.copy(TEMPLATE_SHEET, characters / "sapphire.md")
+    store = CharacterStore(tmp_path, db_path=":memory:")
+    yield store
+    store.close()
+
+
+def test_parse_character_sheet():
+    """Test a pregenerated sheet parses into structured fields."""
+    fields = parse_character_sheet(TEMPLATE_SHEET.read_text())
+    assert fields["name"] == "Sapphire Star"
+    assert fields["class_level"] == "Wizard 1"
+    assert (fields["hp_current"], fields["hp_max"], fields["ac"], fields["speed"]) == (8, 8, 13, 25)
+    assert fields["spell_slots"] == {"1st": {"total": 2, "used": 0}}
+    assert fields["conditions"] == []
+    assert fields["gold"] == 10
+    assert "Spellbook" in fields["inventory"]
+
+
+def test_render_only_rewrites_changed_cells():
+    """Test rendering updates the tracked cells and keeps the rest verbatim."""
+    markdown = TEMPLATE_SHEET.read_text()
+    rendered = render_character_sheet(
+        markdown,
+        {
+            "hp_current": 3,
+            "conditions": ["prone"],
+            "spell_slots": {"1st": {"used": 1}},
+        },
+    )
+    assert "| **Hit Points** | 3 / 8 | Hit Die: d6 |" in rendered
+    assert "| **Conditions** | prone | |" in rendered
+    assert "| **1st** | 2 | 1 | 1 |" in rendered
+    fields = parse_character_sheet(rendered)
+    assert fields["conditions"] == ["prone"]
+    assert rendered.replace("| **Conditions** | prone | |\n", "").count("\n") == markdown.count("\n")
+
+
+def test_reads_are_indexed_until_the_sheet_changes(store):
+    """Test repeated reads reuse the index and an external edit is re-parsed with a new ETag."""
+    first = store.get("brew_party1", "sapphire")
+    again = store.get("brew_party1", "sapphire")
+    assert store.parses == 1
+    assert again["etag"] == first["etag"]
+
+    path = store.sheet_path("brew_party1", "sapphire")
+    path.write_text(path.read_text().replace("8 / 8", "5 / 8"))
+    edited = store.get("brew_party1", "sapphire")
+    assert store.parses == 2
+    assert edited["fields"]["hp_current"] == 5
+    assert edited["etag"] != first["etag"]
+    assert store.get("brew_party1", "missing") is None
+
+
+def test_update_renders_markdown(store):
+    """Test field updates are written to the markdown sheet and re-indexed."""
+    record = store.update("brew_party1", "sapphire", {"hp_current": 2, "gold": 4})
+    assert record["fields"]["hp_current"] == 2 and record["fields"]["gold"] == 4
+    assert "**Gold Pieces (GP):** 4" in store.sheet_path("brew_party1", "sapphire").read_text()
+    assert store.get("brew_party1", "sapphire")["etag"] == record["etag"]
+    with pytest.raises(ValueError):
+        store.update("brew_party1", "sapphire", {"name": "Bob"})
+
+
+def test_concurrent_updates_from_separate_stores_are_not_lost(store, tmp_path):
+    """Test updates through two stores (as on two workers) serialize on the sheet."""
+    other = CharacterStore(tmp_path, db_path=":memory:")
+    store.get("brew_party1", "sapphire")
+    other.get("brew_party1", "sapphire")
+
+    def run(target, field, start):
+        for i in range(20):
+            target.update("brew_party1", "sapphire", {field: start + i})
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for future in [pool.submit(run, store, "gold", 0), pool.submit(run, other, "xp", 100)]:
+            future.result()
+    other.close()
+
+    fields = parse_character_sheet(store.sheet_path("brew_party1", "sapphire").read_text())
+    assert fields["gold"] == 19 and fields["xp"] == 119
+
+
+def test_patcher_reports_only_changed_fields(store):
+    """Test the patcher emits a patch with just the fields changed since the last refresh."""
+    patcher = CharacterPatcher(store, "brew_party1", "sapphire")
+    patcher.snapshot()
+    assert patcher.refresh() is None
+
+    store.update("brew_party1", "sapphire", {"hp_current": 4, "conditions": ["poisoned"]})
+    patch = patcher.refresh()
+    assert patch["type"] == "character_patch"
+    assert patch["changes"] == {"hp_current": 4, "conditions": ["poisoned"]}
+    assert patcher.refresh() is None
+    assert patcher.is_sheet(store.sheet_path("brew_party1", "sapphire"))
+
+
+def test_parse_attacks_table():
+    """Test the Attacks & Weapons table parses into bonus, damage and type per weapon."""
+    fields = parse_character_sheet(TEMPLATE_SHEET.read_text())
+    assert fields["attacks"][0] == {"name": "Dagger", "attack_bonus": 5, "damage": "1d4+3", "damage_type": "Piercing"}
+    assert [a["name"] for a in fields["attacks"]] == ["Dagger", "Light Crossbow"]
+
+
+def test_update_replaces_the_sheet_atomically(store, tmp_path, monkeypatch):
+    """Test a failed write leaves the previous sheet whole, with no temp file behind."""
+    sheet = tmp_path / "brew_party1" / "characters" / "sapphire.md"
+    before = sheet.read_text()
+
+    def crash(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("dnd_dm_agent.file_locks.os.fsync", crash)
+    with pytest.raises(OSError):
+        store.update("brew_party1", "sapphire", {"hp_current": 3})
+    assert sheet.read_text() == before
+    assert sorted(p.name for p in sheet.parent.iterdir()) == [".sapphire.md.lock", "sapphire.md"]
@@ -0,0 +1,125 @@
+"""Tests for the pre-warmed client pool."""
+
+import asyncio
+
+import pytest
+
+from dnd_dm_agent.client_pool import ClientPool
+
+
+class FakeClient:
+    """Stand-in for ClaudeSDKClient that records calls."""
+
+    def __init__(self, connect_delay: float = 0.0, fail: bool = False):
+        self.connect_delay = connect_delay
+        self.fail = fail
+        self.connected = False
+        self.queries: list[str] = []
+
+    async def connect(self):
+        await asyncio.sleep(self.connect_delay)
+        if self.fail:
+            raise RuntimeError("connect failed")
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def query(self, prompt, session_id="default"):
+        self.queries.append(prompt)
+
+
+@pytest.mark.asyncio
+async def test_pool_warms_and_hands_out_clients():
+    """Test warm clients are served as hits and the pool refills."""
+    created = []
+
+    def factory():
+        created.append(FakeClient())
+        return created[-1]
+
+    pool = ClientPool(factory, size=2)
+    pool.start()
+    await asyncio.sleep(0.01)
+    assert pool.stats()["ready"] == 2
+
+    client = await pool.acquire("a_most_potent_brew_party1", "thork")
+    assert client.connected
+    stats = pool.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 0
+    assert stats["time_to_ready_avg"] is not None
+
+    await asyncio.sleep(0.01)
+    assert pool.stats()["ready"] == 2
+    assert len(created) == 3
+
+    await pool.release(client)
+    assert not client.connected
+    await pool.close()
+    assert not any(c.connected for c in created)
+
+
+@pytest.mark.asyncio
+async def test_pool_miss_connects_inline():
+    """Test an empty pool still serves a client, counted as a miss."""
+    pool = ClientPool(FakeClient, size=0)
+    pool.start()
+    client = await pool.acquire()
+    assert client.connected
+    assert pool.stats()["misses"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_bound_client_injects_session_context_once():
+    """Test campaign/character context is prefixed onto the first query only."""
+    pool = ClientPool(FakeClient, size=0)
+    client = await pool.acquire("brew_party1", "thork")
+    await client.query("I open the door")
+    await client.query("I look around")
+    first, second = client.client.queries
+    assert "Campaign: brew_party1" in first and "Active character: thork" in first
+    assert first.endswith("I open the door")
+    assert second == "I look around"
+
+
+@pytest.mark.asyncio
+async def test_pool_retries_failed_warmups():
+    """Test warm-up failures are counted and retried."""
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        return FakeClient(fail=len(attempts) == 1)
+
+    pool = ClientPool(factory, size=1, retry_delay=0)
+    pool.start()
+    await asyncio.sleep(0.01)
+    stats = pool.stats()
+    assert stats["warm_failures"] == 1
+    assert stats["ready"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_pauses_warming_after_repeated_failures(caplog):
+    """Test a connect that keeps failing stops being retried and logs one error, until a session connects."""
+    failing = [True]
+
+    def factory():
+        return FakeClient(fail=failing[0])
+
+    pool = ClientPool(factory, size=1, retry_delay=0, max_failures=3)
+    pool.start()
+    await asyncio.sleep(0.05)
+    stats = pool.stats()
+    assert stats["warm_failures"] == 3 and stats["warming_paused"]
+    assert stats["warming"] == 0 and stats["ready"] == 0
+    assert [record.levelname for record in caplog.records] == ["ERROR", "WARNING", "WARNING"]
+
+    failing[0] = False
+    bound = await pool.acquire()
+    assert bound.client.connected
+    await asyncio.sleep(0.01)
+    assert not pool.stats()["warming_paused"] and pool.stats()["ready"] == 1
+    await pool.close()
@@ -0,0 +1,112 @@
+"""Tests for the resolve_attack combat tool."""
+
+import shutil
+from pathlib import Path
+
+import jsonschema
+import pytest
+
+from dnd_dm_agent.character_store import CharacterStore
+from dnd_dm_agent.tool_results import ATTACK_RESULT_SCHEMA
+from dnd_dm_agent.tools import combat_tools
+from dnd_dm_agent.tools.combat_tools import _critical_damage, resolve_attack
+from dnd_dm_agent.tools.utility_tools import roll_dice
+
+PREGENERATED = Path(__file__).parent.parent / "available_campaigns" / "a_most_potent_brew" / "pregenerated_characters"
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    characters = tmp_path / "brew_party1" / "characters"
+    characters.mkdir(parents=True)
+    shutil.copy(PREGENERATED / "dwarf_fighter.md", characters / "dwarf_fighter.md")
+    shutil.copy(PREGENERATED / "halfling_wizard.md", characters / "halfling_wizard.md")
+    store = CharacterStore(tmp_path, db_path=":memory:")
+    monkeypatch.setattr(combat_tools, "character_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def natural(monkeypatch):
+    """Fix the d20 of the attack roll; damage is rolled for real."""
+    rolled = {"d20": 10, "notations": []}
+
+    def fixed_roll(notation):
+        rolled["notations"].append(notation)
+        if not notation.startswith("1d20"):
+            return roll_dice(notation)
+        result = roll_dice(notation.split()[0])
+        result["individual_rolls"] = [rolled["d20"]]
+        result["total"] = rolled["d20"] + result["modifier"]
+        return result
+
+    monkeypatch.setattr(combat_tools, "roll_dice", fixed_roll)
+    return rolled
+
+
+def test_critical_damage_doubles_the_dice_only():
+    """Test a critical hit doubles every damage die but not the modifier."""
+    assert _critical_damage("1d8+3") == "2d8+3"
+    assert _critical_damage("2d6+1d4") == "4d6+2d4"
+    assert _critical_damage("d10") == "2d10"
+
+
+def test_hit_applies_damage_to_the_target_sheet(store, natural):
+    """Test a hit rolls the weapon's damage and takes it off the target's HP on the sheet."""
+    natural["d20"] = 15
+    result = resolve_attack("brew_party1", "dwarf_fighter", "halfling_wizard", weapon="handaxe")
+    assert result["status"] == "success"
+    assert (result["weapon"], result["damage_type"]) == ("Handaxe", "Slashing")
+    assert natural["notations"][0] == "1d20+5"
+    assert result["attack"]["total"] == 20 and result["target_ac"] == 13
+    assert result["hit"] and not result["critical"]
+    dealt = result["damage"]["total"]
+    assert 4 <= dealt <= 9
+    assert result["target_hp"] == {"before": 8, "after": max(0, 8 - dealt), "max": 8}
+    assert store.get("brew_party1", "halfling_wizard")["fields"]["hp_current"] == max(0, 8 - dealt)
+    jsonschema.validate(result, ATTACK_RESULT_SCHEMA)
+
+
+def test_hp_does_not_drop_below_zero(store, natural):
+    """Test damage beyond the target's remaining HP leaves it at 0."""
+    natural["d20"] = 19
+    store.update("brew_party1", "halfling_wizard", {"hp_current": 1})
+    result = resolve_attack("brew_party1", "dwarf_fighter", "halfling_wizard")
+    assert result["weapon"] == "Warhammer"
+    assert result["target_hp"]["after"] == 0
+
+
+def test_natural_20_crits_and_natural_1_misses(store, natural):
+    """Test a natural 20 hits any AC with doubled dice, and a natural 1 misses whatever the total."""
+    natural["d20"] = 20
+    crit = resolve_attack("brew_party1", "halfling_wizard", "Ogre", attack_bonus=0, damage="1d4", target_ac=30)
+    assert crit["hit"] and crit["critical"]
+    assert crit["damage"]["notation"] == "2d4"
+
+    natural["d20"] = 1
+    miss = resolve_attack("brew_party1", "Ogre", "dwarf_fighter", attack_bonus=30, damage="2d8+4")
+    assert not miss["hit"] and miss["damage"] is None and miss["target_hp"] is None
+    assert store.get("brew_party1", "dwarf_fighter")["fields"]["hp_current"] == 12
+    jsonschema.validate(miss, ATTACK_RESULT_SCHEMA)
+
+
+def test_creatures_without_sheets_are_given_inline(store, natural):
+    """Test a monster target's AC and HP come from the call, and its HP is only reported."""
+    natural["d20"] = 12
+    result = resolve_attack("brew_party1", "dwarf_fighter", "Goblin", target_ac=15, target_hp=7)
+    assert result["hit"]
+    assert result["target_hp"]["before"] == 7 and result["target_hp"]["max"] is None
+
+    natural["d20"] = 9
+    assert not resolve_attack("brew_party1", "dwarf_fighter", "Goblin", target_ac=15)["hit"]
+
+
+def test_missing_stats_are_errors(store, natural):
+    """Test an unknown weapon, or a creature without a sheet or inline stats, is reported, not guessed."""
+    result = resolve_attack("brew_party1", "dwarf_fighter", "halfling_wizard", weapon="longbow")
+    assert result == {"status": "error", "error_message": "Weapon 'longbow' not found on dwarf_fighter's sheet"}
+    assert "give attack_bonus and damage" in resolve_attack("brew_party1", "Goblin", "dwarf_fighter")["error_message"]
+    assert "give target_ac" in resolve_attack("brew_party1", "dwarf_fighter", "Goblin")["error_message"]
+    jsonschema.validate(result, ATTACK_RESULT_SCHEMA)
+    assert natural["notations"] == []
@@ -0,0 +1,173 @@
+"""Tests for the vectorized dice engine."""
+
+import numpy as np
+import pytest
+
+from dnd_dm_agent.tools.dice_engine import (
+    DiceSpec,
+    compile_dice_expression,
+    parse_roll_notation,
+    roll_spec,
+    spec_distribution,
+)
+
+
+def test_parse_roll_notation_basic():
+    """Test that plain notation parses like parse_dice_notation."""
+    assert parse_roll_notation("2d6+3") == DiceSpec(count=2, sides=6, modifier=3)
+    assert parse_roll_notation("d20") == DiceSpec(count=1, sides=20)
+
+
+def test_parse_roll_notation_extended():
+    """Test keep/drop, advantage, reroll and exploding notation."""
+    assert parse_roll_notation("4d6kh3") == DiceSpec(count=4, sides=6, keep="h", keep_count=3)
+    assert parse_roll_notation("4d6dl1") == DiceSpec(count=4, sides=6, keep="h", keep_count=3)
+    assert parse_roll_notation("2d20kl1") == DiceSpec(count=2, sides=20, keep="l", keep_count=1)
+    assert parse_roll_notation("1d20+5 adv") == DiceSpec(count=2, sides=20, modifier=5, keep="h", keep_count=1)
+    assert parse_roll_notation("1d20 dis") == DiceSpec(count=2, sides=20, keep="l", keep_count=1)
+    assert parse_roll_notation("2d6r<=2") == DiceSpec(count=2, sides=6, reroll_op="<=", reroll_value=2)
+    assert parse_roll_notation("1d6r1").reroll_op == "="
+    assert parse_roll_notation("1d6!").explode
+
+
+@pytest.mark.parametrize("notation", ["2d6 adv", "d1!", "2d6kh3", "abc", "10000000d6", "1d100000"])
+def test_parse_roll_notation_invalid(notation):
+    """Test that unsupported combinations are rejected."""
+    with pytest.raises(ValueError):
+        parse_roll_notation(notation)
+
+
+def test_roll_spec_keep_highest():
+    """Test that keep-highest keeps the largest dice in every row."""
+    rolls, kept = roll_spec(parse_roll_notation("4d6kh3"), 1000, np.random.default_rng(1))
+    assert rolls.shape == (1000, 4)
+    assert (kept.sum(axis=1) == 3).all()
+    assert ((rolls * kept).sum(axis=1) == np.sort(rolls, axis=1)[:, 1:].sum(axis=1)).all()
+
+
+def test_roll_spec_reroll_and_explode():
+    """Test that rerolls and explosions stay within their bounds."""
+    rng = np.random.default_rng(2)
+    rolls, _ = roll_spec(parse_roll_notation("2d6r<=2"), 1000, rng)
+    assert rolls.min() >= 1 and rolls.max() <= 6
+    # After one reroll, low faces are rarer than high faces
+    assert (rolls <= 2).sum() < (rolls >= 5).sum()
+
+    rolls, _ = roll_spec(parse_roll_notation("1d4!"), 1000, rng)
+    assert rolls.max() > 4
+    assert not (rolls % 4 == 0).any()
+
+
+def test_spec_distribution_sums_and_modifier():
+    """Test plain sums convolve correctly and apply the modifier offset."""
+    offset, probs = spec_distribution(parse_roll_notation("2d6+3"))
+    assert offset == 5
+    assert len(probs) == 11
+    assert probs[7 - 2] == pytest.approx(6 / 36)
+    assert probs.sum() == pytest.approx(1.0)
+
+
+def test_spec_distribution_keep_highest():
+    """Test keep-highest matches brute-force enumeration."""
+    offset, probs = spec_distribution(parse_roll_notation("4d6kh3"))
+    faces = np.indices((6, 6, 6, 6)).reshape(4, -1).T + 1
+    totals = np.sort(faces, axis=1)[:, 1:].sum(axis=1)
+    expected = np.bincount(totals, minlength=19)[3:] / len(totals)
+    assert offset == 3
+    assert probs == pytest.approx(expected)
+
+
+def test_spec_distribution_advantage():
+    """Test advantage on a d20 matches the closed form."""
+    offset, probs = spec_distribution(parse_roll_notation("1d20 adv"))
+    assert offset == 1
+    assert probs == pytest.approx([(2 * v - 1) / 400 for v in range(1, 21)])
+
+
+def test_spec_distribution_cached():
+    """Test equivalent notations share one cached distribution."""
+    assert spec_distribution(parse_roll_notation("4d6dl1")) is spec_distribution(parse_roll_notation("4d6kh3"))
+
+
+def test_compile_dice_expression_grammar():
+    """Test sums, products, negation and variables evaluate correctly."""
+    rng = np.random.default_rng(3)
+    expression = compile_dice_expression("2d6+1d4+3")
+    assert [spec.sides for spec in expression.dice] == [6, 4]
+    rolled = expression.roll(100, rng=rng)
+    dice_sums = sum((rolls * kept).sum(axis=1) for rolls, kept in rolled.dice)
+    assert (rolled.totals == dice_sums + 3).all()
+    assert rolled.modifier == 3
+
+    crit = compile_dice_expression("(1d8+2)*2").roll(100, rng=rng)
+    assert (crit.totals == (crit.dice[0][0][:, 0] + 2) * 2).all()
+
+    assert (compile_dice_expression("-(1d4)").roll(10, rng=rng).totals < 0).all()
+    assert compile_dice_expression("7/2").roll(1).totals[0] == 3
+
+
+def test_compile_dice_expression_variables():
+    """Test one compiled expression binds different modifiers per creature."""
+    expression = compile_dice_expression("1d20 + STR + PROF")
+    assert expression.variables == {"str", "prof"}
+    rolled = expression.roll(3, {"STR": [1, 2, 3], "PROF": 2}, rng=np.random.default_rng(4))
+    assert rolled.modifier.tolist() == [3, 4, 5]
+    assert (rolled.totals == rolled.dice[0][0][:, 0] + rolled.modifier).all()
+    with pytest.raises(ValueError, match="Unbound"):
+        expression.roll(1, {"STR": 1})
+
+
+def test_compile_dice_expression_advantage():
+    """Test a trailing adv/dis applies to the expression's d20."""
+    expression = compile_dice_expression("1d20 + 1d4 + STR adv")
+    assert expression.dice[0] == DiceSpec(count=2, sides=20, keep="h", keep_count=1)
+    assert expression.dice[1] == DiceSpec(count=1, sides=4)
+    assert compile_dice_expression("1d6 dis").dice[0].keep == "l"
+    with pytest.raises(ValueError):
+        compile_dice_expression("2d6 adv")
+
+
+@pytest.mark.parametrize("notation", ["1d20+", "(1d6", "1d6)", "2 d6", "#"])
+def test_compile_dice_expression_invalid(notation):
+    """Test malformed expressions are rejected."""
+    with pytest.raises(ValueError):
+        compile_dice_expression(notation)
+
+
+def test_compile_dice_expression_additive():
+    """Test only expressions whose dice are added unscaled count as dice plus a flat modifier."""
+    for notation in ("2d6+1d4+3", "1d20+STR-2", "-1+(1d8+2)", "5*2+1d6"):
+        assert compile_dice_expression(notation).additive, notation
+    for notation in ("(1d8+2)*2", "10-1d4", "-1d6+3", "1d6/2"):
+        assert not compile_dice_expression(notation).additive, notation
+
+
+def test_compile_dice_expression_cached():
+    """Test equivalent spellings share one compiled expression."""
+    assert compile_dice_expression("1d20 + 5") is compile_dice_expression("1D20+5")
+
+
+def test_large_pool_distribution_keeps_its_bounds():
+    """Test a pool whose tail probabilities underflow still spans its exact minimum and maximum."""
+    offset, probs = spec_distribution(parse_roll_notation("1000d3"))
+    assert (offset, offset + len(probs) - 1) == (1000, 3000)
+    offset, probs = spec_distribution(parse_roll_notation("100d100+5"))
+    assert (offset, offset + len(probs) - 1) == (105, 10005)
+
+
+@pytest.mark.parametrize("notation", ["1000d1000", "300d300", "100d100kh50", "1d1000*1d1000"])
+def test_oversized_distributions_are_rejected(notation):
+    """Test distributions too large to compute promptly raise instead of tying up the caller."""
+    with pytest.raises(ValueError):
+        compile_dice_expression(notation).distribution()
+
+
+def test_expression_distribution():
+    """Test expression distributions combine dice, constants and variables."""
+    offset, probs = compile_dice_expression("1d20-1d4").distribution()
+    assert offset == -3 and len(probs) == 23
+    assert probs.sum() == pytest.approx(1.0)
+
+    offset, probs = compile_dice_expression("(1d4+STR)*2").distribution({"STR": 1})
+    assert offset == 4
+    assert probs[::2] == pytest.approx([0.25] * 4)
@@ -0,0 +1,93 @@
+"""Tests for the append-only campaign event log."""
+
+import json
+from unittest.mock import patch
+
+from dnd_dm_agent import event_log
+from dnd_dm_agent.event_log import EventLog, EventLogs
+from dnd_dm_agent.tools import campaign_log_tools
+
+
+def test_append_and_filtered_tail(tmp_path):
+    """Test the tail returns the last matching events, oldest first."""
+    log = EventLog(tmp_path / "events")
+    log.append("npc_met", "Met Bob", act="Act 1", beat="Beat 1.1")
+    log.append("combat", "Goblins routed", act="Act 1", beat="Beat 1.2")
+    log.append("npc_met", "Met Alice", act="Act 2", beat="Beat 2.1")
+    log.close()
+
+    assert [e["text"] for e in log.tail(2)] == ["Goblins routed", "Met Alice"]
+    assert [e["text"] for e in log.tail(kind="npc_met")] == ["Met Bob", "Met Alice"]
+    assert [e["seq"] for e in log.tail(act="Act 1", beat="Beat 1.2")] == [2]
+    assert log.tail(since="2999-01-01T00:00:00+00:00") == []
+
+
+def test_rotation_and_index_skip_segments(tmp_path):
+    """Test the log rotates into segments and filtered reads skip segments that cannot match."""
+    log = EventLog(tmp_path, segment_bytes=300)
+    for i in range(10):
+        log.append("beat", f"Event {i}", act=f"Act {i // 5 + 1}")
+    log.close()
+
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert len(index) == len(list(tmp_path.glob("events-*.jsonl"))) > 1
+    with patch.object(event_log, "_read_events", wraps=event_log._read_events) as reads:
+        assert [e["seq"] for e in log.tail(1, act="Act 1")] == [5]
+    read = {call.args[0].name for call in reads.call_args_list}
+    assert read and all("Act 1" in meta["acts"] for meta in index if meta["file"] in read)
+
+
+def test_reopen_recovers_unindexed_appends(tmp_path):
+    """Test a reopened log continues the sequence, rescanning segments the index missed."""
+    log = EventLog(tmp_path, fsync_batch=100, fsync_interval=60)
+    log.append("beat", "Synced")
+    log.sync()
+    log.append("beat", "Written but not indexed")
+    log._file.close()  # simulated crash: no final sync, index is stale
+
+    reopened = EventLog(tmp_path)
+    assert reopened.last_seq == 2
+    assert reopened.append("beat", "After restart")["seq"] == 3
+    reopened.close()
+
+
+def test_two_writers_share_one_sequence(tmp_path):
+    """Test two logs on one directory (two workers) see each other's appends and rotations."""
+    first = EventLog(tmp_path, segment_bytes=300, fsync_batch=100, fsync_interval=60)
+    second = EventLog(tmp_path, segment_bytes=300, fsync_batch=100, fsync_interval=60)
+    for i in range(12):
+        (first if i % 3 else second).append("beat", f"Event {i}")
+
+    expected = [(i + 1, f"Event {i}") for i in range(12)]
+    for log in (first, second):
+        assert [(e["seq"], e["text"]) for e in log.tail(None)] == expected
+        assert log.last_seq == 12
+    first.close()
+    second.close()
+    assert [(e["seq"], e["text"]) for e in EventLog(tmp_path).tail(None)] == expected
+
+
+def test_fsync_is_batched(tmp_path):
+    """Test appends are fsynced once per batch rather than once each."""
+    log = EventLog(tmp_path, fsync_batch=4, fsync_interval=60)
+    for i in range(8):
+        log.append("beat", f"Event {i}")
+    assert log.fsyncs == 2
+    log.close()
+
+
+def test_markdown_view_and_tools(tmp_path):
+    """Test the tools append to an instance's log and render its markdown view on demand."""
+    (tmp_path / "brew_party1").mkdir()
+    logs = EventLogs(tmp_path)
+    with patch.object(campaign_log_tools, "event_logs", logs):
+        logged = campaign_log_tools.log_campaign_event("brew_party1", "npc_met", "Met Bob", act="Act 1")
+        assert logged["status"] == "success" and logged["event"]["seq"] == 1
+
+        markdown = campaign_log_tools.get_campaign_events("brew_party1", markdown=True)["markdown"]
+        assert markdown.startswith("# Brew Party1 - Event Log")
+        assert "[Act 1] (npc_met) - Met Bob" in markdown
+
+        assert campaign_log_tools.get_campaign_events("../brew_party1")["status"] == "error"
+        assert campaign_log_tools.get_campaign_events("brew_party1", since="yesterday")["status"] == "error"
+    logs.close()
@@ -0,0 +1,111 @@
+"""Tests for the scriptable fake agent client and the load generator."""
+
+import asyncio
+
+import pytest
+from claude_agent_sdk import (
+    AssistantMessage,
+    ResultMessage,
+    StreamEvent,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    UserMessage,
+)
+
+from dnd_dm_agent.fake_client import FakeAgentClient, steps_from_messages
+from dnd_dm_agent.load_test import percentiles, run_load, spawn_server
+
+SCRIPT = [
+    [
+        {"text": "You push the door open."},
+        {"tool_use": "mcp__dnd__roll_dice", "input": {"notation": "1d20+3"}},
+        {"tool_result": "{'status': 'success', 'total': 17}"},
+        {"text": "It holds.", "stream": False},
+    ],
+    [{"sleep": 0.01}, {"text": "Second turn."}],
+]
+
+
+async def _turn(client, prompt="go"):
+    await client.query(prompt)
+    return [message async for message in client.receive_response()]
+
+
+@pytest.mark.asyncio
+async def test_default_client_streams_canned_narration():
+    """Test an unscripted client streams a narration echoing the prompt, then the full text."""
+    messages = await _turn(FakeAgentClient(delay=0), "I open the door")
+    deltas = "".join(m.event["delta"]["text"] for m in messages if isinstance(m, StreamEvent))
+    assert deltas.split() == "The DM considers: I open the door".split()
+    assert messages[-2].content[0].text == "The DM considers: I open the door"
+    assert isinstance(messages[-1], ResultMessage)
+
+
+@pytest.mark.asyncio
+async def test_script_replays_steps_and_cycles_turns():
+    """Test scripted turns replay text, tool uses and their results in order, then start over."""
+    client = FakeAgentClient(delay=0, script=SCRIPT)
+    first = [m for m in await _turn(client) if not isinstance(m, StreamEvent)]
+    tool_use = first[1].content[0]
+    assert isinstance(tool_use, ToolUseBlock) and tool_use.input == {"notation": "1d20+3"}
+    assert isinstance(first[2], UserMessage)
+    assert first[2].content[0].tool_use_id == tool_use.id
+    assert first[3].content[0].text == "It holds."
+    assert isinstance(first[4], ResultMessage)
+
+    second = await _turn(client)
+    assert second[-2].content[0].text == "Second turn."
+    third = await _turn(client)
+    assert [type(m) for m in third if not isinstance(m, StreamEvent)] == [type(m) for m in first]
+
+
+@pytest.mark.asyncio
+async def test_interrupt_stops_the_turn():
+    """Test an interrupt ends the scripted turn early, still with a result message."""
+    client = FakeAgentClient(delay=0.01, script=[[{"text": "one two three four five six"}, {"text": "never"}]])
+    await client.query("go")
+    seen = []
+    async for message in client.receive_response():
+        seen.append(message)
+        if len(seen) == 2:
+            await client.interrupt()
+    assert isinstance(seen[-1], ResultMessage)
+    assert all(not isinstance(m, AssistantMessage) for m in seen)
+
+
+def test_steps_from_messages_round_trips_a_recorded_turn():
+    """Test a recorded message stream converts to steps that replay the same blocks."""
+    recorded = [
+        AssistantMessage(
+            content=[ToolUseBlock(id="t1", name="mcp__dnd__roll_dice", input={"notation": "1d6"})], model="m"
+        ),
+        UserMessage(content=[ToolResultBlock(tool_use_id="t1", content="{'total': 4}")]),
+        AssistantMessage(content=[TextBlock(text="You take 4 damage.")], model="m"),
+    ]
+    steps = steps_from_messages(recorded)
+    assert steps == [
+        {"tool_use": "mcp__dnd__roll_dice", "input": {"notation": "1d6"}, "id": "t1"},
+        {"tool_result": "{'total': 4}", "tool_use_id": "t1"},
+        {"text": "You take 4 damage."},
+    ]
+    replayed = asyncio.run(_turn(FakeAgentClient(delay=0, script=[steps])))
+    assert steps_from_messages(replayed) == steps
+
+
+def test_percentiles_use_nearest_rank():
+    """Test percentiles pick the nearest-rank value and are None without samples."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentiles(values) == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    assert percentiles([3.0]) == {"p50": 3.0, "p95": 3.0, "p99": 3.0}
+    assert percentiles([]) == {"p50": None, "p95": None, "p99": None}
+
+
+def test_load_run_against_spawned_fake_server():
+    """Test the load generator times every turn of concurrent sessions on a fake-agent server."""
+    with spawn_server(extra_env={"DND_CLIENT_POOL_SIZE": "0"}) as url:
+        report = asyncio.run(run_load(url, sessions=3, turns=2, timeout=30))
+    assert report["errors"] == []
+    assert report["turns"] == 6
+    assert 0 < report["first_chunk"]["p50"] <= report["turn_duration"]["p50"]
+    assert report["turn_duration"]["p99"] >= report["turn_duration"]["p50"]
@@ -0,0 +1,82 @@
+"""Tests for the interactive REPL's session lifecycle."""
+
+import asyncio
+
+import pytest
+
+from dnd_dm_agent import interactive
+from dnd_dm_agent.fake_client import FakeAgentClient
+
+
+class TrackedClient(FakeAgentClient):
+    def __init__(self):
+        super().__init__(delay=0)
+        self.disconnected = False
+
+    async def disconnect(self) -> None:
+        self.disconnected = True
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """The narrating and bookkeeping clients the REPL connects, as TrackedClients."""
+    connected = {}
+
+    def connector(role):
+        async def connect():
+            connected[role] = TrackedClient()
+            return connected[role]
+
+        return connect
+
+    monkeypatch.setattr(interactive, "_connect_narrator", connector("narrator"))
+    monkeypatch.setattr(interactive, "_connect_bookkeeping_client", connector("bookkeeper"))
+    return connected
+
+
+def _lines(monkeypatch, *lines):
+    """Feed the prompt these lines; an exception instance is raised at that prompt instead."""
+    queue = list(lines)
+
+    async def read_line(prompt):
+        await asyncio.sleep(0.01)  # the player typing, while the client connects
+        line = queue.pop(0)
+        if isinstance(line, BaseException):
+            raise line
+        return line
+
+    monkeypatch.setattr(interactive, "_read_line", read_line)
+
+
+@pytest.mark.asyncio
+async def test_interrupt_mid_session_disconnects_the_client(clients, monkeypatch):
+    """Test Ctrl+C at the prompt (a cancellation under asyncio.run) still releases the agent client."""
+    _lines(monkeypatch, "I look around", asyncio.CancelledError())
+    await interactive.repl()
+    assert clients["narrator"].queries == ["I look around"]
+    assert clients["narrator"].disconnected
+
+
+@pytest.mark.asyncio
+async def test_interrupt_at_first_prompt_releases_the_connecting_client(clients, monkeypatch):
+    """Test an interrupt before the first line disconnects the client connected in the background."""
+    _lines(monkeypatch, KeyboardInterrupt())
+    await interactive.repl()
+    assert clients["narrator"].disconnected
+
+
+@pytest.mark.asyncio
+async def test_exit_closes_both_clients(clients, monkeypatch):
+    """Test a normal exit drains bookkeeping and disconnects the narrating and bookkeeping clients."""
+    _lines(monkeypatch, "I drink the potion and lose 3 HP", "exit")
+    await interactive.repl()
+    assert clients["narrator"].disconnected
+    assert clients["bookkeeper"].disconnected
+
+
+@pytest.mark.asyncio
+async def test_end_of_input_ends_the_session(clients, monkeypatch):
+    """Test EOF at the prompt (stdin closed) ends the session rather than being reported as an error."""
+    _lines(monkeypatch, "hello", EOFError())
+    await interactive.repl()
+    assert clients["narrator"].disconnected
@@ -0,0 +1,81 @@
+"""Tests for the rules knowledge base index."""
+
+import os
+
+from dnd_dm_agent.knowledge_index import INDEX_FILE, KNOWLEDGE_DIR, KnowledgeIndex, split_sections
+
+CONDITIONS = """# Conditions
+
+## Grappled
+A grappled creature's speed becomes 0. The condition ends if the grappler is incapacitated.
+
+## Prone
+A prone creature's only movement option is to crawl. Attack rolls against it have advantage within 5 feet.
+"""
+
+SPELLS = """# Spells
+
+## Fireball
+A bright streak flashes to a point you choose, then blossoms into an explosion of flame. 8d6 fire damage.
+"""
+
+
+def test_split_sections():
+    """Test markdown is split at headings with the preamble kept."""
+    sections = split_sections("Intro text\n\n# A\nalpha\n## B\nbeta")
+    assert [(s.heading, s.level) for s in sections] == [("", 0), ("A", 1), ("B", 2)]
+    assert sections[2].text == "## B\nbeta"
+
+
+def test_search_ranks_matching_sections(tmp_path):
+    """Test BM25 search returns the most relevant section first."""
+    (tmp_path / "conditions.md").write_text(CONDITIONS)
+    (tmp_path / "spells").mkdir()
+    (tmp_path / "spells" / "evocation.md").write_text(SPELLS)
+    index = KnowledgeIndex(tmp_path)
+
+    results = index.search("how does the grappled condition end", top_k=2)
+    assert results[0]["heading"] == "Grappled"
+    assert results[0]["file"] == "conditions.md"
+    assert index.search("fireball damage", top_k=1)[0]["file"] == "spells/evocation.md"
+    assert index.search("the of and") == []
+
+
+def test_index_is_persisted_and_refreshed_incrementally(tmp_path):
+    """Test only changed files are re-indexed, including across processes via the saved index."""
+    knowledge = tmp_path / "knowledge"
+    knowledge.mkdir()
+    (knowledge / "conditions.md").write_text(CONDITIONS)
+    (knowledge / "spells.md").write_text(SPELLS)
+    index_path = tmp_path / "index.json"
+
+    index = KnowledgeIndex(knowledge, index_path)
+    assert index.refresh()
+    assert index.files_indexed == 2
+    assert not index.refresh()
+
+    spells = knowledge / "spells.md"
+    spells.write_text(SPELLS + "\n## Shield\nAn invisible barrier of magical force appears.\n")
+    stat = spells.stat()
+    os.utime(spells, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    reloaded = KnowledgeIndex(knowledge, index_path)
+    assert reloaded.search("magical barrier", top_k=1)[0]["heading"] == "Shield"
+    assert reloaded.files_indexed == 1
+
+
+def test_searches_recheck_files_only_after_the_refresh_interval(tmp_path):
+    """Test a search trusts the index within the refresh interval, and an explicit refresh picks up changes."""
+    (tmp_path / "conditions.md").write_text(CONDITIONS)
+    index = KnowledgeIndex(tmp_path, refresh_interval=3600)
+    assert index.search("grappled", top_k=1)[0]["heading"] == "Grappled"
+
+    (tmp_path / "spells.md").write_text(SPELLS)
+    assert index.search("fireball") == []
+    assert index.refresh()
+    assert index.search("fireball", top_k=1)[0]["heading"] == "Fireball"
+
+
+def test_default_index_is_kept_out_of_the_skills_directory():
+    """Test the persisted index is not written among the skill files the CLI loads."""
+    assert KNOWLEDGE_DIR not in INDEX_FILE.parents
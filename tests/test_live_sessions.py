@@ -0,0 +1,104 @@
+"""Tests for live sessions parked across reconnects."""
+
+import asyncio
+import json
+
+import pytest
+
+from dnd_dm_agent.live_sessions import LiveSession, SessionRegistry
+from dnd_dm_agent.ws_writer import EventWriter
+
+
+class RecordingSocket:
+    """Stand-in WebSocket that records frames, or fails like a dropped connection."""
+
+    def __init__(self, fail: bool = False):
+        self.frames: list[dict] = []
+        self.fail = fail
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.frames.append(json.loads(text))
+
+
+def _session(session_id="s1", campaign="brew_party1", character="thork"):
+    live = LiveSession(session_id, campaign, character, client=None)
+    closed = []
+
+    async def close():
+        closed.append(session_id)
+
+    live.on_close(close)
+    return live, closed
+
+
+def _writer(socket):
+    writer = EventWriter(socket, coalesce_window=0)
+    writer.start()
+    return writer
+
+
+@pytest.mark.asyncio
+async def test_events_while_detached_are_replayed_in_order():
+    """Test undelivered and later events reach the next socket in order, with text merged and indicators dropped."""
+    live, _ = _session()
+    dropped = _writer(RecordingSocket(fail=True))
+    await live.attach(dropped)
+    await live.send({"type": "text_delta", "content": "The "})
+    await asyncio.sleep(0.01)
+    assert await live.detach(dropped)
+
+    await live.send({"type": "text_delta", "content": "door"})
+    await live.send({"type": "tool_use", "tool_name": "Read"})
+    await live.send({"type": "turn_complete"})
+    assert live.buffered == 2
+
+    socket = RecordingSocket()
+    writer = _writer(socket)
+    await live.attach(writer)
+    await writer.close()
+    assert socket.frames == [{"type": "text_delta", "content": "The door"}, {"type": "turn_complete"}]
+
+
+@pytest.mark.asyncio
+async def test_newer_socket_takes_over():
+    """Test detaching a socket another one has replaced does not park the session."""
+    live, _ = _session()
+    old, new = _writer(RecordingSocket()), _writer(RecordingSocket())
+    await live.attach(old)
+    await live.attach(new)
+    assert not await live.detach(old)
+    assert live.writer is new and live.detached_at is None
+    await new.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_reattaches_only_the_same_campaign_and_character():
+    """Test a reconnect gets its live session back, and a mismatched one is closed."""
+    registry = SessionRegistry(grace=60)
+    live, closed = _session()
+    registry.add(live)
+    assert await registry.take("s1", "brew_party1", "thork") is live
+    assert await registry.take("s1", "brew_party1", "sapphire") is None
+    assert closed == ["s1"] and len(registry) == 0
+
+
+@pytest.mark.asyncio
+async def test_parked_sessions_are_evicted():
+    """Test parked sessions close beyond the parked limit and after the grace period."""
+    registry = SessionRegistry(grace=0.05, max_parked=1)
+    closed = []
+    for session_id in ("a", "b"):
+        live, log = _session(session_id)
+        registry.add(live)
+        writer = _writer(RecordingSocket())
+        await live.attach(writer)
+        await live.detach(writer)
+        await registry.park(live)
+        closed.append(log)
+    assert closed == [["a"], []] and registry.stats()["parked"] == 1
+
+    await asyncio.sleep(0.3)
+    assert len(registry) == 0 and registry.evicted == 2
+    await registry.close()
@@ -0,0 +1,94 @@
+"""Tests for the queued JSON logging pipeline."""
+
+import asyncio
+import json
+import logging
+
+from dnd_dm_agent.logging_config import (
+    DebugSampler,
+    JsonLinesFileHandler,
+    bind_log_context,
+    setup_logging,
+    stop_logging,
+)
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_json_lines_with_context(tmp_path):
+    """Test records reach the JSON log with the session and turn of the task that logged them."""
+    logger = setup_logging("DEBUG", log_dir=tmp_path, name="test_logging_context")
+
+    async def session(session_id):
+        bind_log_context(session=session_id, turn=3)
+        logger.info("Turn complete for %s", session_id)
+
+    async def main():
+        await asyncio.gather(session("a"), session("b"))
+
+    asyncio.run(main())
+    logger.info("No session")
+    stop_logging(logger)
+
+    records = _records(tmp_path / "agent.jsonl")
+    assert {(r["session"], r["turn"], r["msg"]) for r in records[:2]} == {
+        ("a", 3, "Turn complete for a"),
+        ("b", 3, "Turn complete for b"),
+    }
+    assert "session" not in records[2] and records[2]["level"] == "INFO"
+
+
+def test_extra_fields_become_json_fields(tmp_path):
+    """Test ``extra=`` values of a call are written as fields of its JSON line."""
+    logger = setup_logging("INFO", log_dir=tmp_path, name="test_logging_extra")
+    logger.info("Dice roll %s = %s", "1d20", 14, extra={"tool": "roll_dice", "status": "success"})
+    stop_logging(logger)
+
+    (record,) = _records(tmp_path / "agent.jsonl")
+    assert record["msg"] == "Dice roll 1d20 = 14"
+    assert (record["tool"], record["status"]) == ("roll_dice", "success")
+    assert "args" not in record and "lineno" not in record
+
+
+def test_disabled_level_is_never_formatted(tmp_path):
+    """Test lazily formatted arguments of a disabled level are not rendered."""
+    logger = setup_logging("INFO", log_dir=tmp_path, name="test_logging_lazy")
+
+    class Payload:
+        rendered = 0
+
+        def __str__(self):
+            Payload.rendered += 1
+            return "payload"
+
+    logger.propagate = False
+    logger.debug("Tool invoked: %s", Payload())
+    stop_logging(logger)
+    assert Payload.rendered == 0
+    assert not (tmp_path / "agent.jsonl").exists()
+
+
+def test_debug_sampling_per_call_site():
+    """Test the sampler keeps one in N DEBUG records of each call site and every other level."""
+    sampler = DebugSampler(0.25)
+
+    def record(level, lineno):
+        return logging.LogRecord("t", level, "tools.py", lineno, "msg", None, None)
+
+    kept = [sampler.filter(record(logging.DEBUG, 10)) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sampler.filter(record(logging.DEBUG, 20))
+    assert all(sampler.filter(record(logging.INFO, 10)) for _ in range(4))
+
+
+def test_file_rotates_between_batches(tmp_path):
+    """Test the JSON log rotates once it would grow past its size limit."""
+    handler = JsonLinesFileHandler(tmp_path / "agent.jsonl", max_bytes=500, backups=2)
+    for i in range(10):
+        handler.emit_batch([logging.LogRecord("t", logging.INFO, "x.py", 1, f"batch {i} " + "x" * 80, None, None)])
+    handler.close()
+    assert (tmp_path / "agent.jsonl.1").exists() and (tmp_path / "agent.jsonl.2").exists()
+    assert not (tmp_path / "agent.jsonl.3").exists()
+    assert _records(tmp_path / "agent.jsonl")[-1]["msg"].startswith("batch 9")
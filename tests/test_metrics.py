@@ -0,0 +1,73 @@
+"""Tests for per-turn metrics."""
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolUseBlock
+
+from dnd_dm_agent.metrics import MetricsRegistry
+
+
+def _result(**kwargs):
+    return ResultMessage(
+        subtype="success", duration_ms=1, duration_api_ms=1, is_error=False, num_turns=1, session_id="s", **kwargs
+    )
+
+
+def _run_turn(registry, phase, session_id="s1"):
+    turn = registry.turn(phase, session_id)
+    turn.observe(AssistantMessage(content=[ToolUseBlock(id="t1", name="Read", input={})], model="m"))
+    turn.observe(AssistantMessage(content=[TextBlock(text="The door creaks open.")], model="m"))
+    turn.observe(
+        _result(
+            usage={"input_tokens": 10, "output_tokens": 20, "cache_read_input_tokens": 3000},
+            total_cost_usd=0.01,
+        )
+    )
+    registry.record(turn)
+    return turn
+
+
+def test_turn_metrics_from_message_stream():
+    """Test a turn's tool calls, first-text latency, usage and cost are captured."""
+    turn = _run_turn(MetricsRegistry(), "narration")
+    assert turn.tool_calls == 1
+    assert turn.time_to_first_text is not None and turn.duration >= turn.time_to_first_text
+    assert turn.usage["cache_read_input_tokens"] == 3000
+    assert turn.usage["cache_creation_input_tokens"] == 0
+    assert turn.cost_usd == 0.01
+
+
+def test_render_prometheus_text():
+    """Test histograms and counters are rendered per phase in Prometheus format."""
+    registry = MetricsRegistry()
+    registry.open_session("s1")
+    _run_turn(registry, "narration")
+    _run_turn(registry, "narration")
+    _run_turn(registry, "bookkeeping")
+
+    text = registry.render()
+    assert "# TYPE dnd_turn_duration_seconds histogram" in text
+    assert 'dnd_tool_calls_per_turn_bucket{phase="narration",le="1"} 2' in text
+    assert 'dnd_cache_read_tokens_per_turn_bucket{phase="bookkeeping",le="1000"} 0' in text
+    assert 'dnd_cache_read_tokens_per_turn_count{phase="bookkeeping"} 1' in text
+    assert 'dnd_turns_total{phase="narration"} 2' in text
+    assert "dnd_active_sessions 1" in text
+
+    totals = registry.close_session("s1")
+    assert totals["narration_turns"] == 2 and totals["bookkeeping_turns"] == 1
+    assert totals["cache_read_input_tokens"] == 9000
+    assert "dnd_active_sessions 0" in registry.render()
+
+
+def test_prompt_cache_read_ratio_from_measured_usage():
+    """Test the cache read ratio is the share of reported prompt tokens that were cache reads."""
+    registry = MetricsRegistry()
+    for usage in (
+        {"input_tokens": 100, "cache_creation_input_tokens": 3900},
+        {"input_tokens": 100, "cache_read_input_tokens": 3900},
+    ):
+        turn = registry.turn("narration", "s1")
+        turn.observe(_result(usage=usage))
+        registry.record(turn)
+
+    text = registry.render()
+    assert 'dnd_prompt_cache_read_ratio{phase="narration"} 0.4875' in text
+    assert "layer" not in text
@@ -0,0 +1,32 @@
+"""Tests for the layered system prompt."""
+
+from dnd_dm_agent.claude_agent import SYSTEM_PROMPT, campaign_template, get_options, prompt_layers, render_layers
+
+
+def test_layers_are_ordered_most_shared_first():
+    """Test global, campaign and character layers come in that order."""
+    layers = prompt_layers("a_most_potent_brew_party1", "thork")
+    assert [layer.name for layer in layers] == ["global", "campaign", "character"]
+    assert layers[0].text == SYSTEM_PROMPT
+    assert "get_campaign_section" in layers[1].text
+    assert "Active character: thork" in layers[2].text
+
+
+def test_campaign_layer_is_shared_across_instances():
+    """Test two parties in the same template share every layer but the character one."""
+    party1 = render_layers(prompt_layers("a_most_potent_brew_party1", "thork"))
+    party2 = render_layers(prompt_layers("a_most_potent_brew_weekenders", "sapphire"))
+    shared = render_layers(prompt_layers("a_most_potent_brew_party1", "thork")[:2])
+    assert party1.startswith(shared) and party2.startswith(shared)
+    assert "party1" not in shared
+
+
+def test_unknown_campaign_has_no_campaign_layer():
+    """Test campaigns without a template fall back to global + character layers."""
+    assert campaign_template("a_most_potent_brew_party1") == "a_most_potent_brew"
+    assert campaign_template("homebrew") is None
+    assert [layer.name for layer in prompt_layers("homebrew", "thork")] == ["global", "character"]
+    assert [layer.name for layer in prompt_layers()] == ["global"]
+    assert get_options(campaign="homebrew", character="thork").system_prompt.startswith(
+        "<!-- prompt-layer: global -->\n" + SYSTEM_PROMPT
+    )
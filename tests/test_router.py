@@ -0,0 +1,87 @@
+"""Tests for multi-worker session routing."""
+
+from dnd_dm_agent import router as router_module
+from dnd_dm_agent.router import _CAMPAIGN_PATH, SessionRouter
+
+WORKERS = ["http://127.0.0.1:8001", "http://127.0.0.1:8002", "http://127.0.0.1:8003"]
+
+
+def test_sessions_spread_and_stay_pinned():
+    """Test new sessions go to the least-loaded worker and reconnects keep their worker."""
+    router = SessionRouter(WORKERS)
+    placed = [router.pick(f"s{i}") for i in range(3)]
+    assert sorted(placed) == WORKERS
+    router.release("s0")
+    assert router.pick("s0") == placed[0]
+
+
+def test_new_sessions_follow_reported_load():
+    """Test the least-loaded worker by load report takes the next session."""
+    router = SessionRouter(WORKERS)
+    router.report(WORKERS[0], {"pid": 1, "sessions": 4, "campaigns": []})
+    router.report(WORKERS[1], {"pid": 2, "sessions": 0, "campaigns": []})
+    router.report(WORKERS[2], {"pid": 3, "sessions": 2, "campaigns": []})
+    assert router.pick("new") == WORKERS[1]
+    assert router.least_loaded() == WORKERS[1]
+
+
+def test_sessions_of_a_campaign_share_a_worker():
+    """Test a campaign's sessions land on the worker already hosting it, even if busier."""
+    router = SessionRouter(WORKERS)
+    router.report(WORKERS[2], {"pid": 3, "sessions": 5, "campaigns": ["brew_party1"]})
+    assert router.pick("a", campaign="brew_party1") == WORKERS[2]
+    assert router.pick("b", campaign="brew_party2") != WORKERS[2]
+
+
+def test_unreachable_worker_loses_its_sessions():
+    """Test a session pinned to a worker that went down is re-placed on a healthy one."""
+    router = SessionRouter(WORKERS)
+    first = router.pick("s")
+    router.release("s")
+    router.report(first, None)
+    assert router.pick("s") != first
+
+
+def test_idle_pins_are_evicted():
+    """Test pins of closed sessions are forgotten after the TTL, open ones are kept."""
+    router = SessionRouter(WORKERS, pin_ttl=-1)
+    router.pick("closed")
+    router.pick("open")
+    router.release("closed")
+    router.pick("other")
+    assert router.stats()["pinned_sessions"] == 2
+
+
+def test_placements_survive_load_reports_until_confirmed():
+    """Test a report that predates a placement keeps it counted, and one listing the session replaces it."""
+    router = SessionRouter(WORKERS)
+    host = router.pick("a", campaign="brew_party1")
+    for url in WORKERS:
+        router.report(url, {"pid": 1, "sessions": 0, "session_ids": [], "campaigns": []})
+    assert router.pick("b", campaign="brew_party1") == host
+    assert router.workers[host].sessions == 2
+
+    router.report(host, {"pid": 1, "sessions": 2, "session_ids": ["a", "b"], "campaigns": ["brew_party1"]})
+    assert router.workers[host].pending == {}
+    assert router.workers[host].sessions == 2
+
+
+def test_unconfirmed_placements_expire(monkeypatch):
+    """Test a placement no report confirms stops counting after the pending TTL."""
+    monkeypatch.setattr(router_module, "PENDING_TTL", -1)
+    router = SessionRouter(WORKERS)
+    host = router.pick("gone", campaign="brew_party1")
+    router.report(host, {"pid": 1, "sessions": 0, "session_ids": [], "campaigns": []})
+    assert router.workers[host].sessions == 0 and not router.workers[host].campaigns
+
+
+def test_campaign_requests_go_to_its_host():
+    """Test REST requests about a campaign go to the worker hosting it, others to the least loaded."""
+    router = SessionRouter(WORKERS)
+    router.report(WORKERS[0], {"pid": 1, "sessions": 0, "session_ids": [], "campaigns": []})
+    router.report(WORKERS[1], {"pid": 2, "sessions": 9, "session_ids": [], "campaigns": ["brew_party1"]})
+    assert router.campaign_worker("brew_party1") == WORKERS[1]
+    assert router.campaign_worker("brew_party2") == router.least_loaded()
+    assert _CAMPAIGN_PATH.match("api/character/brew_party1/sapphire").group(1) == "brew_party1"
+    assert _CAMPAIGN_PATH.match("api/campaigns/brew_party1/log").group(1) == "brew_party1"
+    assert _CAMPAIGN_PATH.match("api/campaigns") is None
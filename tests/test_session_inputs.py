@@ -0,0 +1,45 @@
+"""Tests for the per-session input queue."""
+
+import asyncio
+
+import pytest
+
+from dnd_dm_agent.session_inputs import InputQueue
+
+
+@pytest.mark.asyncio
+async def test_inputs_sent_during_a_turn_are_merged():
+    """Test inputs queued while a turn runs come back as one follow-up query."""
+    inputs = InputQueue()
+    inputs.put("I open the door")
+    assert await inputs.get() == "I open the door"
+
+    inputs.put("wait")
+    inputs.put("I listen first")
+    assert await inputs.get() == "wait\n\nI listen first"
+    assert (inputs.received, inputs.merged) == (3, 1)
+
+
+@pytest.mark.asyncio
+async def test_get_waits_for_input_and_ends_on_close():
+    """Test get blocks until input arrives and returns None once closed."""
+    inputs = InputQueue()
+    waiter = asyncio.create_task(inputs.get())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    inputs.put("hello")
+    assert await waiter == "hello"
+
+    inputs.put("unanswered")
+    inputs.close()
+    assert await inputs.get() is None
+
+
+@pytest.mark.asyncio
+async def test_oldest_inputs_are_dropped_beyond_the_limit():
+    """Test a flood of inputs keeps only the most recent ones."""
+    inputs = InputQueue(max_pending=2)
+    for text in ("a", "b", "c"):
+        inputs.put(text)
+    assert await inputs.get() == "b\n\nc"
+    assert inputs.dropped == 1
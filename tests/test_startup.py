@@ -0,0 +1,28 @@
+"""Tests for cold-start behaviour of the entry modules."""
+
+from dnd_dm_agent import claude_agent
+from dnd_dm_agent.startup_bench import measure_import, regressions
+
+
+def test_cli_and_repl_imports_defer_heavy_dependencies():
+    """Test importing the CLI and REPL modules loads no SDK, numpy or SQLite and starts no threads."""
+    for module in ("dnd_dm_agent.claude_agent", "dnd_dm_agent.interactive"):
+        measured = measure_import(module, runs=1)
+        assert measured["loaded"] == [], module
+        assert measured["threads"] == 1, module
+
+
+def test_mcp_server_is_built_once_with_every_tool():
+    """Test the MCP server is built on first use and shared afterwards."""
+    server = claude_agent.mcp_server()
+    assert claude_agent.dnd_tools is server
+    assert claude_agent.get_options().mcp_servers["dnd"] is server
+    tools = {name for name, *_ in claude_agent._TOOL_SPECS}
+    assert {f"mcp__dnd__{name}" for name in tools} <= set(claude_agent.get_options().allowed_tools)
+
+
+def test_regressions_flag_only_slowdowns_beyond_tolerance():
+    """Test the benchmark reports timings slower than the baseline by more than the tolerance."""
+    baseline = {"first_query_seconds": 1.0, "imports": {"m": {"seconds": 0.1}}}
+    result = {"first_query_seconds": 1.2, "imports": {"m": {"seconds": 0.2}}}
+    assert regressions(result, baseline, tolerance=0.25) == ["import m: 200 ms (baseline 100 ms)"]
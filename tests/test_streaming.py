@@ -0,0 +1,38 @@
+"""Tests for partial-message (text delta) streaming."""
+
+from claude_agent_sdk import AssistantMessage, StreamEvent, TextBlock
+
+from dnd_dm_agent.claude_agent import get_options, text_delta
+from dnd_dm_agent.metrics import MetricsRegistry
+
+
+def _event(event, parent_tool_use_id=None):
+    return StreamEvent(uuid="u", session_id="s", event=event, parent_tool_use_id=parent_tool_use_id)
+
+
+def _delta(text, **kwargs):
+    return _event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}, **kwargs)
+
+
+def test_stream_text_enables_partial_messages():
+    """Test narrating clients opt into partial messages and others do not."""
+    assert get_options(stream_text=True).include_partial_messages is True
+    assert get_options().include_partial_messages is False
+
+
+def test_text_delta_extracts_narration_only():
+    """Test only top-level text deltas yield text."""
+    assert text_delta(_delta("The door")) == "The door"
+    assert text_delta(_delta("subagent", parent_tool_use_id="t1")) is None
+    assert text_delta(_event({"type": "content_block_delta", "delta": {"type": "input_json_delta"}})) is None
+    assert text_delta(_event({"type": "message_start"})) is None
+    assert text_delta(AssistantMessage(content=[TextBlock(text="The door creaks.")], model="m")) is None
+
+
+def test_first_text_latency_counts_from_first_delta():
+    """Test time to first text is taken at the first delta, not the finished block."""
+    turn = MetricsRegistry().turn("narration")
+    turn.observe(_delta("The"))
+    first = turn.time_to_first_text
+    turn.observe(AssistantMessage(content=[TextBlock(text="The door creaks.")], model="m"))
+    assert first is not None and turn.time_to_first_text == first
@@ -0,0 +1,190 @@
+"""Tests for typed tool results and their forwarding as WebSocket events."""
+
+import asyncio
+import json
+import shutil
+from pathlib import Path
+
+import jsonschema
+import pytest
+from websockets.asyncio.client import connect
+
+from dnd_dm_agent import claude_agent
+from dnd_dm_agent.character_store import CharacterStore
+from dnd_dm_agent.event_log import EventLogs
+from dnd_dm_agent.knowledge_index import KnowledgeIndex
+from dnd_dm_agent.load_test import spawn_server
+from dnd_dm_agent.tool_results import (
+    DICE_ROLL_SCHEMA,
+    RESULT_SCHEMAS,
+    parse_result,
+    result_text,
+    tool_result,
+)
+from dnd_dm_agent.tools import (
+    campaign_instance_tools,
+    campaign_log_tools,
+    character_tools,
+    combat_tools,
+    knowledge_tools,
+)
+from dnd_dm_agent.tools.utility_tools import dice_odds, roll_dice, roll_dice_batch
+
+PREGENERATED = Path(__file__).parent.parent / "available_campaigns" / "a_most_potent_brew" / "pregenerated_characters"
+
+# Calls of each tool, covering its success results and, where it has one, an error
+TOOL_CALLS = {
+    "roll_dice": [{"notation": "2d6+1"}, {"notation": "(1d8+2)*2"}, {"notation": "bad"}],
+    "roll_dice_batch": [{"notations": ["1d20+5", "4d6kh3"], "times": 2, "target": 12}, {"notations": ["bad"]}],
+    "dice_odds": [{"notation": "1d20+5", "dc": 15}, {"notation": "bad"}],
+    "create_campaign_instance": [
+        {"campaign_template": "a_most_potent_brew", "instance_name": "new"},
+        {"campaign_template": "a_most_potent_brew", "instance_name": "new"},
+    ],
+    "get_character_stats": [
+        {"campaign_instance": "brew_party1", "character_name": "dwarf_fighter"},
+        {"campaign_instance": "brew_party1", "character_name": "nobody"},
+    ],
+    "update_character_stats": [
+        {"campaign_instance": "brew_party1", "character_name": "dwarf_fighter", "changes": {"hp_current": 5}},
+        {"campaign_instance": "brew_party1", "character_name": "dwarf_fighter", "changes": {"hp_current": "x"}},
+    ],
+    "resolve_attack": [
+        {"campaign_instance": "brew_party1", "attacker": "dwarf_fighter", "target": "Goblin", "target_ac": 1},
+        {"campaign_instance": "brew_party1", "attacker": "dwarf_fighter", "target": "Goblin"},
+    ],
+    "search_knowledge": [{"query": "grappled condition"}],
+    "get_campaign_section": [
+        {"campaign": "a_most_potent_brew"},
+        {"campaign": "a_most_potent_brew", "section": "Beat 1.1"},
+        {"campaign": "missing"},
+    ],
+    "log_campaign_event": [
+        {"campaign_instance": "brew_party1", "kind": "npc_met", "text": "Met Bob", "act": "Act 1"},
+        {"campaign_instance": "missing", "kind": "npc_met", "text": "Met Bob"},
+    ],
+    "get_campaign_events": [{"campaign_instance": "brew_party1", "kind": "npc_met"}, {"campaign_instance": "missing"}],
+}
+
+
+def _schema(name):
+    return RESULT_SCHEMAS[name]
+
+
+def test_every_tool_has_a_result_schema():
+    """Test each custom tool has a result schema, and forwarded tools an event type."""
+    assert set(RESULT_SCHEMAS) == {spec.name for spec in claude_agent._TOOL_SPECS}
+    for schema in RESULT_SCHEMAS.values():
+        jsonschema.Draft7Validator.check_schema(schema)
+    assert claude_agent.tool_event("mcp__dnd__roll_dice") == "dice_result"
+    assert claude_agent.tool_event("mcp__dnd__create_campaign_instance") == "campaign_created"
+    assert claude_agent.tool_event("mcp__dnd__get_character_stats") is None
+    assert claude_agent.tool_event("Read") is None
+
+
+def test_dice_results_match_their_schemas():
+    """Test the dice tools' success and error results validate against the declared schemas."""
+    jsonschema.validate(roll_dice("1d20+3 adv"), _schema("roll_dice"))
+    jsonschema.validate(roll_dice("bad"), _schema("roll_dice"))
+    jsonschema.validate(roll_dice_batch(["1d20+5", "2d6"], times=2, target=12), _schema("roll_dice_batch"))
+    jsonschema.validate(dice_odds("1d20+5", dc=15), _schema("dice_odds"))
+    with pytest.raises(jsonschema.ValidationError):
+        jsonschema.validate({"status": "success", "notation": "1d20"}, DICE_ROLL_SCHEMA)
+
+
+@pytest.fixture
+def campaigns(tmp_path, monkeypatch):
+    """A campaigns directory with one instance holding two pregenerated characters, and a small knowledge base."""
+    characters = tmp_path / "campaigns" / "brew_party1" / "characters"
+    characters.mkdir(parents=True)
+    for sheet in ("dwarf_fighter.md", "halfling_wizard.md"):
+        shutil.copy(PREGENERATED / sheet, characters / sheet)
+    (tmp_path / "knowledge").mkdir()
+    (tmp_path / "knowledge" / "conditions.md").write_text("# Conditions\n\n## Grappled\nSpeed becomes 0.\n")
+
+    store = CharacterStore(tmp_path / "campaigns", db_path=":memory:")
+    logs = EventLogs(tmp_path / "campaigns")
+    monkeypatch.setattr(campaign_instance_tools, "CAMPAIGNS_DIR", tmp_path / "campaigns")
+    monkeypatch.setattr(character_tools, "character_store", store)
+    monkeypatch.setattr(combat_tools, "character_store", store)
+    monkeypatch.setattr(campaign_log_tools, "event_logs", logs)
+    monkeypatch.setattr(
+        knowledge_tools, "knowledge_index", KnowledgeIndex(tmp_path / "knowledge", tmp_path / "index.json")
+    )
+    yield tmp_path / "campaigns"
+    logs.close()
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_every_tool_result_matches_its_schema(campaigns):
+    """Test what each tool wrapper actually returns validates against that tool's declared result schema."""
+    assert set(TOOL_CALLS) == set(RESULT_SCHEMAS)
+    for spec in claude_agent._TOOL_SPECS:
+        statuses = set()
+        for args in TOOL_CALLS[spec.name]:
+            result = parse_result((await spec.handler(args))["content"])
+            jsonschema.validate(result, RESULT_SCHEMAS[spec.name])
+            statuses.add(result["status"])
+        assert "success" in statuses, spec.name
+
+
+@pytest.mark.asyncio
+async def test_tool_wrapper_returns_json_text():
+    """Test a wrapper gives the model JSON text that parses back to the tool's result."""
+    response = await claude_agent.roll_dice({"notation": "2d6+1"})
+    result = parse_result(response["content"])
+    assert result["status"] == "success" and result["notation"] == "2d6+1"
+    assert response["is_error"] is False
+
+
+def test_parse_result_reads_json_with_apostrophes():
+    """Test results are parsed as JSON, which survives apostrophes the repr round trip broke on."""
+    message = "Campaign instance 'brew_party1' created!"
+    assert parse_result(tool_result({"status": "success", "message": message})["content"])["message"] == message
+    assert parse_result("not json") is None
+    assert parse_result("[1, 2]") is None
+
+
+def test_result_text_reads_strings_and_content_blocks():
+    """Test tool result text is read from either content form the SDK delivers."""
+    assert result_text('{"a": 1}') == '{"a": 1}'
+    assert result_text([{"type": "text", "text": '{"a": '}, {"type": "text", "text": "1}"}]) == '{"a": 1}'
+    assert result_text(None) == ""
+
+
+def test_error_results_are_flagged():
+    """Test error results are reported to the agent as tool errors."""
+    assert tool_result({"status": "error", "error_message": "nope"})["is_error"] is True
+
+
+def test_server_forwards_typed_events(tmp_path):
+    """Test a dnd tool result reaches the browser as its typed event, and other tools' results do not."""
+    result = {"status": "success", "notation": "1d20", "individual_rolls": [12], "total": 12, "modifier": 0}
+    script = tmp_path / "script.json"
+    script.write_text(
+        json.dumps(
+            [
+                [
+                    {"tool_use": "mcp__dnd__roll_dice", "input": {"notation": "1d20"}},
+                    {"tool_result": json.dumps(result)},
+                    {"tool_use": "Read", "input": {"file_path": "notes.md"}},
+                    {"tool_result": "It's a note"},
+                    {"text": "A twelve.", "stream": False},
+                ]
+            ]
+        )
+    )
+
+    async def turn(url):
+        async with connect(f"ws{url.removeprefix('http')}/ws/typed") as ws:
+            await ws.send(json.dumps({"type": "user_input", "content": "I roll"}))
+            events = []
+            while not events or events[-1]["type"] != "turn_complete":
+                events.append(json.loads(await asyncio.wait_for(ws.recv(), 30)))
+            return events
+
+    with spawn_server(str(script), extra_env={"DND_CLIENT_POOL_SIZE": "0"}) as url:
+        events = asyncio.run(turn(url))
+    typed = [e for e in events if e["type"] not in ("tool_use", "text_chunk", "turn_complete")]
+    assert typed == [{"type": "dice_result", "tool": "roll_dice", "result": result}]
@@ -1,6 +1,8 @@
 """Tests for utility tools - dice rolling."""
 
-from dnd_dm_agent.tools.utility_tools import parse_dice_notation, roll_dice
+import pytest
+
+from dnd_dm_agent.tools.utility_tools import dice_odds, parse_dice_notation, roll_dice, roll_dice_batch
 
 
 # Dice rolling tests (moved from test_dice.py)
@@ -19,4 +21,81 @@ def test_parse_dice_notation():
     assert parse_dice_notation("1d20") == (1, 20, 0)
     assert parse_dice_notation("2d6+3") == (2, 6, 3)
     assert parse_dice_notation("d8-2") == (1, 8, -2)
-    assert parse_dice_notation("3d4") == (3, 4, 0)
\ No newline at end of file
+    assert parse_dice_notation("3d4") == (3, 4, 0)
+
+
+def test_roll_dice_batch():
+    """Test batch rolling preserves input order and repeats."""
+    result = roll_dice_batch(["1d20+4", "2d6+2", "1d20+4"], times=2, target=15)
+    assert result["status"] == "success"
+    assert [r["notation"] for r in result["results"]] == ["1d20+4"] * 2 + ["2d6+2"] * 2 + ["1d20+4"] * 2
+    for r in result["results"]:
+        assert r["total"] == sum(r["individual_rolls"]) + r["modifier"]
+        assert r["success"] == (r["total"] >= 15)
+    assert result["grand_total"] == sum(r["total"] for r in result["results"])
+    assert result["successes"] == sum(r["success"] for r in result["results"])
+
+
+def test_modifier_only_reported_when_it_sums_to_the_total():
+    """Test a scaled expression omits the modifier rather than reporting one that does not add up."""
+    result = roll_dice("(1d8+2)*2")
+    assert result["status"] == "success"
+    assert "modifier" not in result
+    assert result["total"] == (result["individual_rolls"][0] + 2) * 2
+
+
+def test_roll_size_is_capped():
+    """Test huge dice counts and batches are rejected instead of returning enormous results."""
+    assert roll_dice("10000000d6")["status"] == "error"
+    assert roll_dice_batch(["1d20"] * 10, times=10_000)["status"] == "error"
+
+
+def test_roll_dice_batch_advantage():
+    """Test advantage keeps the higher of two d20s."""
+    result = roll_dice_batch(["1d20+5 adv"], times=50)
+    for r in result["results"]:
+        assert len(r["individual_rolls"]) == 1
+        assert r["individual_rolls"][0] >= r["dropped_rolls"][0]
+
+
+def test_roll_dice_batch_invalid():
+    """Test invalid notation returns an error status."""
+    result = roll_dice_batch(["1d20", "nope"])
+    assert result["status"] == "error"
+
+
+def test_dice_odds():
+    """Test exact odds for a d20 check against a DC."""
+    result = dice_odds("1d20+5", dc=15)
+    assert result["status"] == "success"
+    assert result["min"] == 6 and result["max"] == 25
+    assert result["mean"] == 15.5
+    assert result["p_success"] == 0.55
+    assert result["percentiles"]["p50"] == 15
+
+
+def test_dice_odds_extended():
+    """Test odds for rerolls, exploding dice and out-of-range DCs."""
+    gwf = dice_odds("2d6r<=2")
+    assert gwf["mean"] == pytest.approx(2 * 25 / 6, abs=1e-3)
+    assert dice_odds("1d6!")["mean"] == pytest.approx(4.2, abs=1e-3)
+    assert dice_odds("1d20", dc=1)["p_success"] == 1.0
+    assert dice_odds("1d20", dc=30)["p_success"] == 0.0
+    assert dice_odds("bogus")["status"] == "error"
+
+
+def test_roll_dice_expression():
+    """Test roll_dice accepts full expressions with variables."""
+    result = roll_dice("2d6+1d4+STR", variables={"STR": 3})
+    assert result["status"] == "success"
+    assert len(result["individual_rolls"]) == 3
+    assert result["total"] == sum(result["individual_rolls"]) + 3
+    assert roll_dice("1d20+STR")["status"] == "error"
+
+
+def test_roll_dice_batch_per_roll_variables():
+    """Test a list-valued variable gives each repetition its own modifier."""
+    result = roll_dice_batch(["1d20+STR", "1d20 + STR"], times=3, variables={"STR": [1, 2, 3]})
+    assert [r["modifier"] for r in result["results"]] == [1, 2, 3, 1, 2, 3]
+    assert [r["notation"] for r in result["results"]] == ["1d20+STR"] * 3 + ["1d20 + STR"] * 3
+    assert roll_dice_batch(["1d20+STR"], times=2, variables={"STR": [1]})["status"] == "error"
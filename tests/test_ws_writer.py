@@ -0,0 +1,131 @@
+"""Tests for the coalescing WebSocket event writer."""
+
+import asyncio
+import json
+
+import pytest
+
+from dnd_dm_agent.ws_writer import EventWriter
+
+
+class SlowSocket:
+    """Stand-in WebSocket that records frames and can be held to simulate a lagging client."""
+
+    def __init__(self):
+        self.frames: list[dict] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.frames.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_adjacent_text_chunks_are_merged():
+    """Test a burst of text chunks leaves as one frame."""
+    socket = SlowSocket()
+    writer = EventWriter(socket, coalesce_window=0.01)
+    writer.start()
+    for word in ("The ", "door ", "creaks."):
+        await writer.send({"type": "text_chunk", "content": word})
+    await writer.send({"type": "turn_complete"})
+    await writer.close()
+
+    assert socket.frames == [{"type": "text_chunk", "content": "The door creaks."}, {"type": "turn_complete"}]
+    assert writer.stats()["merged"] == 2
+
+
+@pytest.mark.asyncio
+async def test_text_deltas_merge_but_not_into_the_reconciling_chunk():
+    """Test deltas are merged with each other and the full block follows as its own frame."""
+    socket = SlowSocket()
+    socket.gate.clear()
+    writer = EventWriter(socket, coalesce_window=0)
+    writer.start()
+    await writer.send({"type": "turn_complete"})
+    for word in ("The ", "door"):
+        await writer.send({"type": "text_delta", "content": word})
+    await writer.send({"type": "text_chunk", "content": "The door"})
+    socket.gate.set()
+    await writer.close()
+
+    assert socket.frames[1:] == [
+        {"type": "text_delta", "content": "The door"},
+        {"type": "text_chunk", "content": "The door"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_indicators_are_replaced_and_dropped_when_client_lags():
+    """Test queued indicators collapse to the latest and are dropped past the lag threshold."""
+    socket = SlowSocket()
+    socket.gate.clear()
+    writer = EventWriter(socket, coalesce_window=0, lag_threshold=3)
+    writer.start()
+    await writer.send({"type": "turn_complete"})
+    await asyncio.sleep(0.01)  # the writer is now stuck on the first frame
+
+    await writer.send({"type": "tool_use", "display_name": "reading files"})
+    await writer.send({"type": "tool_use", "display_name": "rolling dice"})
+    await writer.send({"type": "text_chunk", "content": "a"})
+    await writer.send({"type": "text_chunk", "content": "b"})
+    await writer.send({"type": "character_patch", "changes": {"hp_current": 3}})
+    await writer.send({"type": "open_character_sheet"})  # depth 3: dropped
+    assert writer.depth == 3
+
+    socket.gate.set()
+    await writer.close()
+    assert [f["type"] for f in socket.frames] == ["turn_complete", "tool_use", "text_chunk", "character_patch"]
+    assert socket.frames[1]["display_name"] == "rolling dice"
+    assert socket.frames[2]["content"] == "ab"
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_backpressure():
+    """Test send waits for room once the queue is full instead of dropping events."""
+    socket = SlowSocket()
+    socket.gate.clear()
+    writer = EventWriter(socket, maxsize=1, coalesce_window=0)
+    writer.start()
+    await writer.send({"type": "error", "error": "1"})
+    await asyncio.sleep(0.01)
+    await writer.send({"type": "error", "error": "2"})
+
+    blocked = asyncio.create_task(writer.send({"type": "error", "error": "3"}))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    socket.gate.set()
+    await blocked
+    await writer.close()
+    assert [f["error"] for f in socket.frames] == ["1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_msgpack_encoding_sends_binary_frames():
+    """Test a MessagePack writer sends each event as one binary frame."""
+    msgpack = pytest.importorskip("msgpack")
+
+    class BinarySocket:
+        def __init__(self):
+            self.frames = []
+
+        async def send_bytes(self, data):
+            self.frames.append(msgpack.unpackb(data))
+
+    socket = BinarySocket()
+    writer = EventWriter(socket, coalesce_window=0, encoding="msgpack")
+    writer.start()
+    await writer.send({"type": "dice_result", "tool": "roll_dice", "result": {"total": 12}})
+    await writer.close()
+    assert socket.frames == [{"type": "dice_result", "tool": "roll_dice", "result": {"total": 12}}]
+
+
+def test_msgpack_falls_back_to_json_when_unavailable(monkeypatch):
+    """Test asking for MessagePack without msgpack installed gets JSON."""
+    from dnd_dm_agent import ws_writer
+
+    monkeypatch.setattr(ws_writer, "msgpack", None)
+    assert ws_writer.negotiate_encoding("msgpack") == "json"
+    assert ws_writer.negotiate_encoding("json") == "json"